@@ -1,6 +1,16 @@
+import math
+import time
 import streamlit as st
-from datetime import datetime
-from database import init_supabase
+import ativos
+import diretorio
+import graficos
+import importacao
+from datetime import date, datetime, timedelta
+from database import init_supabase, conectar_firebird, conn_data_da_empresa
+from paginas.comum import memo
+import planos
+import provisionamento
+import saude
 from streamlit_modal import Modal
 
 
@@ -9,18 +19,14 @@ from streamlit_modal import Modal
 # =========================
 
 def load_external_css():
-    css_file = "style.css"
-    try:
-        with open(css_file, "r", encoding="utf-8") as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-    except FileNotFoundError:
+    if not ativos.injetar_css():
         st.warning("Arquivo CSS não encontrado, usando estilo padrão.")
 
 
 def show_header():
     col1, col2 = st.columns([1, 6])
     with col1:
-        st.image("logo.png", width=120)
+        ativos.mostrar_logo(width=120)
     with col2:
         st.markdown(
             "<h1 style='text-align: left; margin-top: 20px;'>AZOUP - Business Intelligence</h1>",
@@ -82,7 +88,7 @@ def cadastro_super_admin():
     st.markdown("<h3 style='text-align: center;'>👑 Cadastro Super Admin</h3>", unsafe_allow_html=True)
 
     supabase = init_supabase()
-    clientes = supabase.table("clientes").select("id, nome, api").execute().data
+    clientes = diretorio.clientes()
 
     if not clientes:
         st.warning("Nenhuma empresa encontrada no cadastro de clientes.")
@@ -138,6 +144,43 @@ def cadastro_super_admin():
 # CRUD Clientes com Modal
 # =========================
 
+# Colunas da listagem (o registro completo vem do diretório ao editar)
+COLUNAS_LISTAGEM = "id, nome, cnpj, api, cidade, estado, ativo"
+CAMPOS_BUSCA = ["nome", "cnpj", "api", "cidade"]
+ORDENACOES_CLIENTES = {"Nome": "nome", "CNPJ": "cnpj", "API": "api", "Cidade": "cidade", "Estado": "estado"}
+POR_PAGINA_CLIENTES = 50
+
+
+def _termo_busca(texto):
+    # vírgulas, parênteses e curingas quebrariam o filtro or= do PostgREST
+    return "".join(c for c in texto.strip() if c not in ",()*%\\\"")
+
+
+def _consulta_clientes(supabase, colunas, busca, contar=False):
+    consulta = supabase.table("clientes").select(colunas, count="exact" if contar else None)
+    if busca:
+        consulta = consulta.or_(",".join(f"{campo}.ilike.*{busca}*" for campo in CAMPOS_BUSCA))
+    return consulta
+
+
+def contar_clientes(supabase, busca):
+    """Total de clientes da busca (uma consulta com count, sem trazer as linhas)."""
+    return _consulta_clientes(supabase, "id", busca, contar=True).limit(1).execute().count or 0
+
+
+def pagina_clientes(supabase, busca, coluna, crescente, pagina, por_pagina=POR_PAGINA_CLIENTES):
+    """Só as linhas da página pedida, ordenadas e fatiadas no Supabase (range)."""
+    inicio = (pagina - 1) * por_pagina
+    return (
+        _consulta_clientes(supabase, COLUNAS_LISTAGEM, busca)
+        .order(coluna, desc=not crescente)
+        .order("id")
+        .range(inicio, inicio + por_pagina - 1)
+        .execute()
+        .data
+    )
+
+
 def crud_clientes():
     supabase = init_supabase()
     load_external_css()
@@ -145,33 +188,77 @@ def crud_clientes():
 
     st.markdown("<h3 style='text-align: center;'>🏢 Gerenciamento de Clientes</h3>", unsafe_allow_html=True)
 
-    # ----- Filtro de empresa -----
-    nomes_clientes = supabase.table("clientes").select("nome", count="distinct").execute().data
-    empresa_opcoes = [c["nome"] for c in nomes_clientes] if nomes_clientes else []
-    empresa_selecionada = st.selectbox("Filtrar por Cliente (Empresa)", empresa_opcoes)
+    # ----- Busca e ordenação (no Supabase) -----
+    col1, col2, col3 = st.columns([4, 2, 2])
+    with col1:
+        busca = _termo_busca(st.text_input("Buscar (nome, CNPJ, API ou cidade)", key="clientes_busca"))
+    with col2:
+        ordenar_por = st.selectbox("Ordenar por", list(ORDENACOES_CLIENTES), key="clientes_ordem")
+    with col3:
+        sentido = st.selectbox("Sentido", ["Crescente", "Decrescente"], key="clientes_sentido")
+    coluna = ORDENACOES_CLIENTES[ordenar_por]
+    crescente = sentido == "Crescente"
+
+    # O total é contado uma vez por busca; gravações e a validade do diretório renovam
+    versao = (diretorio.versao(), int(time.time() // diretorio.VALIDADE))
+    try:
+        total = memo("adm.clientes.total", (busca, versao), lambda: contar_clientes(supabase, busca))
+    except Exception as e:
+        st.error(f"Erro ao buscar clientes: {str(e)}")
+        return
 
-    # Busca clientes filtrados
-    clientes = supabase.table("clientes").select("*").eq("nome", empresa_selecionada).execute().data
+    paginas = max(1, math.ceil(total / POR_PAGINA_CLIENTES))
+    # nova busca ou ordenação volta para a página 1
+    chave_pagina = f"clientes_pagina_{abs(hash((busca, coluna, crescente, total)))}"
+    pagina = min(st.session_state.get(chave_pagina, 1), paginas)
+    clientes = memo("adm.clientes.pagina", (busca, coluna, crescente, pagina, versao),
+                    lambda: pagina_clientes(supabase, busca, coluna, crescente, pagina))
 
     modal = Modal("✏️ Alterar Cliente", key="edit_cliente_modal")
 
     # ----- Listagem de clientes -----
     if clientes:
-        for cliente in clientes:
+        selecao = st.dataframe(
+            clientes,
+            column_order=["nome", "cnpj", "api", "cidade", "estado", "ativo"],
+            column_config={
+                "nome": "Nome", "cnpj": "CNPJ", "api": "API",
+                "cidade": "Cidade", "estado": "Estado", "ativo": "Ativo",
+            },
+            use_container_width=True,
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            # outra página ou dados regravados: a seleção anterior não vale
+            key=f"clientes_tabela_{abs(hash((chave_pagina, pagina, versao)))}",
+        )
+        r1, r2 = st.columns([3, 1])
+        with r1:
+            inicio = (pagina - 1) * POR_PAGINA_CLIENTES
+            st.caption(f"Clientes {inicio + 1}-{inicio + len(clientes)} de {total:,}")
+        with r2:
+            st.number_input("Página", min_value=1, max_value=paginas, step=1, key=chave_pagina)
+
+        linhas = selecao.selection.rows
+        if linhas:
+            cliente = clientes[linhas[0]]
             col1, col2, col3 = st.columns([3, 1, 1])
             with col1:
                 st.write(f"**{cliente['nome']}** - {cliente['cnpj']} ({cliente['cidade']}/{cliente['estado']})")
             with col2:
                 if st.button("✏️ Alterar", key=f"alt_{cliente['id']}"):
-                    st.session_state["edit_cliente"] = cliente
+                    st.session_state["edit_cliente"] = diretorio.cliente_por_id(cliente["id"]) or cliente
                     modal.open()
             with col3:
                 if st.button("🗑️ Excluir", key=f"exc_{cliente['id']}"):
                     supabase.table("clientes").delete().eq("id", cliente["id"]).execute()
+                    diretorio.invalidar()
                     st.success("Cliente excluído com sucesso!")
                     st.rerun()
+        else:
+            st.caption("Selecione um cliente na tabela para alterar ou excluir.")
     else:
-        st.info("Nenhum cliente cadastrado para este cliente/empresa.")
+        st.info("Nenhum cliente encontrado para esta busca.")
 
     # ----- Modal de edição -----
     if modal.is_open():
@@ -237,11 +324,277 @@ def crud_clientes():
                             "ativo": ativo
                         }
                         supabase.table("clientes").update(update_data).eq("id", cliente_edit["id"]).execute()
+                        diretorio.invalidar()
                         st.success("Cliente atualizado com sucesso!")
                         modal.close()
                         st.rerun()
 
 
+# =========================
+# Importação em massa de clientes
+# =========================
+
+def importar_clientes():
+    load_external_css()
+    show_header()
+
+    st.markdown("<h3 style='text-align: center;'>📥 Importar Clientes</h3>", unsafe_allow_html=True)
+    st.caption(
+        "Uma linha por cliente, com os campos da tabela clientes no cabeçalho "
+        f"({', '.join(importacao.CAMPOS)}). As linhas são casadas pelo id ou pelo api; "
+        "células vazias mantêm o valor atual."
+    )
+
+    arquivo = st.file_uploader("Planilha (CSV ou XLSX)", type=["csv", "xlsx"])
+    if arquivo is None:
+        return
+
+    # Simulação: validação e comparação com o diretório, sem gravar nada
+    try:
+        relatorio, registros = memo(
+            "adm.importacao", (arquivo.file_id, diretorio.versao()),
+            lambda: importacao.planejar(
+                importacao.normalizar(importacao.ler_planilha(arquivo.name, arquivo.getvalue())),
+                diretorio.clientes(),
+            ),
+        )
+    except Exception as e:
+        st.error(f"Erro ao ler a planilha: {str(e)}")
+        return
+
+    contagem = relatorio["acao"].value_counts()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Novos", int(contagem.get("novo", 0)))
+    col2.metric("Alterações", int(contagem.get("alterar", 0)))
+    col3.metric("Sem mudanças", int(contagem.get("sem mudanças", 0)))
+    col4.metric("Com erro", int(contagem.get("erro", 0)))
+
+    resultado = st.session_state.get("importacao_resultado")
+    if resultado is not None and resultado[0] == arquivo.file_id:
+        st.success(f"Importação concluída: {int((resultado[1]['resultado'] == 'gravado').sum())} clientes gravados.")
+        st.dataframe(resultado[1], use_container_width=True, hide_index=True)
+        return
+
+    st.dataframe(relatorio, use_container_width=True, hide_index=True)
+
+    if st.button(f"💾 Aplicar importação ({len(registros)} clientes)", disabled=not registros):
+        try:
+            supabase = init_supabase()
+            with st.spinner("Gravando em lotes..."):
+                final = importacao.aplicar(supabase, relatorio, registros)
+        except Exception as e:
+            st.error(f"Erro na importação: {str(e)}")
+            return
+        finally:
+            diretorio.invalidar()
+        st.session_state["importacao_resultado"] = (arquivo.file_id, final)
+        st.rerun()
+
+
+# =========================
+# Saúde da frota (sondagem de todos os bancos)
+# =========================
+
+def saude_frota():
+    load_external_css()
+    show_header()
+
+    st.markdown("<h3 style='text-align: center;'>🩺 Saúde da frota</h3>", unsafe_allow_html=True)
+
+    ativos_ = [c for c in diretorio.clientes() if c.get("ativo") == "S"]
+    st.caption(f"{len(ativos_)} clientes ativos; sondagem paralela com até {saude.THREADS} conexões.")
+
+    if st.button("🩺 Sondar agora", disabled=not ativos_):
+        with st.spinner("Sondando os bancos dos clientes..."):
+            linhas = saude.sondar_frota(ativos_)
+        falhas = sum(1 for linha in linhas if saude.falha(linha))
+        if falhas:
+            st.error(f"{falhas} de {len(linhas)} bancos com falha.")
+        else:
+            st.success(f"{len(linhas)} bancos sondados sem falhas.")
+        nao_sondados = sum(1 for linha in linhas if linha["erro"] == saude.NAO_SONDADO)
+        if nao_sondados:
+            st.warning(f"{nao_sondados} bancos não sondados: todas as conexões ficaram presas em hosts sem resposta.")
+
+    dias = st.selectbox("Histórico", [1, 7, 30, 90], index=1, format_func=lambda d: f"Últimos {d} dias")
+    try:
+        df = saude.historico(dias)
+    except Exception as e:
+        st.error(f"Erro ao ler o histórico: {str(e)}")
+        return
+    if df.empty:
+        st.info("Nenhuma sondagem registrada no período.")
+        return
+
+    st.markdown("**Degradados ou com falha (última sondagem)**")
+    df_degradados = saude.degradados(df)
+    if df_degradados.empty:
+        st.caption("Nenhum cliente degradado.")
+    else:
+        st.dataframe(df_degradados[["nome", "api", "host", "momento", "motivo"]],
+                     use_container_width=True, hide_index=True)
+
+    # Tendência por host: mediana de cada rodada
+    import plotly.express as px
+
+    metrica = st.selectbox("Tempo", ["ms_conexao", "ms_consulta"] + [f"ms_{f}" for f in saude.VIEWS])
+    por_host = df.groupby(["rodada", "host"], as_index=False)[metrica].median()
+    graficos.mostrar("adm.saude", por_host,
+                     lambda: px.line(por_host, x="rodada", y=metrica, color="host", markers=True),
+                     metrica=metrica)
+
+    st.markdown("**Última rodada**")
+    ultima = df[df["rodada"] == df["rodada"].max()]
+    st.dataframe(ultima.drop(columns=["rodada", "cliente_id"]), use_container_width=True, hide_index=True)
+
+
+# =========================
+# Resumos BI (tabelas de resumo no banco do cliente)
+# =========================
+
+def resumos_bi():
+    load_external_css()
+    show_header()
+
+    st.markdown("<h3 style='text-align: center;'>🧱 Resumos BI</h3>", unsafe_allow_html=True)
+
+    clientes = diretorio.clientes()
+    if not clientes:
+        st.warning("Nenhum cliente cadastrado.")
+        return
+
+    empresa = st.selectbox("Cliente", clientes, format_func=lambda x: f"{x['nome']} ({x['api']})")
+    conn_data = conn_data_da_empresa(empresa)
+
+    try:
+        conn = conectar_firebird(conn_data)
+    except Exception as e:
+        st.error(f"Erro ao conectar ao banco do cliente: {str(e)}")
+        return
+
+    try:
+        situacao = provisionamento.situacao(conn)
+        if situacao:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Versão", f"{situacao['versao']} (atual {provisionamento.VERSAO})")
+            col2.metric("Carregado desde", situacao["desde"].strftime("%d/%m/%Y") if situacao["desde"] else "-")
+            col3.metric("Atualizado até", situacao["ate"].strftime("%d/%m/%Y") if situacao["ate"] else "-")
+        else:
+            st.info("Resumos BI não provisionados neste cliente; as páginas usam as views.")
+
+        if st.button("🔍 Verificar divergências"):
+            divergencias = provisionamento.verificar_divergencias(conn)
+            if divergencias:
+                for divergencia in divergencias:
+                    st.warning(divergencia)
+            else:
+                st.success(f"Estrutura conforme a versão {provisionamento.VERSAO}.")
+
+        with st.form("provisionar_resumos"):
+            carregar_desde = st.date_input("Carregar resumos desde", value=date.today().replace(day=1) - timedelta(days=400))
+            if st.form_submit_button("🧱 Provisionar / atualizar estrutura"):
+                with st.spinner("Provisionando e carregando resumos..."):
+                    acoes = provisionamento.provisionar(conn, carregar_desde)
+                provisionamento.esquecer_resumo(conn_data)
+                st.success("Provisionamento concluído.")
+                for acao in acoes:
+                    st.write(f"- {acao}")
+
+        with st.form("recalcular_resumos"):
+            col1, col2 = st.columns(2)
+            with col1:
+                inicio = st.date_input("Recalcular de", value=date.today().replace(day=1))
+            with col2:
+                fim = st.date_input("Até", value=date.today() - timedelta(days=1))
+            if st.form_submit_button("🔄 Recalcular período"):
+                try:
+                    with st.spinner("Recalculando resumos..."):
+                        de, ate = provisionamento.atualizar_resumos(conn, inicio, fim)
+                    provisionamento.esquecer_resumo(conn_data)
+                    st.success(f"Resumos carregados de {de.strftime('%d/%m/%Y')} a {ate.strftime('%d/%m/%Y')}.")
+                except RuntimeError as e:
+                    st.error(str(e))
+
+        with st.expander("📜 Script DDL"):
+            st.code(provisionamento.script_completo(), language="sql")
+    except Exception as e:
+        st.error(f"Erro nos resumos BI: {str(e)}")
+    finally:
+        conn.close()
+
+# =========================
+# Planos de consulta (diagnóstico de índices)
+# =========================
+
+def planos_consulta():
+    load_external_css()
+    show_header()
+
+    st.markdown("<h3 style='text-align: center;'>🧭 Planos de consulta</h3>", unsafe_allow_html=True)
+
+    clientes = diretorio.clientes()
+    if not clientes:
+        st.warning("Nenhum cliente cadastrado.")
+        return
+
+    empresa = st.selectbox("Cliente", clientes, format_func=lambda x: f"{x['nome']} ({x['api']})")
+    relatorios = st.session_state.setdefault("relatorios_planos", {})
+
+    medir_tempos = st.checkbox("Medir tempos (executa as instruções no banco do cliente)", value=True)
+    if st.button("🔍 Analisar planos"):
+        try:
+            with st.spinner("Preparando as instruções no banco do cliente..."):
+                with conectar_firebird(conn_data_da_empresa(empresa)) as conn:
+                    relatorios[empresa["id"]] = planos.analisar(conn, medir_tempos=medir_tempos)
+        except Exception as e:
+            st.error(f"Erro ao analisar planos: {str(e)}")
+            return
+
+    relatorio = relatorios.get(empresa["id"])
+    if not relatorio:
+        st.info("Nenhuma análise feita para este cliente nesta sessão.")
+        return
+
+    st.caption(f"Análise de {relatorio['gerado_em'].strftime('%d/%m/%Y %H:%M')}")
+
+    st.markdown("#### Índices sugeridos")
+    if not relatorio["sugestoes"]:
+        st.success("Nenhuma varredura NATURAL em relação grande sobre colunas filtradas.")
+    for n, sugestao in enumerate(relatorio["sugestoes"]):
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.code(sugestao["ddl"] + ";", language="sql")
+        with col2:
+            if sugestao["aplicada"]:
+                st.write("✅ Criado")
+            elif st.button("Criar e medir", key=f"indice_{n}"):
+                try:
+                    with st.spinner("Criando índice e medindo novamente..."):
+                        with conectar_firebird(conn_data_da_empresa(empresa)) as conn:
+                            planos.aplicar_sugestao(conn, relatorio, sugestao)
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Erro ao criar índice: {str(e)}")
+
+    st.markdown("#### Instruções")
+    for i, item in enumerate(relatorio["instrucoes"]):
+        grandes = [n for n in item["naturais"] if n["grande"]]
+        tempo = f" - {item['antes_ms']:.0f} ms" if "antes_ms" in item else ""
+        if "depois_ms" in item:
+            tempo += f" → {item['depois_ms']:.0f} ms"
+        alerta = " ⚠️ NATURAL" if grandes else ""
+        with st.expander(f"[{i}] {item['pagina']}{tempo}{alerta}"):
+            st.code(item["sql"], language="sql")
+            st.write(f"**Plano:** `{item['plano']}`")
+            if "plano_depois" in item:
+                st.write(f"**Plano após índice:** `{item['plano_depois']}`")
+            for natural in item["naturais"]:
+                marca = "⚠️" if natural["grande"] else "•"
+                st.write(f"{marca} NATURAL em {natural['relacao']} ({natural['linhas']:,} linhas)")
+
+    st.download_button("⬇️ Baixar relatório", planos.formatar(relatorio),
+                       file_name=f"planos_{empresa['api']}.txt")
+
 
 # =========================
 # Main
@@ -256,13 +609,21 @@ def main():
     if not st.session_state.logged_in:
         login_page()
     else:
-        menu = ["Cadastro Super Admin", "Gerenciar Clientes", "Sair"]
+        menu = ["Cadastro Super Admin", "Gerenciar Clientes", "Importar Clientes", "Saúde da frota", "Resumos BI", "Planos de consulta", "Sair"]
         escolha = st.sidebar.selectbox("Menu", menu)
 
         if escolha == "Cadastro Super Admin":
             cadastro_super_admin()
         elif escolha == "Gerenciar Clientes":
             crud_clientes()
+        elif escolha == "Importar Clientes":
+            importar_clientes()
+        elif escolha == "Saúde da frota":
+            saude_frota()
+        elif escolha == "Resumos BI":
+            resumos_bi()
+        elif escolha == "Planos de consulta":
+            planos_consulta()
         elif escolha == "Sair":
             st.session_state.logged_in = False
             st.session_state.user = None
@@ -0,0 +1,71 @@
+"""
+Armazém local do servidor (SQLite) para históricos e resultados calculados.
+
+Guarda o que é do próprio app e não dos bancos dos clientes (ex.: histórico
+das sondagens de saúde). Fica em AZOUP_DADOS_DIR (padrão ./.azoup_dados,
+fora do controle de versão), em um único arquivo com journal WAL: o
+Streamlit e processos em lote leem enquanto outro processo grava.
+
+Cada módulo declara suas tabelas com garantir(nome, ddl), executado uma vez
+por processo. As conexões são abertas por operação, então o armazém pode ser
+usado de qualquer thread ou processo.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO = os.environ.get("AZOUP_DADOS_DIR") or os.path.join(BASE, ".azoup_dados")
+ARQUIVO = "azoup.sqlite3"
+
+_lock = threading.Lock()
+_esquemas = set()
+
+
+def caminho(nome=ARQUIVO):
+    os.makedirs(DIRETORIO, exist_ok=True)
+    return os.path.join(DIRETORIO, nome)
+
+
+@contextmanager
+def conexao():
+    """Conexão com commit ao sair sem erro."""
+    conn = sqlite3.connect(caminho(), timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def garantir(nome, ddl):
+    """Cria a tabela `nome` (e índices) com o script `ddl`, uma vez por processo."""
+    with _lock:
+        if nome in _esquemas:
+            return
+    with conexao() as conn:
+        conn.executescript(ddl)
+    with _lock:
+        _esquemas.add(nome)
+
+
+def inserir(tabela, linhas, substituir=False):
+    """Insere uma lista de dicts (todos com as mesmas chaves); substituir = INSERT OR REPLACE."""
+    if not linhas:
+        return 0
+    colunas = list(linhas[0])
+    sql = (f"INSERT {'OR REPLACE ' if substituir else ''}INTO {tabela} ({', '.join(colunas)}) "
+           f"VALUES ({', '.join('?' for _ in colunas)})")
+    with conexao() as conn:
+        conn.executemany(sql, [tuple(linha[c] for c in colunas) for linha in linhas])
+    return len(linhas)
+
+
+def consultar(sql, params=()):
+    """DataFrame com o resultado da instrução."""
+    import pandas as pd
+
+    with conexao() as conn:
+        return pd.read_sql_query(sql, conn, params=tuple(params))
@@ -0,0 +1,174 @@
+"""
+Ativos estáticos (CSS e logo) carregados uma vez por processo.
+
+Antes, a cada rerun, app.py, auth.py e app_adm.py reliam style.css e cada
+página repetia a sondagem de ./Includes, ./assets e ./logo.png no disco.
+Aqui o CSS é lido, minificado e guardado já dentro da tag <style>; o logo
+é lido uma única vez. Tudo fica em memória e é compartilhado por todas as
+sessões. A validade é conferida pelo mtime do arquivo (um os.stat por uso),
+então editar style.css ou trocar o logo vale no rerun seguinte, sem
+reiniciar o servidor.
+
+A economia de cada rerun vai para a telemetria: ativos.ms_economizados
+(tempo da carga a frio evitado), ativos.bytes_nao_lidos (disco) e
+ativos.bytes_minificados (bytes a menos enviados ao navegador).
+"""
+import os
+import re
+import threading
+import time
+
+import telemetria
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+
+CAMINHOS_LOGO = ["Includes/logo.png", "assets/logo.png", "logo.png"]
+
+# Usado por app.py quando style.css não existe
+CSS_PADRAO = """
+.kpi-container {
+    display: grid;
+    grid-template-columns: repeat(3, 1fr);
+    gap: 20px;
+    margin: 2rem 0;
+}
+.kpi-box {
+    background: linear-gradient(180deg, #A9ABAE 0%, #1e1e1e 85%);
+    border-radius: 12px;
+    padding: 25px;
+    color: #F79633;
+    min-height: 150px;
+    box-shadow: 0 6px 18px rgba(0,0,0,0.18);
+}
+.azoup-title {
+    font-size: 2.2rem;
+    font-weight: 700;
+    color: #1f77b4;
+    margin: 1rem 0 2rem 0;
+}
+"""
+
+_lock = threading.Lock()
+# caminho -> {"mtime", "valor", "bytes", "bytes_servidos", "custo_s", "acertos"}
+_cache = {}
+_registrado = False
+_caminho_logo = None
+
+
+def minificar_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def _registrar_fonte():
+    global _registrado
+    if not _registrado:
+        _registrado = True
+        telemetria.registrar_fonte("Ativos estáticos", metricas)
+
+
+def _carregar(caminho, processar):
+    """Valor processado do arquivo, relido só quando o mtime muda (None se não existe)."""
+    _registrar_fonte()
+    try:
+        mtime = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return None
+
+    item = _cache.get(caminho)
+    if item is not None and item["mtime"] == mtime:
+        item["acertos"] += 1
+        telemetria.incrementar("ativos.ms_economizados", item["custo_s"] * 1000)
+        telemetria.incrementar("ativos.bytes_nao_lidos", item["bytes"])
+        return item["valor"]
+
+    inicio = time.perf_counter()
+    with open(caminho, "rb") as f:
+        conteudo = f.read()
+    valor, servidos = processar(conteudo)
+    with _lock:
+        _cache[caminho] = {
+            "mtime": mtime,
+            "valor": valor,
+            "bytes": len(conteudo),
+            "bytes_servidos": servidos,
+            "custo_s": time.perf_counter() - inicio,
+            "acertos": 0,
+        }
+    telemetria.incrementar("ativos.cargas")
+    return valor
+
+
+def _tag_css(conteudo):
+    tag = f"<style>{minificar_css(conteudo.decode('utf-8'))}</style>"
+    return tag, len(tag.encode("utf-8"))
+
+
+def css(caminho="style.css"):
+    """Tag <style> minificada do arquivo (relativo à raiz do app), ou None."""
+    return _carregar(os.path.join(BASE, caminho), _tag_css)
+
+
+def injetar_css(caminho="style.css", padrao=None):
+    """
+    Injeta o CSS na página. Sem o arquivo, usa `padrao` (se informado) e
+    devolve False para que o chamador decida se avisa.
+    """
+    import streamlit as st
+
+    tag = css(caminho)
+    if tag is None:
+        if padrao is None:
+            return False
+        tag = f"<style>{minificar_css(padrao)}</style>"
+    else:
+        item = _cache[os.path.join(BASE, caminho)]
+        telemetria.incrementar("ativos.bytes_minificados", item["bytes"] - item["bytes_servidos"])
+    st.markdown(tag, unsafe_allow_html=True)
+    return True
+
+
+def _logo(conteudo):
+    return conteudo, len(conteudo)
+
+
+def logo():
+    """Bytes do primeiro logo encontrado, ou None."""
+    global _caminho_logo
+    # caminho já resolvido: um os.stat; só volta a sondar se o arquivo sumir
+    if _caminho_logo is not None:
+        valor = _carregar(_caminho_logo, _logo)
+        if valor is not None:
+            return valor
+    for caminho in CAMINHOS_LOGO:
+        caminho = os.path.join(BASE, caminho)
+        valor = _carregar(caminho, _logo)
+        if valor is not None:
+            _caminho_logo = caminho
+            return valor
+    return None
+
+
+def mostrar_logo(width=80):
+    """st.image do logo servido da memória (não relê nem sonda o disco)."""
+    import streamlit as st
+
+    valor = logo()
+    if valor is not None:
+        st.image(valor, width=width)
+
+
+def metricas():
+    with _lock:
+        return [
+            {
+                "arquivo": os.path.relpath(caminho, BASE),
+                "bytes": item["bytes"],
+                "bytes_servidos": item["bytes_servidos"],
+                "carga_ms": round(item["custo_s"] * 1000, 3),
+                "acertos": item["acertos"],
+            }
+            for caminho, item in _cache.items()
+        ]
@@ -1,17 +1,60 @@
+import json
 import streamlit as st
+import streamlit.components.v1 as components
+import ativos
+import diretorio
+import sessoes
 from database import init_supabase, test_firebird_connection
 from datetime import datetime
-import os
 
 
-# Função para carregar CSS externo
+# Função para carregar CSS externo (servido da memória, ver ativos.py)
 def load_external_css():
-    css_file = os.path.join(os.path.dirname(__file__), "style.css")
-    if not os.path.exists(css_file):
-        st.error(f"Arquivo CSS não encontrado: {css_file}")
+    if not ativos.injetar_css():
+        st.error("Arquivo CSS não encontrado: style.css")
+
+# Impressão do navegador atual: o token só é aceito de volta no mesmo navegador
+def impressao_cliente():
+    return sessoes.impressao_cliente(st.context.headers)
+
+# Recarga da página: retoma o login pelo token do cookie (ver sessoes.py)
+def retomar_sessao():
+    if sessoes.PARAMETRO_LEGADO in st.query_params:
+        del st.query_params[sessoes.PARAMETRO_LEGADO]
+    # st.context.cookies é o do carregamento da página: depois do logout ainda traz o token
+    if st.session_state.get('sessao_encerrada'):
+        return False
+    token = st.context.cookies.get(sessoes.COOKIE)
+    if not token:
+        return False
+    restaurada = sessoes.restaurar(token, impressao_cliente())
+    if restaurada is None:
+        st.session_state.cookie_sessao = None
+        return False
+    st.session_state.user, st.session_state.empresa = restaurada
+    st.session_state.token_sessao = token
+    st.session_state.logged_in = True
+    return True
+
+def encerrar_sessao():
+    sessoes.revogar(st.session_state.get('token_sessao'))
+    st.session_state.token_sessao = None
+    st.session_state.cookie_sessao = None
+    st.session_state.sessao_encerrada = True
+
+# Grava (token) ou apaga (None) o cookie pedido pelo login/logout. Roda no
+# início do run seguinte: o componente não chegaria ao navegador antes de um st.rerun()
+def gravar_cookie_sessao():
+    if 'cookie_sessao' not in st.session_state:
         return
-    with open(css_file, "r", encoding="utf-8") as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+    token = st.session_state.pop('cookie_sessao')
+    validade = sessoes.VALIDADE if token else 0
+    components.html(f"""<script>
+const pagina = window.parent;
+const seguro = pagina.location.protocol === "https:" ? "; Secure" : "";
+pagina.document.cookie = {json.dumps(sessoes.COOKIE)} + "=" + {json.dumps(token or "")}
+    + "; Max-Age={validade}; Path=/; SameSite=Strict" + seguro;
+</script>""", height=0)
 
 def login_user():
     # Carrega CSS externo
@@ -22,16 +65,7 @@ def login_user():
     # Título usando a classe do CSS
     col1, col2 = st.columns([1, 5])
     with col1:
-        # Tentar carregar o logo de várias localizações possíveis
-        logo_paths = ["./Includes/logo.png", "./assets/logo.png", "./logo.png"]
-        logo = None
-        for path in logo_paths:
-            if os.path.exists(path):
-                logo = path
-                break
-                
-        if logo:
-            st.image(logo, width=80)
+        ativos.mostrar_logo(width=80)
     with col2:
        st.markdown('<div class="azoup-title">Azoup - Business Intelligence</div>', unsafe_allow_html=True)
     st.markdown('<h3 class="login-title">Login</h3>', unsafe_allow_html=True)
@@ -56,11 +90,10 @@ def login_user():
                     if response.data and len(response.data) > 0:
                         user = response.data[0]
                         
-                        # Busca dados da empresa usando o campo "api"
-                        cliente_data = supabase.table('clientes').select('*').eq('api', user['api']).execute()
+                        # Busca dados da empresa usando o campo "api" (diretório em memória, ver diretorio.py)
+                        empresa = diretorio.cliente_por_api(user['api'])
                         
-                        if cliente_data.data and len(cliente_data.data) > 0:
-                            empresa = cliente_data.data[0]
+                        if empresa:
                             
                             # VERIFICAÇÃO DA DATA DA LICENÇA
                             data_licenca = empresa.get('data_licenca')
@@ -90,6 +123,11 @@ def login_user():
                                 st.session_state.user = user
                                 st.session_state.empresa = empresa
                                 st.session_state.logged_in = True
+                                # token para retomar a sessão após recarregar a página (cookie)
+                                token = sessoes.emitir(user, impressao_cliente())
+                                st.session_state.token_sessao = token
+                                st.session_state.cookie_sessao = token
+                                st.session_state.sessao_encerrada = False
                                 st.rerun()
                             else:
                                 st.error("Falha na conexão com o banco de dados da empresa")
@@ -118,10 +156,9 @@ def signup_user():
         password = st.text_input("Senha", type="password")
         
         # Busca APENAS a empresa logada
-        empresa_logada = supabase.table('clientes').select('nome, api, host, porta').eq('api', st.session_state.user['api']).execute()
+        empresa = diretorio.cliente_por_api(st.session_state.user['api'])
 
-        if empresa_logada.data and len(empresa_logada.data) > 0:
-            empresa = empresa_logada.data[0]
+        if empresa:
             
             # Não mostra selectbox, apenas exibe a empresa logada
             st.info(f"Empresa: {empresa['nome']} (API: {empresa['api']})")
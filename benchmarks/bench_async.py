@@ -0,0 +1,96 @@
+"""
+Benchmark: acesso síncrono x assíncrono (dados_async) com 1, 10 e 50 sessões.
+
+Cada sessão simula um rerun de página que precisa de N instruções. O round
+trip do Firebird é simulado por um sleep (latência configurável), que libera
+a thread como faria o I/O de rede real. No modo síncrono a sessão executa as
+instruções em sequência; no modo assíncrono dispara todas com asyncio.gather
+sobre o executor de I/O.
+
+    python benchmarks/bench_async.py --latencia 0.08 --instrucoes 3
+
+Com muitas sessões o ganho fica limitado pelo tamanho do executor
+(AZOUP_IO_THREADS) e, em produção, pelos limites do governador por host.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dados_async  # noqa: E402
+
+
+def _consultor(latencia):
+    def consultar(tenant, sql, params):
+        time.sleep(latencia)
+        return sql
+    return consultar
+
+
+def _sessao_sincrona(consultar, instrucoes):
+    for i in range(instrucoes):
+        consultar("tenant", f"SELECT {i}", ())
+
+
+def _sessao_assincrona(consultar, instrucoes):
+    async def _pagina():
+        import asyncio
+        await asyncio.gather(*[
+            dados_async.fetch_df("tenant", f"SELECT {i}", (), consultar=consultar)
+            for i in range(instrucoes)
+        ])
+    dados_async.executar_sincrono(_pagina())
+
+
+def _rodar(sessoes, modo, consultar, instrucoes):
+    tempos = []
+    lock = threading.Lock()
+
+    def _uma():
+        inicio = time.perf_counter()
+        modo(consultar, instrucoes)
+        with lock:
+            tempos.append(time.perf_counter() - inicio)
+
+    threads = [threading.Thread(target=_uma) for _ in range(sessoes)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - inicio
+    tempos.sort()
+    return {
+        "media_ms": statistics.mean(tempos) * 1000,
+        "p95_ms": tempos[min(len(tempos) - 1, int(0.95 * (len(tempos) - 1)))] * 1000,
+        "total_ms": total * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencia", type=float, default=0.08, help="round trip simulado por instrução (s)")
+    parser.add_argument("--instrucoes", type=int, default=3, help="instruções por rerun de página")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    consultar = _consultor(args.latencia)
+    # aquecimento: cria o executor e carrega imports tardios fora da medição
+    _sessao_assincrona(_consultor(0), args.instrucoes)
+    print(f"latência={args.latencia * 1000:.0f}ms instruções/página={args.instrucoes} "
+          f"executor={dados_async.executor_io()._max_workers} threads")
+    print(f"{'sessões':>8} {'modo':>6} {'média ms':>10} {'p95 ms':>10} {'total ms':>10} {'ganho':>7}")
+    for sessoes in args.sessoes:
+        sinc = _rodar(sessoes, _sessao_sincrona, consultar, args.instrucoes)
+        asinc = _rodar(sessoes, _sessao_assincrona, consultar, args.instrucoes)
+        for nome, r in (("sync", sinc), ("async", asinc)):
+            ganho = sinc["media_ms"] / r["media_ms"]
+            print(f"{sessoes:>8} {nome:>6} {r['media_ms']:>10.1f} {r['p95_ms']:>10.1f} {r['total_ms']:>10.1f} {ganho:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark: drivers do Firebird (drivers.py) nas instruções BI das páginas.
+
+Roda as instruções do Dashboard, Vendas e Vendedores (planos.instrucoes, as
+mesmas que as páginas emitem hoje) contra um banco real, em cada
+combinação de driver e compressão de rede, e mede por instrução:
+
+- bytes na rede (enviados + recebidos), contados por um proxy TCP local
+  entre o driver e o servidor (a conexão é aberta por 127.0.0.1);
+- tempo de execute + busca de todas as linhas (mediana das repetições).
+
+Cada instrução usa uma conexão nova, como database.executar_consulta; os
+bytes incluem o handshake, que é igual para todas as linhas. A compressão
+só vale com o firebird-driver e servidor Firebird 3 ou mais novo.
+
+    python benchmarks/bench_drivers.py /dados/CLIENTE.FDB --host 10.0.0.5 --usuario SYSDBA --senha masterkey
+    python benchmarks/bench_drivers.py /dados/CLIENTE.FDB --host 10.0.0.5 --repeticoes 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import drivers  # noqa: E402
+import planos  # noqa: E402
+
+
+class _Proxy:
+    """Repassa conexões de uma porta local para o servidor, contando os bytes."""
+
+    def __init__(self, host, porta):
+        self.destino = (host, int(porta))
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._escuta = socket.create_server(("127.0.0.1", 0))
+        self.porta = self._escuta.getsockname()[1]
+        threading.Thread(target=self._aceitar, daemon=True).start()
+
+    def _aceitar(self):
+        while True:
+            cliente, _ = self._escuta.accept()
+            servidor = socket.create_connection(self.destino)
+            for origem, destino in ((cliente, servidor), (servidor, cliente)):
+                threading.Thread(target=self._repassar, args=(origem, destino), daemon=True).start()
+
+    def _repassar(self, origem, destino):
+        try:
+            while True:
+                dados = origem.recv(65536)
+                if not dados:
+                    break
+                with self._lock:
+                    self.bytes += len(dados)
+                destino.sendall(dados)
+        except OSError:
+            pass
+        finally:
+            for s in (origem, destino):
+                try:
+                    s.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def zerar(self):
+        with self._lock:
+            self.bytes = 0
+
+    def lidos(self):
+        with self._lock:
+            return self.bytes
+
+
+def _medir(conn_data, sql, params, proxy, repeticoes):
+    tempos, volumes, linhas = [], [], 0
+    for _ in range(repeticoes):
+        proxy.zerar()
+        conn = drivers.conectar(conn_data)
+        try:
+            inicio = time.perf_counter()
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            linhas = len(cur.fetchall())
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            cur.close()
+        finally:
+            conn.close()
+        # o fechamento termina de trafegar antes da leitura do contador
+        time.sleep(0.05)
+        volumes.append(proxy.lidos())
+    return statistics.median(tempos), statistics.median(volumes), linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("caminho", help="caminho do banco no servidor")
+    parser.add_argument("--host", required=True, help="servidor Firebird (os bytes são medidos via TCP)")
+    parser.add_argument("--porta", default="3050")
+    parser.add_argument("--usuario", default="SYSDBA")
+    parser.add_argument("--senha", default="masterkey")
+    parser.add_argument("--drivers", nargs="+", default=drivers.DRIVERS, choices=drivers.DRIVERS)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    proxy = _Proxy(args.host, args.porta)
+    base = {"host": "127.0.0.1", "porta": str(proxy.porta), "database": args.caminho,
+            "user": args.usuario, "password": args.senha}
+    configuracoes = [
+        (driver, compressao)
+        for driver in args.drivers
+        for compressao in ([False, True] if driver == "firebird-driver" else [False])
+    ]
+
+    for i, instrucao in enumerate(planos.instrucoes(), 1):
+        print(f"[{i}] {instrucao['pagina']}: {' '.join(instrucao['sql'].split())[:100]}")
+        for driver, compressao in configuracoes:
+            conn_data = dict(base, driver=driver, compressao="S" if compressao else None)
+            rotulo = f"{driver}{' +compressão' if compressao else ''}"
+            try:
+                ms, volume, linhas = _medir(conn_data, instrucao["sql"], instrucao["params"], proxy,
+                                            args.repeticoes)
+            except Exception as e:
+                print(f"    {rotulo:<36} ERRO {e}")
+                continue
+            print(f"    {rotulo:<36} {ms:9.1f} ms  {volume / 1024:9.1f} KB  {linhas:>8,} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: gráficos das páginas em Plotly x ECharts.
+
+Para cada gráfico com as duas versões (linha de evolução, pizza por empresa
+e barras por vendedor) e cada tamanho de dados, mede o tempo de montar e
+serializar a spec no servidor e o tamanho da spec enviada ao navegador.
+Os dados são sintéticos: uma série horária (linha), vendas por empresa
+(pizza) e vendedores x 13 meses (barras).
+
+O tempo de desenho no navegador não é medido aqui (precisa do navegador):
+a spec Plotly é desenhada de uma vez, a do ECharts em etapas de
+graficos.PROGRESSIVO pontos. A última linha de cada tamanho indica o
+backend que graficos.escolher_backend usaria.
+
+    python benchmarks/bench_echarts.py --tamanhos 500 5000 50000 --repeticoes 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly.io  # noqa: E402
+
+import graficos  # noqa: E402
+from paginas.vendas_page import figura_distribuicao, figura_evolucao  # noqa: E402
+from paginas.vendedores_page import figura_comparativo  # noqa: E402
+
+
+def _casos(linhas):
+    gerador = np.random.default_rng(42)
+    serie = pd.DataFrame({
+        "REFERENCIA": pd.date_range(end=pd.Timestamp.today().normalize(), periods=linhas, freq="h"),
+        "TOTAL_VENDA": gerador.gamma(2.0, 500.0, linhas),
+    })
+    empresas = pd.DataFrame({
+        "RAZAO_SOCIAL": [f"Empresa {i % max(linhas // 30, 1):04d}" for i in range(linhas)],
+        "TOTAL_VENDA": gerador.gamma(2.0, 500.0, linhas),
+    })
+    meses = pd.date_range(end=pd.Timestamp.today().normalize(), periods=13, freq="MS")
+    vendedores = pd.DataFrame({
+        "DATA_REF": np.tile(meses, max(linhas // 13, 1)),
+        "NOME_VENDEDOR": np.repeat([f"Vendedor {v:04d}" for v in range(max(linhas // 13, 1))], 13),
+        "VALOR_TOTAL": gerador.gamma(2.0, 5000.0, 13 * max(linhas // 13, 1)),
+    })
+    return {
+        "linha": (lambda: figura_evolucao(serie, None),
+                  lambda: graficos.opcoes_linha(serie, "REFERENCIA", "TOTAL_VENDA")),
+        "pizza": (lambda: figura_distribuicao(empresas),
+                  lambda: graficos.opcoes_pizza(empresas, "RAZAO_SOCIAL", "TOTAL_VENDA")),
+        "barras": (lambda: figura_comparativo(vendedores),
+                   lambda: graficos.opcoes_barras(vendedores, "DATA_REF", "VALOR_TOTAL", cor="NOME_VENDEDOR")),
+    }
+
+
+def _medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        valor = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), valor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[500, 5000, 50000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    for linhas in args.tamanhos:
+        print(f"{linhas:,} linhas")
+        for nome, (plotly_fig, echarts_opcoes) in _casos(linhas).items():
+            ms_plotly, spec_plotly = _medir(lambda: plotly.io.to_json(plotly_fig(), validate=False),
+                                            args.repeticoes)
+            ms_echarts, spec_echarts = _medir(
+                lambda: json.dumps(echarts_opcoes(), default=graficos._json_padrao, separators=(",", ":")),
+                args.repeticoes,
+            )
+            print(f"  {nome:>7}: plotly {ms_plotly:8.2f} ms {len(spec_plotly) / 1024:8.1f} KB | "
+                  f"echarts {ms_echarts:8.2f} ms {len(spec_echarts) / 1024:8.1f} KB")
+        print(f"  backend escolhido: {graficos.escolher_backend(linhas)}")
+
+
+if __name__ == "__main__":
+    main()
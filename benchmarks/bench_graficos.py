@@ -0,0 +1,69 @@
+"""
+Benchmark: montar e serializar as figuras das páginas x servir a spec do cache.
+
+Usa as mesmas funções de figura de Vendas e Vendedores sobre dados
+sintéticos (N vendedores x 13 meses). "sem cache" é o que cada rerun fazia
+(construir a figura + plotly.io.to_json); "com cache" é o acerto do
+graficos.spec (impressão digital dos dados + consulta ao dicionário). O
+tamanho da spec mostra o efeito da redução (top N vendedores + "Outros"):
+ele não cresce com --vendedores.
+
+    python benchmarks/bench_graficos.py --vendedores 50 --repeticoes 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import plotly.io  # noqa: E402
+
+import graficos  # noqa: E402
+from paginas.vendedores_page import figura_comparativo, figura_top  # noqa: E402
+
+
+def _dados(vendedores):
+    meses = pd.date_range(end=pd.Timestamp.today().normalize(), periods=13, freq="MS")
+    linhas = [
+        {"DATA_REF": mes, "NOME_VENDEDOR": f"Vendedor {v:03d}", "VALOR_TOTAL": float((v + 1) * (i + 7) % 997) * 10}
+        for v in range(vendedores) for i, mes in enumerate(meses)
+    ]
+    return pd.DataFrame(linhas)
+
+
+def _medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vendedores", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    df = _dados(args.vendedores)
+    df_top = df.groupby("NOME_VENDEDOR")["VALOR_TOTAL"].sum().reset_index().nlargest(10, "VALOR_TOTAL")
+    casos = {
+        "comparativo": (df, lambda: figura_comparativo(df)),
+        "top": (df_top, lambda: figura_top(df_top)),
+    }
+
+    print(f"{len(df)} linhas ({args.vendedores} vendedores x 13 meses)")
+    for nome, (dados, construir) in casos.items():
+        sem = _medir(lambda: plotly.io.to_json(construir(), validate=False), args.repeticoes)
+        graficos.spec(nome, dados, construir)
+        com = _medir(lambda: graficos.spec(nome, dados, construir), args.repeticoes)
+        kb = len(graficos.spec(nome, dados, construir)) / 1024
+        print(f"{nome:>12}: sem cache {sem:8.2f} ms  com cache {com:6.3f} ms  ({sem / com:,.0f}x)  spec {kb:,.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: custo de import até a tela de login, antes e depois dos imports tardios.
+
+Cada medida roda em um processo Python novo (worker frio). O streamlit é
+importado fora da medição, porque o servidor já o tem carregado quando
+executa app.py. "antes" é o conjunto que app.py importava no topo (pandas,
+numpy, plotly, streamlit_option_menu, fdb, supabase e os módulos do app);
+"depois" é o que a tela de login precisa agora (inicializacao.py).
+
+    python benchmarks/bench_inicio.py --repeticoes 5
+
+Módulos não instalados no ambiente são ignorados e listados na saída.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CENARIOS = {
+    "antes": ["pandas", "numpy", "plotly.express", "plotly.graph_objects", "streamlit_option_menu",
+              "supabase", "fdb", "auth", "dashboard", "metricas", "eventos"],
+    "depois": ["inicializacao", "supabase", "auth", "eventos"],
+}
+
+_SCRIPT = """
+import importlib, sys, time
+import streamlit
+ausentes = []
+inicio = time.perf_counter()
+for modulo in sys.argv[1:]:
+    try:
+        importlib.import_module(modulo)
+    except ImportError:
+        ausentes.append(modulo)
+print((time.perf_counter() - inicio) * 1000, ",".join(ausentes))
+"""
+
+
+def _medir(modulos):
+    saida = subprocess.run(
+        [sys.executable, "-c", _SCRIPT, *modulos],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(saida[0]), (saida[1].split(",") if len(saida) > 1 else [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    resultados = {}
+    for nome, modulos in CENARIOS.items():
+        tempos, ausentes = [], []
+        for _ in range(args.repeticoes):
+            ms, ausentes = _medir(modulos)
+            tempos.append(ms)
+        resultados[nome] = statistics.median(tempos)
+        nota = f"  (ausentes: {', '.join(ausentes)})" if ausentes else ""
+        print(f"{nome:>7}: mediana {resultados[nome]:8.1f} ms  min {min(tempos):8.1f} ms{nota}")
+    print(f"redução: {resultados['antes'] - resultados['depois']:.1f} ms "
+          f"({resultados['antes'] / resultados['depois']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Acesso assíncrono aos dados do BI.
+
+As chamadas ao Firebird bloqueiam a thread do script Streamlit durante todo
+o round trip. Aqui elas são despachadas para um executor de I/O dedicado,
+de modo que uma página pode disparar todas as suas instruções de uma vez
+(asyncio.gather) e esperar apenas pela mais lenta.
+
+    df = await fetch_df(conn_data, sql, params)
+    vendas, evolucao = await fetch_pedidos(conn_data, [pedido(...), pedido(...)])
+
+Para os pontos de chamada síncronos existentes há executar_sincrono(coro)
+e fetch_df_sync(...). O tamanho do executor vem de AZOUP_IO_THREADS.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# Executor de I/O único por processo
+def executor_io():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("AZOUP_IO_THREADS", 32)),
+                thread_name_prefix="azoup-io",
+            )
+        return _executor
+
+
+def _consultor_padrao():
+    from database import consultar_df
+    return consultar_df
+
+
+# Propaga o contexto do script Streamlit (se houver) para a thread de I/O,
+# para que o cache do Streamlit funcione sem avisos de contexto ausente
+def _com_contexto(funcao):
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+        from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+    except ImportError:
+        return funcao
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return funcao
+
+    def _rodar(*args):
+        # a thread é do pool: devolve o contexto anterior ao terminar, para
+        # que o próximo trabalho (de outra sessão) não rode com este
+        thread = threading.current_thread()
+        anterior = get_script_run_ctx(suppress_warning=True)
+        add_script_run_ctx(thread, ctx)
+        try:
+            return funcao(*args)
+        finally:
+            if anterior is not None:
+                add_script_run_ctx(thread, anterior)
+            elif hasattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME):
+                delattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME)
+    return _rodar
+
+
+async def fetch_df(tenant, statement, params=(), consultar=None):
+    """Executa uma instrução no executor de I/O e devolve o DataFrame."""
+    consultar = _com_contexto(consultar or _consultor_padrao())
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor_io(), consultar, tenant, statement, tuple(params))
+
+
+async def fetch_pedidos(tenant, pedidos, consultar=None, usar_resumos=True):
+    """
+    Compila os pedidos da camada semântica e executa todas as instruções do
+    plano em paralelo. Devolve um DataFrame por pedido, na mesma ordem.
+    Com usar_resumos, lê das tabelas de resumo do tenant quando provisionadas.
+    """
+    from metricas import compilar, recortar
+    from provisionamento import resumo_ativo
+
+    pedidos = list(pedidos)
+    resumo = None
+    if usar_resumos:
+        loop = asyncio.get_running_loop()
+        resumo = await loop.run_in_executor(executor_io(), _com_contexto(resumo_ativo), tenant)
+    plano = compilar(pedidos, resumo)
+    frames = await asyncio.gather(*[
+        fetch_df(tenant, instrucao["sql"], instrucao["params"], consultar=consultar)
+        for instrucao in plano
+    ])
+
+    resultados = [None] * len(pedidos)
+    for instrucao, df in zip(plano, frames):
+        for destino in instrucao["destinos"]:
+            i = destino["pedido"]
+            resultados[i] = recortar(df, pedidos[i], destino)
+    return resultados
+
+
+async def ao_chegar(tarefas):
+    """
+    Recebe pares (coroutine, callback) e chama cada callback assim que o seu
+    resultado chega, sem esperar pelos demais. Útil para renderizar blocos de
+    uma página na ordem em que os dados ficam prontos.
+    """
+    async def _rodar(coro, callback):
+        callback(await coro)
+
+    await asyncio.gather(*[_rodar(coro, callback) for coro, callback in tarefas])
+
+
+def executar_sincrono(coro):
+    """Executa uma coroutine a partir de código síncrono (ex.: script Streamlit)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # Já existe um loop nesta thread: executa em uma thread auxiliar
+    resultado = {}
+
+    def _rodar():
+        try:
+            resultado["valor"] = asyncio.run(coro)
+        except BaseException as e:
+            resultado["erro"] = e
+
+    thread = threading.Thread(target=_rodar)
+    thread.start()
+    thread.join()
+    if "erro" in resultado:
+        raise resultado["erro"]
+    return resultado["valor"]
+
+
+def fetch_df_sync(tenant, statement, params=(), consultar=None):
+    return executar_sincrono(fetch_df(tenant, statement, params, consultar=consultar))
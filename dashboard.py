@@ -1,8 +1,83 @@
 import streamlit as st
-from database import get_firebird_connection
+import ativos
+import historico_kpis
+from metricas import METRICAS, pedido
+from paginas.comum import carregar, memo
 import os
 import re
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+
+# Métricas exibidas nos cards do Dashboard (ver metricas.METRICAS)
+METRICAS_DASHBOARD = [
+    "total_vendas", "total_custo", "indice_recompra", "pecas_atendimento",
+    "ticket_medio", "novos_clientes", "clientes_ativos",
+]
+
+# Pedido dos KPIs do Dashboard. As métricas de fontes diferentes são
+# separadas por fonte, mas o compilador as junta em uma única instrução.
+def pedidos_kpis(data_ini, data_fim):
+    por_fonte = {}
+    for nome in METRICAS_DASHBOARD:
+        por_fonte.setdefault(METRICAS[nome]["fonte"], []).append(nome)
+    return [pedido(nomes, periodo=(data_ini, data_fim)) for nomes in por_fonte.values()]
+
+# Valores dos cards a partir dos DataFrames de pedidos_kpis (sem Streamlit:
+# também usado pelo lote noturno, ver lote_kpis.py)
+def valores_kpis(dfs):
+    linha = {}
+    for df in dfs:
+        linha.update(df.iloc[0].to_dict())
+
+    total_vendas = float(linha["TOTAL_VENDAS"])
+    total_custo = float(linha["TOTAL_CUSTO"])
+    lucro_bruto = total_vendas - total_custo
+    return {
+        "total_vendas": total_vendas,
+        "total_custo": total_custo,
+        "indice_recompra": linha["INDICE_RECOMPRA"],
+        "pecas_atendimento": linha["PECAS_ATENDIMENTO"],
+        "ticket_medio": float(linha["TICKET_MEDIO"]),
+        "novos_clientes": int(linha["NOVOS_CLIENTES"]),
+        "clientes_ativos": int(linha["CLIENTES_ATIVOS"]),
+        "lucro_bruto": lucro_bruto,
+        "margem_lucro": (lucro_bruto / total_vendas) * 100 if total_vendas > 0 else 0,
+    }
+
+# Valores do período de comparação e séries dos sparklines, lidos do
+# histórico diário (ver historico_kpis.py); {} quando não há histórico
+def comparacao_kpis(conn_data, data_inicial, data_final, modo, valores):
+    from database import chave_tenant
+
+    def calcular():
+        historico_kpis.registrar_observacao(conn_data, valores)
+        anteriores = historico_kpis.comparar(conn_data, data_inicial, data_final, modo)
+        series = {tipo: historico_kpis.serie(conn_data, tipo) for tipo in historico_kpis.TIPOS_DIARIOS}
+        return anteriores, series
+
+    try:
+        return memo("dashboard.comparacao",
+                    (chave_tenant(conn_data), str(data_inicial), str(data_final), modo, date.today()), calcular)
+    except Exception:
+        return {}, {}
+
+def linha_comparacao(kpi, anterior, modo):
+    if anterior is None:
+        return ""
+    if kpi["chave"] == "margem_lucro":
+        diferenca = float(kpi["atual"]) - anterior
+        texto = f"{diferenca:+.1f} pp"
+    else:
+        diferenca = historico_kpis.variacao(kpi["atual"], anterior)
+        if diferenca is None:
+            return ""
+        texto = f"{diferenca:+.1f}%"
+    seta, classe = ("▲", "kpi-delta-alta") if diferenca >= 0 else ("▼", "kpi-delta-baixa")
+    return (f'<div class="kpi-delta {classe}">{seta} {texto} '
+            f'vs {historico_kpis.COMPARACOES[modo]}</div>')
+
+# date_input devolve date; o valor inicial da sessão é datetime (app.py)
+def como_data(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
 
 def show_dashboard():
     # Acessar dados da empresa e usuário do session_state
@@ -12,102 +87,93 @@ def show_dashboard():
     # Título da página
     col1, col2 = st.columns([1, 5])
     with col1:
-        # Tentar carregar o logo de várias localizações possíveis
-        logo_paths = ["./Includes/logo.png", "./assets/logo.png", "./logo.png"]
-        logo = None
-        for path in logo_paths:
-            if os.path.exists(path):
-                logo = path
-                break
-                
-        if logo:
-            st.image(logo, width=80)
+        ativos.mostrar_logo(width=80)
     with col2:
        # st.subheader("Dashboard Principal")
        st.markdown('<div class="azoup-title">Dashboard Principal</div>', unsafe_allow_html=True)
-    # Filtros de data - ABAIXO DO TÍTULO 
-    col1, col2, col3, col4 = st.columns([1, 2, 2, 1])
-    
-    with col2:
-        data_inicial = st.date_input(
-            "Data Inicial",
-            value=st.session_state.data_inicial,
-            format="DD/MM/YYYY",
-            key="data_inicial_filter"
-        )
-    
-    with col3:
-        data_final = st.date_input(
-            "Data Final", 
-            value=st.session_state.data_final,
-            format="DD/MM/YYYY",
-            key="data_final_filter"
-        )
-    
+
+    # mesmos dados de conexão das outras páginas: driver, compressão, lote e peso do cliente
+    from database import conn_data_da_empresa
+    conn_data = conn_data_da_empresa(empresa)
+
+    # Seções independentes (st.fragment): aplicar o filtro de datas só
+    # reexecuta o bloco de KPIs; o botão de teste só reexecuta as informações
+    secao_kpis(conn_data)
+    secao_informacoes(user, empresa, conn_data)
+
+
+def barra_filtros():
+    """Filtros de data - ABAIXO DO TÍTULO. As duas datas são aplicadas juntas."""
+    with st.form("filtros_dashboard", border=False):
+        col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+
+        with col1:
+            modos = list(historico_kpis.COMPARACOES)
+            comparacao = st.selectbox(
+                "Comparar com",
+                modos,
+                index=modos.index(st.session_state.get("comparacao", "anterior")),
+                format_func=lambda m: historico_kpis.COMPARACOES[m].capitalize(),
+                key="comparacao_filter"
+            )
+
+        with col2:
+            data_inicial = st.date_input(
+                "Data Inicial",
+                value=st.session_state.data_inicial,
+                format="DD/MM/YYYY",
+                key="data_inicial_filter"
+            )
+
+        with col3:
+            data_final = st.date_input(
+                "Data Final",
+                value=st.session_state.data_final,
+                format="DD/MM/YYYY",
+                key="data_final_filter"
+            )
+
+        with col4:
+            st.write("")
+            aplicar = st.form_submit_button("Aplicar", use_container_width=True)
+
     # Atualizar session_state com as novas datas
-    st.session_state.data_inicial = data_inicial
-    st.session_state.data_final = data_final
-    
+    if aplicar:
+        st.session_state.data_inicial = data_inicial
+        st.session_state.data_final = data_final
+        st.session_state.comparacao = comparacao
+    return st.session_state.data_inicial, st.session_state.data_final, st.session_state.get("comparacao", "anterior")
+
+
+@st.fragment
+def secao_kpis(conn_data):
+    data_inicial, data_final, comparacao = barra_filtros()
+
     # Converter datas para o formato do banco de dados
     data_inicial_formatada = data_inicial.strftime("%Y-%m-%d")
     data_final_formatada = data_final.strftime("%Y-%m-%d")
-    
+
     # Tentar conectar ao banco de dados Firebird
     try:
-        conn_data = {
-            'host': empresa.get('host', ''),
-            'porta': empresa.get('porta', '3050'),
-            'database': empresa.get('caminho', ''),
-            'user': empresa.get('usuario', ''),
-            'password': empresa.get('senha', '')
-        }
-        
-        # Usar a conexão para buscar dados reais (implementar consultas reais aqui)
-        # Por enquanto, vamos usar valores fixos como exemplo
-        with get_firebird_connection(conn_data) as conn:
-            # NOVOS CLIENTES
-            cursor = conn.cursor()
-            sql = """
-            SELECT
-                CAST(COUNT(*) AS INTEGER) AS Novos_Clientes
-            FROM Clientes
-            WHERE data_cadastro >= CURRENT_DATE - 90
-            """
-            cursor.execute(sql)
-            novos_clientes = int(cursor.fetchone()[0] or 0)
-
-            # CLIENTES ATIVOS
-            cursor = conn.cursor()
-            sql = """
-            SELECT
-                CAST(COUNT(*) AS INTEGER) AS Novos_Clientes
-            FROM Clientes
-            WHERE INATIVO = 'N'
-            """
-            cursor.execute(sql)
-            clientes_ativos = int(cursor.fetchone()[0] or 0)
-
-            # Função auxiliar para buscar o valor de uma métrica
-            def get_valor(tipo, data_ini, data_fim):
-                sql = """
-                 SELECT COALESCE(SUM(valor), 0)
-                    FROM VW_KPI_BI
-                    WHERE TIPO = ?
-                    AND DATA BETWEEN ? AND ?
-                    """
-                cursor.execute(sql, (tipo, data_ini, data_fim))
-                return cursor.fetchone()[0] or 0            
-            
-            
-            # Valores da view VW_KPI_BI 
-            total_vendas = get_valor("TOTAL VENDAS", data_inicial_formatada, data_final_formatada)
-            total_custo = get_valor("TOTAL CUSTO", data_inicial_formatada, data_final_formatada)
-            indice_recompra = get_valor("INDICE RECOMPRA", data_inicial_formatada, data_final_formatada)         
-            pecas_atendimento = get_valor("PECAS ATEND", data_inicial_formatada, data_final_formatada)
-            ticket_medio = get_valor("TICKET MEDIO", data_inicial_formatada, data_final_formatada)
-            lucro_bruto = total_vendas - total_custo
-            margem_lucro = (lucro_bruto / total_vendas) * 100 if total_vendas > 0 else 0
-            
+        # Todos os KPIs vêm de uma única instrução montada pela camada semântica;
+        # com a atualização automática ligada, só os dias novos são relidos
+        valores = valores_kpis(carregar("dashboard.kpis", conn_data,
+                                        pedidos_kpis(data_inicial_formatada, data_final_formatada)))
+
+        novos_clientes = valores["novos_clientes"]
+        clientes_ativos = valores["clientes_ativos"]
+        total_vendas = valores["total_vendas"]
+        total_custo = valores["total_custo"]
+        indice_recompra = valores["indice_recompra"]
+        pecas_atendimento = valores["pecas_atendimento"]
+        ticket_medio = valores["ticket_medio"]
+        lucro_bruto = valores["lucro_bruto"]
+        margem_lucro = valores["margem_lucro"]
+
+        # Deltas e sparklines sem novas consultas de período (histórico diário)
+        anteriores, series = comparacao_kpis(conn_data, como_data(data_inicial), como_data(data_final),
+                                             comparacao, valores)
+
     except Exception as e:
         st.error(f"Erro ao conectar ao banco de dados: {str(e)}")
         # Valores padrão em caso de erro
@@ -120,18 +186,19 @@ def show_dashboard():
         ticket_medio = 0
         lucro_bruto = 0
         margem_lucro = 0
+        anteriores, series = {}, {}
     
     # KPIs
     kpis = [
-        {"titulo": "Total de Vendas", "valor": f"R$ {total_vendas:,.2f}", "icone": "💰"},
-        {"titulo": "Total Custo Produto", "valor": f"R$ {total_custo:,.2f}", "icone": "📦"},
-        {"titulo": "Índice de Recompra", "valor": f"{indice_recompra}%", "icone": "🔄"},
-        {"titulo": "Clientes Ativos", "valor": f"{clientes_ativos:,}", "icone": "👥"},
-        {"titulo": "Novos Clientes (3 meses)", "valor": f"{novos_clientes}", "icone": "⭐"},
-        {"titulo": "Peças Por Atendimento", "valor": f"{pecas_atendimento}", "icone": "🔧"},
-        {"titulo": "Ticket Médio", "valor": f"R$ {ticket_medio:,.2f}", "icone": "🎫"},
-        {"titulo": "Lucro Bruto", "valor": f"R$ {lucro_bruto:,.2f}", "icone": "📈"},
-        {"titulo": "Margem de Lucro", "valor": f"{margem_lucro:.1f}%", "icone": "💹"}
+        {"chave": "total_vendas", "titulo": "Total de Vendas", "valor": f"R$ {total_vendas:,.2f}", "icone": "💰", "atual": total_vendas},
+        {"chave": "total_custo", "titulo": "Total Custo Produto", "valor": f"R$ {total_custo:,.2f}", "icone": "📦", "atual": total_custo},
+        {"chave": "indice_recompra", "titulo": "Índice de Recompra", "valor": f"{indice_recompra}%", "icone": "🔄", "atual": indice_recompra},
+        {"chave": "clientes_ativos", "titulo": "Clientes Ativos", "valor": f"{clientes_ativos:,}", "icone": "👥", "atual": clientes_ativos},
+        {"chave": "novos_clientes", "titulo": "Novos Clientes (3 meses)", "valor": f"{novos_clientes}", "icone": "⭐", "atual": novos_clientes},
+        {"chave": "pecas_atendimento", "titulo": "Peças Por Atendimento", "valor": f"{pecas_atendimento}", "icone": "🔧", "atual": pecas_atendimento},
+        {"chave": "ticket_medio", "titulo": "Ticket Médio", "valor": f"R$ {ticket_medio:,.2f}", "icone": "🎫", "atual": ticket_medio},
+        {"chave": "lucro_bruto", "titulo": "Lucro Bruto", "valor": f"R$ {lucro_bruto:,.2f}", "icone": "📈", "atual": lucro_bruto},
+        {"chave": "margem_lucro", "titulo": "Margem de Lucro", "valor": f"{margem_lucro:.1f}%", "icone": "💹", "atual": margem_lucro}
     ]
     
     # Exibir KPIs em grid responsivo
@@ -150,25 +217,24 @@ def show_dashboard():
                         <span>{kpi["titulo"]}</span>
                     </div>
                     <div class="kpi-value">{kpi["valor"]}</div>
+                    {linha_comparacao(kpi, anteriores.get(kpi["chave"]), comparacao)}
+                    {historico_kpis.sparkline_svg(series.get(kpi["chave"], []))}
                     <div class="kpi-sub">Período: {data_inicial.strftime("%d/%m/%Y")} a {data_final.strftime("%d/%m/%Y")}</div>
                 </div>
             ''', unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
     
-    # Botões de ação
-    #col1, col2, col3 = st.columns(3)
-    #with col2:
-    #    if st.button("🔄 Atualizar Dados", use_container_width=True):
-    #        st.rerun()
-    
+
+@st.fragment
+def secao_informacoes(user, empresa, conn_data):
     # Adicionar informações de debug (opcional)
     with st.expander("ℹ️ Informações do Sistema"):
         st.write(f"Usuário: {user.get('nome_usuario', 'N/A')}")
         st.write(f"Empresa: {empresa.get('nome', 'N/A')}")
         st.write(f"API: {empresa.get('api', 'N/A')}")
-        st.write(f"Data inicial (formato BD): {data_inicial_formatada}")
-        st.write(f"Data final (formato BD): {data_final_formatada}")
+        st.write(f"Data inicial (formato BD): {st.session_state.data_inicial.strftime('%Y-%m-%d')}")
+        st.write(f"Data final (formato BD): {st.session_state.data_final.strftime('%Y-%m-%d')}")
         
         # Botão para testar conexão
         if st.button("Testar Conexão com Banco de Dados"):
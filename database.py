@@ -1,6 +1,4 @@
 import streamlit as st
-from supabase import create_client
-import fdb
 import os
 import sys
 
@@ -11,31 +9,40 @@ def init_supabase():
     # Inicializa e retorna o cliente Supabase
     supabase_url = st.secrets["supabase"]["url"]
     supabase_key = st.secrets["supabase"]["key"]
+    # import tardio: só quem usa o cliente paga o custo (ver inicializacao.py)
+    from supabase import create_client
     return create_client(supabase_url, supabase_key)
 
-# Conexão dinâmica com Firebird usando fdb
+# Abre a conexão com Firebird (sem Streamlit: propaga a exceção).
+# O driver (fdb ou firebird-driver) e a compressão de rede vêm do cliente (drivers.py)
+def conectar_firebird(conn_data):
+    import drivers
+
+    return drivers.conectar(conn_data)
+
+# Conexão dinâmica com Firebird
 def get_firebird_connection(conn_data):
     try:
-        # Verifica se o host está vazio (conexão local)
-        if not conn_data['host'] or conn_data['host'].strip() == '':
-            # Conexão local - usa apenas o caminho do banco
-            dsn = conn_data['database']
-        else:
-            # Conexão remota - formata host/porta:caminho
-            porta = conn_data.get('porta', '3050')  # Porta padrão do Firebird
-            dsn = f"{conn_data['host']}/{porta}:{conn_data['database']}"
-        
-        conn = fdb.connect(
-            dsn=dsn,
-            user=conn_data['user'],
-            password=conn_data['password'],
-            charset='UTF8'
-        )
-        return conn
+        return conectar_firebird(conn_data)
     except Exception as e:
         st.error(f"Erro na conexão Firebird: {str(e)}")
         return None
 
+# Monta conn_data a partir de um registro da tabela clientes
+def conn_data_da_empresa(empresa):
+    return {
+        'host': empresa.get('host') or '',
+        'porta': str(empresa.get('porta') or '3050'),
+        'database': empresa.get('caminho') or '',
+        'user': empresa.get('usuario') or '',
+        'password': empresa.get('senha') or '',
+        # peso do cliente na fila justa do servidor (governador.py)
+        'peso': empresa.get('peso_fila') or 1,
+        # driver e compressão de rede (drivers.py)
+        'driver': empresa.get('driver_firebird') or None,
+        'compressao': empresa.get('compressao_rede') or None
+    }
+
 # Função para testar conexão com Firebird
 def test_firebird_connection(conn_data):
     try:
@@ -46,4 +53,54 @@ def test_firebird_connection(conn_data):
         return False
     except Exception as e:
         st.error(f"Falha no teste de conexão: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+# Identificação do servidor Firebird (host/porta) de uma conexão
+def chave_host(conn_data):
+    host = (conn_data.get('host') or '').strip()
+    if not host:
+        return 'local'
+    return f"{host}/{conn_data.get('porta') or '3050'}"
+
+# Identificação do banco do cliente (tenant) dentro do servidor
+def chave_tenant(conn_data):
+    return f"{chave_host(conn_data)}:{conn_data.get('database', '')}"
+
+# Executa uma instrução e devolve um DataFrame (utilizável fora do Streamlit).
+# A execução aguarda vaga no governador do servidor (fila justa entre tenants).
+def executar_consulta(conn_data, sql, params=()):
+    import pandas as pd
+    from governador import obter_governador
+
+    with obter_governador().vaga(chave_host(conn_data), chave_tenant(conn_data),
+                                 peso=float(conn_data.get('peso') or 1)):
+        conn = conectar_firebird(conn_data)
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            colunas = [desc[0] for desc in cur.description]
+            df = pd.DataFrame(cur.fetchall(), columns=colunas)
+            cur.close()
+            return df
+        finally:
+            conn.close()
+
+# Cache compartilhado entre páginas e sessões: instruções idênticas
+# (SQL + parâmetros + banco) só vão ao servidor uma vez por geração.
+# A geração avança quando o Firebird notifica alteração (eventos.py).
+@st.cache_data(ttl=300, show_spinner=False)
+def _consultar_ttl_curto(conn_data, sql, params, geracao):
+    return executar_consulta(conn_data, sql, params)
+
+# Com o ouvinte de eventos ativo a invalidação é imediata, então o TTL pode ser longo
+@st.cache_data(ttl=6 * 3600, show_spinner=False)
+def _consultar_ttl_longo(conn_data, sql, params, geracao):
+    return executar_consulta(conn_data, sql, params)
+
+def consultar_df(conn_data, sql, params=()):
+    from eventos import geracao, ouvinte_ativo
+
+    tenant = chave_tenant(conn_data)
+    if ouvinte_ativo(tenant):
+        return _consultar_ttl_longo(conn_data, sql, tuple(params), geracao(tenant))
+    return _consultar_ttl_curto(conn_data, sql, tuple(params), geracao(tenant))
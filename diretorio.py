@@ -0,0 +1,171 @@
+"""
+Diretório de clientes (tenants) em memória.
+
+As telas de administração e o cadastro de usuários consultavam a tabela
+clientes do Supabase a cada rerun: crud_clientes fazia um select de todos
+os nomes mais um select filtrado, cadastro_super_admin, Resumos BI e Planos
+de consulta buscavam todos os clientes de novo, e signup_user consultava o
+cliente pelo api dentro do formulário a cada renderização. Aqui a tabela é
+lida uma vez e indexada por id, api e nome; as leituras passam a ser
+consultas a dicionários.
+
+O diretório é do processo (compartilhado pelas sessões, como ativos.py).
+As gravações feitas pelo app (CRUD de clientes) chamam invalidar(); para
+alterações feitas por fora (outro processo, painel do Supabase) vale a
+validade AZOUP_TTL_DIRETORIO (segundos, padrão 300). Um api ou id não
+encontrado força uma recarga, no máximo uma a cada RECARGA_FALTA segundos,
+para que um cliente recém-criado não espere a validade vencer.
+
+Os registros devolvidos são compartilhados: não devem ser alterados.
+"""
+import os
+import threading
+import time
+
+import telemetria
+
+VALIDADE = int(os.environ.get("AZOUP_TTL_DIRETORIO", "300"))
+RECARGA_FALTA = 30
+
+_lock = threading.Lock()
+# serializa as cargas: sessões simultâneas com o diretório vencido fazem uma só consulta
+_lock_carga = threading.Lock()
+_diretorio = {
+    "clientes": [],
+    "por_id": {},
+    "por_api": {},
+    "por_nome": {},
+    "carregado": 0.0,
+    "valido": False,
+    "versao": 0,
+}
+_estatisticas = {"cargas": 0, "acertos": 0, "invalidacoes": 0, "ms_ultima_carga": 0.0}
+_registrado = False
+
+
+def _registrar_fonte():
+    global _registrado
+    if not _registrado:
+        _registrado = True
+        telemetria.registrar_fonte("Diretório de clientes", metricas)
+
+
+def _consultar():
+    from database import init_supabase
+
+    return init_supabase().table("clientes").select("*").execute().data or []
+
+
+def _indexar(registros):
+    clientes = sorted(registros, key=lambda c: (c.get("nome") or "").casefold())
+    por_nome = {}
+    for cliente in clientes:
+        por_nome.setdefault(cliente.get("nome"), []).append(cliente)
+    return {
+        "clientes": clientes,
+        "por_id": {c.get("id"): c for c in clientes},
+        "por_api": {c.get("api"): c for c in clientes if c.get("api")},
+        "por_nome": por_nome,
+    }
+
+
+def _recarregar(forcar=False):
+    with _lock_carga:
+        # outra sessão pode ter recarregado enquanto esta esperava
+        if not forcar and _valido():
+            return
+        inicio = time.perf_counter()
+        indices = _indexar(_consultar())
+        custo = time.perf_counter() - inicio
+        with _lock:
+            _diretorio.update(indices, carregado=time.time(), valido=True, versao=_diretorio["versao"] + 1)
+            _estatisticas["cargas"] += 1
+            _estatisticas["ms_ultima_carga"] = custo * 1000
+    telemetria.incrementar("diretorio.cargas")
+    telemetria.registrar_tempo("diretorio.carga", custo)
+
+
+def _valido():
+    with _lock:
+        return _diretorio["valido"] and time.time() - _diretorio["carregado"] < VALIDADE
+
+
+def _indices():
+    _registrar_fonte()
+    if _valido():
+        with _lock:
+            _estatisticas["acertos"] += 1
+        telemetria.incrementar("diretorio.acertos")
+    else:
+        _recarregar()
+    with _lock:
+        return dict(_diretorio)
+
+
+def _buscar(indice, chave):
+    registro = _indices()[indice].get(chave)
+    if registro is None and chave is not None:
+        with _lock:
+            recente = time.time() - _diretorio["carregado"] < RECARGA_FALTA
+        if not recente:
+            telemetria.incrementar("diretorio.recargas_falta")
+            _recarregar(forcar=True)
+            with _lock:
+                registro = _diretorio[indice].get(chave)
+    return registro
+
+
+# =========================
+# Consultas
+# =========================
+
+def clientes():
+    """Todos os clientes, ordenados por nome."""
+    return list(_indices()["clientes"])
+
+
+def nomes():
+    """Nomes distintos, na ordem de clientes()."""
+    return list(dict.fromkeys(c.get("nome") for c in clientes()))
+
+
+def cliente_por_id(id_):
+    return _buscar("por_id", id_)
+
+
+def cliente_por_api(api):
+    return _buscar("por_api", api)
+
+
+def clientes_por_nome(nome):
+    return list(_indices()["por_nome"].get(nome, []))
+
+
+def invalidar():
+    """Chamar depois de gravar na tabela clientes: a próxima leitura recarrega."""
+    with _lock:
+        _diretorio["valido"] = False
+        _diretorio["versao"] += 1
+        _estatisticas["invalidacoes"] += 1
+    telemetria.incrementar("diretorio.invalidacoes")
+
+
+def versao():
+    """Muda a cada gravação (invalidar) e a cada recarga; serve de entrada para memos."""
+    with _lock:
+        return _diretorio["versao"]
+
+
+def metricas():
+    with _lock:
+        if not _estatisticas["cargas"]:
+            return []
+        return [{
+            "clientes": len(_diretorio["clientes"]),
+            "cargas": _estatisticas["cargas"],
+            "acertos": _estatisticas["acertos"],
+            "invalidacoes": _estatisticas["invalidacoes"],
+            "ms_ultima_carga": round(_estatisticas["ms_ultima_carga"], 1),
+            "idade_s": round(time.time() - _diretorio["carregado"], 1),
+            "valido": _diretorio["valido"] and time.time() - _diretorio["carregado"] < VALIDADE,
+        }]
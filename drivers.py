@@ -0,0 +1,97 @@
+"""
+Drivers do Firebird: fdb e firebird-driver, escolhidos por cliente.
+
+database.conectar_firebird abria toda conexão com o fdb. Aqui a conexão
+passa por conectar(), que usa o driver configurado para o cliente.
+
+A leitura continua com fetchall: nos dois drivers fetchmany é um laço de
+fetchone em Python, e o número de idas e voltas na rede é decidido pelo
+buffer de mensagens do fbclient, não por cursor.arraysize. Um tamanho de
+lote por cliente não mudaria nada no link de WAN.
+
+- fdb: o driver de sempre (API ISC do fbclient). Não pede compressão na
+  conexão: ela só pode vir do firebird.conf do cliente (WireCompression =
+  true), então compressao_rede = 'S' com o fdb é recusado em vez de
+  conectar sem compressão;
+- firebird-driver: driver atual do projeto Firebird (API OO do fbclient 3+).
+  Com a compressão ligada, a conexão pede WireCompression no DPB (precisa de
+  servidor Firebird 3 ou mais novo), o que reduz os bytes das respostas
+  grandes nos links de WAN.
+
+Configuração por cliente (campos opcionais da tabela clientes, como
+eventos_bi e peso_fila, levados para conn_data por conn_data_da_empresa):
+
+- driver_firebird -> conn_data['driver']: "fdb" ou "firebird-driver"
+  (padrão AZOUP_DRIVER_FIREBIRD, fdb);
+- compressao_rede -> conn_data['compressao']: 'S' liga a compressão
+  (só com o firebird-driver).
+
+benchmarks/bench_drivers.py compara os drivers (bytes na rede e tempo de
+busca por instrução BI) contra um banco real.
+"""
+import os
+import threading
+
+DRIVER_PADRAO = os.environ.get("AZOUP_DRIVER_FIREBIRD", "fdb")
+DRIVERS = ["fdb", "firebird-driver"]
+
+_lock = threading.Lock()
+
+
+def dsn(conn_data):
+    """host/porta:caminho, ou só o caminho para conexão local (host vazio)."""
+    if not conn_data['host'] or conn_data['host'].strip() == '':
+        return conn_data['database']
+    porta = conn_data.get('porta') or '3050'
+    return f"{conn_data['host']}/{porta}:{conn_data['database']}"
+
+
+def opcoes(conn_data):
+    """(driver, compressão) efetivos da conexão."""
+    driver = conn_data.get('driver') or DRIVER_PADRAO
+    if driver not in DRIVERS:
+        raise ValueError(f"Driver Firebird desconhecido: {driver} (use {' ou '.join(DRIVERS)})")
+    compressao = conn_data.get('compressao') in ('S', True)
+    if compressao and driver == "fdb":
+        raise ValueError("Compressão de rede exige o driver firebird-driver; com o fdb, "
+                         "configure WireCompression no firebird.conf do cliente e desligue compressao_rede")
+    return driver, compressao
+
+
+def _conectar_fdb(conn_data, compressao):
+    # compressão já recusada em opcoes(): o fdb não a pede na conexão
+    import fdb
+
+    return fdb.connect(
+        dsn=dsn(conn_data),
+        user=conn_data['user'],
+        password=conn_data['password'],
+        charset='UTF8'
+    )
+
+
+def _conectar_firebird_driver(conn_data, compressao):
+    from firebird.driver import connect, driver_config
+
+    # Um banco registrado por DSN e compressão: o driver monta o DPB a partir dele
+    nome = f"azoup:{dsn(conn_data)}:{'compactado' if compressao else 'simples'}"
+    with _lock:
+        if driver_config.get_database(nome) is None:
+            config = driver_config.register_database(nome)
+            config.dsn.value = dsn(conn_data)
+            config.charset.value = 'UTF8'
+            if compressao:
+                config.config.value = 'WireCompression = true'
+    return connect(nome, user=conn_data['user'], password=conn_data['password'])
+
+
+CONECTORES = {
+    "fdb": _conectar_fdb,
+    "firebird-driver": _conectar_firebird_driver,
+}
+
+
+def conectar(conn_data):
+    """Conexão DB-API com o driver do cliente (sem Streamlit: propaga a exceção)."""
+    driver, compressao = opcoes(conn_data)
+    return CONECTORES[driver](conn_data, compressao)
@@ -0,0 +1,236 @@
+"""
+Invalidação de cache por eventos do Firebird (POST_EVENT).
+
+Opcional por cliente (campo `eventos_bi` = 'S' em clientes, ou
+AZOUP_EVENTOS=1 para todos). Gatilhos instalados nas tabelas de venda
+disparam POST_EVENT 'BI_VENDA_CHANGED'; uma thread por tenant escuta o
+evento pelo event conduit do driver e, a cada notificação, avança a
+"geração" daquele tenant. A geração faz parte da chave do cache de
+database.consultar_df, então os resultados de KPI, Vendas e Vendedores do
+tenant ficam sujos na hora. Com o ouvinte ativo o cache usa TTL longo.
+
+Teste contra um servidor local:
+
+    python eventos.py /dados/TESTE.FDB --host localhost --usuario SYSDBA --senha masterkey
+    python eventos.py /dados/TESTE.FDB --host localhost --instalar   # instala os gatilhos
+"""
+import logging
+import os
+import threading
+import time
+
+EVENTO = "BI_VENDA_CHANGED"
+
+# Views BI cujas tabelas base recebem os gatilhos
+VIEWS_BI = ("VW_KPI_BI", "VW_BI_RELGERENCIAL_CUPOM_PREVENDA", "VW_BI_VENDA_VENDEDORES")
+
+_log = logging.getLogger(__name__)
+_lock = threading.Lock()
+_geracoes = {}
+_ouvintes = {}
+
+
+# =========================
+# Gerações por tenant
+# =========================
+
+def geracao(tenant):
+    return _geracoes.get(tenant, 0)
+
+
+def marcar_sujo(tenant):
+    with _lock:
+        _geracoes[tenant] = _geracoes.get(tenant, 0) + 1
+    _log.info("Dados BI alterados em %s (geração %s)", tenant, _geracoes[tenant])
+
+
+def ouvinte_ativo(tenant):
+    ouvinte = _ouvintes.get(tenant)
+    return ouvinte is not None and ouvinte.conectado
+
+
+def habilitado(empresa):
+    if os.environ.get("AZOUP_EVENTOS") == "1":
+        return True
+    return isinstance(empresa, dict) and empresa.get("eventos_bi") in ("S", True)
+
+
+# =========================
+# Ouvinte (thread por tenant)
+# =========================
+
+class _Ouvinte(threading.Thread):
+    def __init__(self, conn_data, tenant):
+        super().__init__(name=f"azoup-eventos-{tenant}", daemon=True)
+        self.conn_data = conn_data
+        self.tenant = tenant
+        self.conectado = False
+        self.parar = threading.Event()
+
+    def run(self):
+        from database import conectar_firebird
+
+        espera = 1
+        while not self.parar.is_set():
+            conn = conduit = None
+            try:
+                conn = conectar_firebird(self.conn_data)
+                if hasattr(conn, "event_conduit"):  # fdb
+                    conduit = conn.event_conduit([EVENTO])
+                else:  # firebird-driver
+                    conduit = conn.event_collector([EVENTO])
+                if hasattr(conduit, "begin"):  # fdb >= 2.0, firebird-driver
+                    conduit.begin()
+                self.conectado = True
+                espera = 1
+                # Alterações feitas enquanto estávamos desconectados não foram vistas
+                marcar_sujo(self.tenant)
+
+                while not self.parar.is_set():
+                    recebidos = conduit.wait(timeout=30)
+                    if recebidos and recebidos.get(EVENTO):
+                        marcar_sujo(self.tenant)
+            except Exception as e:
+                _log.warning("Ouvinte de eventos %s: %s (nova tentativa em %ss)", self.tenant, e, espera)
+            finally:
+                self.conectado = False
+                for recurso in (conduit, conn):
+                    try:
+                        if recurso is not None:
+                            recurso.close()
+                    except Exception:
+                        pass
+            self.parar.wait(espera)
+            espera = min(espera * 2, 300)
+
+
+def garantir_ouvinte(conn_data):
+    """Inicia (uma única vez por processo) o ouvinte de eventos do tenant."""
+    from database import chave_tenant
+
+    tenant = chave_tenant(conn_data)
+    with _lock:
+        ouvinte = _ouvintes.get(tenant)
+        if ouvinte is None or not ouvinte.is_alive():
+            ouvinte = _Ouvinte(dict(conn_data), tenant)
+            _ouvintes[tenant] = ouvinte
+            ouvinte.start()
+    return ouvinte
+
+
+def parar_ouvinte(conn_data):
+    from database import chave_tenant
+
+    ouvinte = _ouvintes.pop(chave_tenant(conn_data), None)
+    if ouvinte is not None:
+        ouvinte.parar.set()
+
+
+# =========================
+# Gatilhos (DDL)
+# =========================
+
+# Tabelas base (recursivamente) das views BI, via RDB$DEPENDENCIES
+def tabelas_base(conn, views=VIEWS_BI):
+    cur = conn.cursor()
+    pendentes, vistas, tabelas = list(views), set(), set()
+    while pendentes:
+        nome = pendentes.pop()
+        if nome in vistas:
+            continue
+        vistas.add(nome)
+        cur.execute("""
+            SELECT DISTINCT TRIM(D.RDB$DEPENDED_ON_NAME), R.RDB$VIEW_BLR
+            FROM RDB$DEPENDENCIES D
+            JOIN RDB$RELATIONS R ON R.RDB$RELATION_NAME = D.RDB$DEPENDED_ON_NAME
+            WHERE D.RDB$DEPENDENT_NAME = ? AND D.RDB$DEPENDED_ON_TYPE = 0
+        """, (nome,))
+        for dependencia, blr in cur.fetchall():
+            if blr is None:
+                tabelas.add(dependencia)
+            else:
+                pendentes.append(dependencia)
+    cur.close()
+    return sorted(t for t in tabelas if not t.startswith("RDB$") and not t.startswith("MON$"))
+
+
+def nome_gatilho(tabela):
+    return f"BI_EVT_{tabela}"[:31]
+
+
+def ddl_gatilho(tabela):
+    return (
+        f"CREATE OR ALTER TRIGGER {nome_gatilho(tabela)} FOR {tabela}\n"
+        f"ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 32000\n"
+        f"AS\nBEGIN\n  POST_EVENT '{EVENTO}';\nEND"
+    )
+
+
+def instalar_gatilhos(conn, tabelas=None):
+    """Cria/atualiza os gatilhos POST_EVENT e devolve as tabelas cobertas."""
+    tabelas = tabelas or tabelas_base(conn)
+    cur = conn.cursor()
+    for tabela in tabelas:
+        cur.execute(ddl_gatilho(tabela))
+    conn.commit()
+    cur.close()
+    return tabelas
+
+
+def remover_gatilhos(conn, tabelas=None):
+    tabelas = tabelas or tabelas_base(conn)
+    cur = conn.cursor()
+    for tabela in tabelas:
+        cur.execute(
+            "SELECT 1 FROM RDB$TRIGGERS WHERE RDB$TRIGGER_NAME = ?", (nome_gatilho(tabela),)
+        )
+        if cur.fetchone():
+            cur.execute(f"DROP TRIGGER {nome_gatilho(tabela)}")
+    conn.commit()
+    cur.close()
+
+
+# Teste manual contra um servidor Firebird local: sobe o ouvinte, dispara o
+# evento em outra conexão e confere se a geração do tenant avançou
+if __name__ == "__main__":
+    import argparse
+
+    from database import chave_tenant, conectar_firebird
+
+    parser = argparse.ArgumentParser(description="Teste do canal de invalidação por eventos")
+    parser.add_argument("caminho", help="caminho do banco no servidor")
+    parser.add_argument("--host", default="", help="vazio para conexão local")
+    parser.add_argument("--porta", default="3050")
+    parser.add_argument("--usuario", default="SYSDBA")
+    parser.add_argument("--senha", default="masterkey")
+    parser.add_argument("--instalar", action="store_true", help="instala os gatilhos nas tabelas base")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    conn_data = {"host": args.host, "porta": args.porta, "database": args.caminho,
+                 "user": args.usuario, "password": args.senha}
+
+    if args.instalar:
+        with conectar_firebird(conn_data) as conn:
+            print("Gatilhos instalados em:", ", ".join(instalar_gatilhos(conn)) or "(nenhuma tabela)")
+
+    tenant = chave_tenant(conn_data)
+    garantir_ouvinte(conn_data)
+    for _ in range(50):
+        if ouvinte_ativo(tenant):
+            break
+        time.sleep(0.1)
+    antes = geracao(tenant)
+
+    with conectar_firebird(conn_data) as conn:
+        conn.cursor().execute(f"EXECUTE BLOCK AS BEGIN POST_EVENT '{EVENTO}'; END")
+        conn.commit()
+
+    for _ in range(100):
+        if geracao(tenant) > antes:
+            print(f"OK: evento recebido (geração {antes} -> {geracao(tenant)})")
+            break
+        time.sleep(0.1)
+    else:
+        print("FALHA: evento não recebido em 10s")
+        raise SystemExit(1)
@@ -0,0 +1,303 @@
+"""
+Exportações (CSV, XLSX, Parquet) geradas sob demanda em segundo plano.
+
+Antes, Vendedores montava o CSV inteiro em memória (to_csv) a cada rerun,
+mesmo sem ninguém clicar em "Download". Aqui nada é gerado até o usuário
+pedir: o pedido vira um trabalho em um executor próprio (AZOUP_EXPORT_THREADS,
+padrão 2), que grava o arquivo em lotes num diretório temporário
+(AZOUP_EXPORT_DIR, padrão <tmp>/azoup_exportacoes). Os dados vêm em lotes de
+TAMANHO_LOTE linhas, de um DataFrame já carregado (lotes_df) ou direto do
+cursor do Firebird (lotes_sql, linhas detalhadas sem agregação, passando
+pelo governador do servidor), então nem a origem nem o arquivo ficam
+inteiros na memória.
+
+O painel (painel_exportacao) acompanha o trabalho em um fragmento que se
+atualiza sozinho e oferece o download quando o arquivo fica pronto; os
+reruns da página não refazem nada. Arquivos com mais de VALIDADE segundos
+são apagados no próximo pedido.
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import telemetria
+
+TAMANHO_LOTE = 50_000
+VALIDADE = 3600
+DIRETORIO = os.environ.get("AZOUP_EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "azoup_exportacoes")
+# Limite de linhas de uma planilha do Excel (menos o cabeçalho)
+LIMITE_XLSX = 1_048_575
+
+FORMATOS = {
+    "csv": {"rotulo": "CSV", "extensao": ".csv", "mime": "text/csv"},
+    "xlsx": {"rotulo": "Excel (XLSX)", "extensao": ".xlsx",
+             "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    "parquet": {"rotulo": "Parquet", "extensao": ".parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+_lock = threading.Lock()
+_executor = None
+# id -> {"id", "nome", "formato", "estado", "caminho", "linhas", "bytes", "erro", "criado", "segundos"}
+_trabalhos = {}
+_registrado = False
+
+
+def _executor_exportacao():
+    global _executor, _registrado
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("AZOUP_EXPORT_THREADS", 2)),
+                thread_name_prefix="azoup-exportacao",
+            )
+        if not _registrado:
+            _registrado = True
+            telemetria.registrar_fonte("Exportações", metricas)
+        return _executor
+
+
+# =========================
+# Origens (iteradores de lotes)
+# =========================
+
+def lotes_df(df, tamanho=TAMANHO_LOTE):
+    """Lotes de um DataFrame em memória (o índice nomeado vira coluna)."""
+    if df.index.name is not None:
+        df = df.reset_index()
+    for inicio in range(0, len(df), tamanho):
+        yield df.iloc[inicio:inicio + tamanho]
+
+
+def lotes_sql(conn_data, sql, params=(), tamanho=TAMANHO_LOTE):
+    """Lotes lidos do cursor com fetchmany, sem carregar o resultado inteiro."""
+    import pandas as pd
+
+    from database import chave_host, chave_tenant, conectar_firebird
+    from governador import obter_governador
+
+    with obter_governador().vaga(chave_host(conn_data), chave_tenant(conn_data),
+                                 peso=float(conn_data.get('peso') or 1)):
+        conn = conectar_firebird(conn_data)
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            colunas = [desc[0] for desc in cur.description]
+            while True:
+                linhas = cur.fetchmany(tamanho)
+                if not linhas:
+                    break
+                yield pd.DataFrame(linhas, columns=colunas)
+            cur.close()
+        finally:
+            conn.close()
+
+
+# =========================
+# Escrita em lotes
+# =========================
+
+def _escrever_csv(caminho, lotes, progresso):
+    # mesmo formato do download anterior (separador ; e decimal ,)
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        for i, lote in enumerate(lotes):
+            lote.to_csv(f, sep=";", decimal=",", index=False, header=(i == 0))
+            progresso(len(lote))
+
+
+def _escrever_xlsx(caminho, lotes, progresso):
+    from openpyxl import Workbook
+
+    # write_only grava as linhas direto no arquivo, sem manter a planilha em memória
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet("Dados")
+    escritas = 0
+    for i, lote in enumerate(lotes):
+        if i == 0:
+            planilha.append([str(c) for c in lote.columns])
+        escritas += len(lote)
+        if escritas > LIMITE_XLSX:
+            raise ValueError(f"O Excel aceita no máximo {LIMITE_XLSX:,} linhas; use CSV ou Parquet.")
+        valores = lote.astype(object).where(lote.notna(), None)
+        for linha in valores.itertuples(index=False, name=None):
+            planilha.append(list(linha))
+        progresso(len(lote))
+    livro.save(caminho)
+
+
+def _escrever_parquet(caminho, lotes, progresso):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    escritor = None
+    try:
+        for lote in lotes:
+            if escritor is None:
+                tabela = pa.Table.from_pandas(lote, preserve_index=False)
+                escritor = pq.ParquetWriter(caminho, tabela.schema)
+            else:
+                tabela = pa.Table.from_pandas(lote, schema=escritor.schema, preserve_index=False)
+            escritor.write_table(tabela)
+            progresso(len(lote))
+    finally:
+        if escritor is not None:
+            escritor.close()
+    if escritor is None:
+        pq.write_table(pa.table({}), caminho)
+
+
+_ESCRITORES = {"csv": _escrever_csv, "xlsx": _escrever_xlsx, "parquet": _escrever_parquet}
+
+
+# =========================
+# Trabalhos
+# =========================
+
+def _limpar_antigos():
+    limite = time.time() - VALIDADE
+    with _lock:
+        antigos = [t for t in _trabalhos.values() if t["criado"] < limite and t["estado"] in ("pronto", "erro")]
+        for trabalho in antigos:
+            _trabalhos.pop(trabalho["id"], None)
+    for trabalho in antigos:
+        if trabalho["caminho"]:
+            try:
+                os.remove(trabalho["caminho"])
+            except OSError:
+                pass
+
+
+def _rodar(trabalho, gerar_lotes):
+    def progresso(linhas):
+        trabalho["linhas"] += linhas
+
+    trabalho["estado"] = "gerando"
+    inicio = time.perf_counter()
+    try:
+        _ESCRITORES[trabalho["formato"]](trabalho["caminho"], gerar_lotes(), progresso)
+        trabalho["bytes"] = os.path.getsize(trabalho["caminho"])
+        trabalho["estado"] = "pronto"
+        telemetria.incrementar("exportacao.bytes", trabalho["bytes"])
+        telemetria.incrementar("exportacao.linhas", trabalho["linhas"])
+    except Exception as e:
+        trabalho["estado"] = "erro"
+        trabalho["erro"] = str(e)
+        try:
+            os.remove(trabalho["caminho"])
+        except OSError:
+            pass
+    finally:
+        trabalho["segundos"] = time.perf_counter() - inicio
+        telemetria.registrar_tempo(f"exportacao.{trabalho['formato']}", trabalho["segundos"])
+
+
+def solicitar(nome, formato, gerar_lotes):
+    """
+    Agenda a exportação e devolve o id do trabalho. `gerar_lotes()` é chamado
+    no executor e deve devolver um iterador de DataFrames (lotes_df/lotes_sql).
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação não suportado: {formato}")
+    _limpar_antigos()
+    os.makedirs(DIRETORIO, exist_ok=True)
+
+    id_ = uuid.uuid4().hex
+    trabalho = {
+        "id": id_,
+        "nome": f"{nome}_{datetime.now():%Y%m%d_%H%M}{FORMATOS[formato]['extensao']}",
+        "formato": formato,
+        "estado": "fila",
+        "caminho": os.path.join(DIRETORIO, id_ + FORMATOS[formato]["extensao"]),
+        "linhas": 0,
+        "bytes": 0,
+        "erro": None,
+        "criado": time.time(),
+        "segundos": None,
+    }
+    with _lock:
+        _trabalhos[id_] = trabalho
+    _executor_exportacao().submit(_rodar, trabalho, gerar_lotes)
+    telemetria.incrementar(f"exportacao.pedidos.{formato}")
+    return id_
+
+
+def situacao(id_):
+    with _lock:
+        trabalho = _trabalhos.get(id_)
+        return dict(trabalho) if trabalho else None
+
+
+def metricas():
+    with _lock:
+        return [
+            {
+                "arquivo": t["nome"],
+                "estado": t["estado"],
+                "linhas": t["linhas"],
+                "mb": round(t["bytes"] / 1024 / 1024, 2),
+                "segundos": round(t["segundos"], 2) if t["segundos"] is not None else None,
+            }
+            for t in _trabalhos.values()
+        ]
+
+
+# =========================
+# Painel (Streamlit)
+# =========================
+
+def _em_andamento(trabalho):
+    return trabalho is not None and trabalho["estado"] in ("fila", "gerando")
+
+
+def _acompanhar(id_):
+    import streamlit as st
+
+    trabalho = situacao(id_)
+    if _em_andamento(trabalho):
+        st.info(f"Gerando {trabalho['nome']}... {trabalho['linhas']:,} linhas escritas")
+    else:
+        # terminou: um rerun completo mostra o download (e para a atualização periódica)
+        st.rerun()
+
+
+def painel_exportacao(chave, nome, origens):
+    """
+    Controles de exportação: conteúdo (rótulo -> função que devolve os lotes),
+    formato e botão. Nada é gerado até o clique.
+    """
+    import streamlit as st
+
+    chave_trabalho = f"{chave}_exportacao"
+    c1, c2, c3 = st.columns([3, 2, 2])
+    with c1:
+        origem = st.selectbox("Conteúdo", list(origens), key=f"{chave}_origem")
+    with c2:
+        formato = st.selectbox("Formato", list(FORMATOS), format_func=lambda f: FORMATOS[f]["rotulo"],
+                               key=f"{chave}_formato")
+    with c3:
+        st.write("")
+        if st.button("📥 Gerar exportação", key=f"{chave}_gerar", use_container_width=True,
+                     disabled=_em_andamento(situacao(st.session_state.get(chave_trabalho, "")))):
+            st.session_state[chave_trabalho] = solicitar(nome, formato, origens[origem])
+
+    trabalho = situacao(st.session_state.get(chave_trabalho, ""))
+    if trabalho is None:
+        return
+    if _em_andamento(trabalho):
+        st.fragment(_acompanhar, run_every=1)(trabalho["id"])
+    elif trabalho["estado"] == "erro":
+        st.error(f"Erro ao gerar a exportação: {trabalho['erro']}")
+    else:
+        # o arquivo só é lido aqui, com a exportação pronta
+        with open(trabalho["caminho"], "rb") as f:
+            st.download_button(
+                label=f"⬇️ Baixar {trabalho['nome']} ({trabalho['bytes'] / 1024 / 1024:.1f} MB, "
+                      f"{trabalho['linhas']:,} linhas)",
+                data=f,
+                file_name=trabalho["nome"],
+                mime=FORMATOS[trabalho["formato"]]["mime"],
+                key=f"{chave}_baixar",
+            )
@@ -0,0 +1,148 @@
+"""
+Governador de consultas BI por servidor Firebird.
+
+Vários clientes (tenants) compartilham o mesmo servidor Firebird. Para que
+um cliente consultando períodos longos não sature o servidor para os
+demais, toda instrução BI passa por uma fila por host com:
+
+- limite de execuções simultâneas por host e por tenant;
+- enfileiramento justo ponderado (WFQ) entre tenants: cada pedido recebe
+  uma marca de término virtual (início + custo / peso) e o próximo a
+  executar é o de menor marca cujo tenant ainda está abaixo do limite;
+- métricas de profundidade de fila, execuções em andamento e tempo de
+  espera (média/p95), publicadas na telemetria.
+
+Limites padrão podem ser ajustados pelas variáveis de ambiente
+AZOUP_LIMITE_HOST, AZOUP_LIMITE_TENANT e AZOUP_ESPERA_MAXIMA (segundos).
+"""
+import itertools
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import telemetria
+
+
+class FilaExcedida(TimeoutError):
+    """A instrução esperou mais que o permitido pela vaga no servidor."""
+
+
+class _FilaHost:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.fila = []
+        self.em_execucao = 0
+        self.por_tenant = defaultdict(int)
+        self.tempo_virtual = 0.0
+        self.ultimo_fim = {}
+        self.atendidas = 0
+        self.esperas = deque(maxlen=500)
+
+
+class Governador:
+    def __init__(self, limite_host=None, limite_tenant=None, espera_maxima=None):
+        self.limite_host = limite_host or int(os.environ.get("AZOUP_LIMITE_HOST", 4))
+        self.limite_tenant = limite_tenant or int(os.environ.get("AZOUP_LIMITE_TENANT", 2))
+        self.espera_maxima = espera_maxima or float(os.environ.get("AZOUP_ESPERA_MAXIMA", 120))
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._sequencia = itertools.count()
+
+    def _host(self, host):
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = _FilaHost()
+            return self._hosts[host]
+
+    # Próximo pedido elegível: menor marca de término entre tenants abaixo do limite
+    def _proximo(self, fila):
+        if fila.em_execucao >= self.limite_host:
+            return None
+        elegiveis = [t for t in fila.fila if fila.por_tenant[t["tenant"]] < self.limite_tenant]
+        if not elegiveis:
+            return None
+        return min(elegiveis, key=lambda t: (t["fim"], t["seq"]))
+
+    @contextmanager
+    def vaga(self, host, tenant, peso=1.0, custo=1.0):
+        """Bloqueia até haver vaga para o tenant no host e a libera ao sair."""
+        fila = self._host(host)
+        chegada = time.monotonic()
+        with fila.cond:
+            inicio = max(fila.tempo_virtual, fila.ultimo_fim.get(tenant, 0.0))
+            ticket = {
+                "tenant": tenant,
+                "inicio": inicio,
+                "fim": inicio + custo / max(peso, 0.01),
+                "seq": next(self._sequencia),
+            }
+            anterior = fila.ultimo_fim.get(tenant)
+            fila.ultimo_fim[tenant] = ticket["fim"]
+            fila.fila.append(ticket)
+
+            while self._proximo(fila) is not ticket:
+                restante = self.espera_maxima - (time.monotonic() - chegada)
+                if restante <= 0:
+                    fila.fila.remove(ticket)
+                    # a vaga não foi usada: o tenant não deve ser cobrado por ela
+                    if fila.ultimo_fim.get(tenant) == ticket["fim"]:
+                        if anterior is None:
+                            del fila.ultimo_fim[tenant]
+                        else:
+                            fila.ultimo_fim[tenant] = anterior
+                    fila.cond.notify_all()
+                    telemetria.incrementar("governador.fila_excedida")
+                    raise FilaExcedida(f"Servidor {host} ocupado: espera acima de {self.espera_maxima:.0f}s")
+                fila.cond.wait(restante)
+
+            fila.fila.remove(ticket)
+            fila.em_execucao += 1
+            fila.por_tenant[tenant] += 1
+            fila.tempo_virtual = ticket["inicio"]
+            espera = time.monotonic() - chegada
+            fila.esperas.append(espera)
+
+        telemetria.registrar_tempo("governador.espera", espera)
+        try:
+            yield espera
+        finally:
+            with fila.cond:
+                fila.em_execucao -= 1
+                fila.por_tenant[tenant] -= 1
+                fila.atendidas += 1
+                fila.cond.notify_all()
+
+    def metricas(self):
+        """Uma linha por host com fila, execuções em andamento e tempos de espera."""
+        linhas = []
+        with self._lock:
+            hosts = list(self._hosts.items())
+        for host, fila in hosts:
+            with fila.cond:
+                esperas = list(fila.esperas)
+                linhas.append({
+                    "host": host,
+                    "fila": len(fila.fila),
+                    "em_execucao": fila.em_execucao,
+                    "tenants_ativos": sum(1 for n in fila.por_tenant.values() if n),
+                    "atendidas": fila.atendidas,
+                    "espera_media_ms": round(sum(esperas) / len(esperas) * 1000, 1) if esperas else 0.0,
+                    "espera_p95_ms": round(telemetria.percentil(esperas, 0.95) * 1000, 1),
+                })
+        return linhas
+
+
+_governador = None
+_governador_lock = threading.Lock()
+
+
+# Instância única por processo (compartilhada por todas as sessões)
+def obter_governador():
+    global _governador
+    with _governador_lock:
+        if _governador is None:
+            _governador = Governador()
+            telemetria.registrar_fonte("Fila de consultas por servidor", _governador.metricas)
+        return _governador
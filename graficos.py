@@ -0,0 +1,477 @@
+"""
+Cache de gráficos: spec Plotly já serializada, por impressão digital dos dados.
+
+A cada rerun as páginas reconstruíam as figuras (px.bar, px.pie,
+make_subplots...) e o st.plotly_chart as validava e serializava para JSON de
+novo, mesmo com o DataFrame idêntico. Aqui a chave de cada gráfico é o nome,
+um hash rápido dos dados de entrada (pd.util.hash_pandas_object, mais nomes
+e tipos das colunas) e os parâmetros do gráfico; o valor guardado é a spec
+JSON pronta. Em um acerto a figura não é montada nem codificada: a spec vai
+direto para o elemento plotly_chart do Streamlit.
+
+O cache é do processo (compartilhado pelas sessões, como ativos.py) e
+limitado às AZOUP_GRAFICOS_MAX specs usadas mais recentemente (padrão 256).
+Acertos, faltas e o tempo economizado vão para a telemetria
+(graficos.acertos, graficos.faltas, graficos.ms_economizados) e a fonte
+"Gráficos" mostra os números por gráfico.
+
+Antes de montar a figura, as funções de figura passam os dados pela etapa
+de redução, para que o tamanho da spec e o tempo de desenho no navegador
+fiquem limitados qualquer que seja o volume:
+
+- reduzir_serie: séries de linha com mais pontos que a largura do gráfico
+  em pixels (AZOUP_LARGURA_GRAFICO, padrão 1400) são reduzidas por LTTB
+  (Largest-Triangle-Three-Buckets, preserva a forma) ou min/max por faixa
+  (preserva picos);
+- top_n: categorias de pizza e barras ficam nas N maiores mais "Outros";
+- classe_scatter: acima de AZOUP_LIMIAR_WEBGL pontos (padrão 1000) as
+  linhas usam go.Scattergl (WebGL) em vez de SVG.
+
+Backend por gráfico: os gráficos que também sabem montar as opções do
+ECharts (argumento `echarts` de mostrar) passam para o streamlit-echarts
+quando os dados têm mais de AZOUP_LIMIAR_ECHARTS linhas (padrão 2000), ou
+sempre/nunca com AZOUP_GRAFICOS_BACKEND=echarts/plotly. No ECharts as séries
+são desenhadas em etapas (progressive) e têm dataZoom; a linha com eixo de
+tempo envia a visão geral reduzida e, quando o usuário aproxima, o trecho
+visível volta do servidor com o detalhe completo (opcoes_linha). As opções
+JSON entram no mesmo cache das specs Plotly.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import telemetria
+
+LIMITE = int(os.environ.get("AZOUP_GRAFICOS_MAX", "256"))
+LARGURA_PX = int(os.environ.get("AZOUP_LARGURA_GRAFICO", "1400"))
+LIMIAR_WEBGL = int(os.environ.get("AZOUP_LIMIAR_WEBGL", "1000"))
+TOP_CATEGORIAS = 10
+LIMIAR_ECHARTS = int(os.environ.get("AZOUP_LIMIAR_ECHARTS", "2000"))
+# auto (pelo tamanho dos dados), plotly ou echarts
+BACKEND = os.environ.get("AZOUP_GRAFICOS_BACKEND", "auto")
+# Pontos por etapa de desenho das séries ECharts
+PROGRESSIVO = 2000
+
+_lock = threading.Lock()
+# (nome, impressão, parâmetros) -> {"spec", "custo_s", "acertos", "bytes"}
+_cache = OrderedDict()
+# nome -> {"acertos", "faltas", "ms_construcao", "ms_economizados"}
+_por_grafico = {}
+_registrado = False
+
+
+def _registrar_fonte():
+    global _registrado
+    if not _registrado:
+        _registrado = True
+        telemetria.registrar_fonte("Gráficos", metricas)
+
+
+def impressao(dados):
+    """Hash do conteúdo: DataFrame, Series ou lista/tupla deles (outros valores via repr)."""
+    import pandas as pd
+
+    h = hashlib.blake2b(digest_size=16)
+    for parte in (dados if isinstance(dados, (list, tuple)) else [dados]):
+        if isinstance(parte, (pd.DataFrame, pd.Series)):
+            colunas = parte.dtypes.items() if isinstance(parte, pd.DataFrame) else [(parte.name, parte.dtype)]
+            h.update(repr([(str(nome), str(tipo)) for nome, tipo in colunas]).encode())
+            h.update(pd.util.hash_pandas_object(parte, index=True).values.tobytes())
+        else:
+            h.update(repr(parte).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+def spec(nome, dados, construir, formato="plotly", **parametros):
+    """
+    Spec JSON da figura construir() para estes dados e parâmetros.
+    `dados` deve conter tudo o que construir() lê (de preferência só as colunas usadas).
+    formato="echarts": construir() devolve o dict de opções do ECharts.
+    """
+    _registrar_fonte()
+    with telemetria.cronometro("graficos.impressao"):
+        chave = (nome, impressao(dados), formato, repr(sorted(parametros.items())))
+
+    with _lock:
+        item = _cache.get(chave)
+        estatisticas = _por_grafico.setdefault(
+            nome, {"acertos": 0, "faltas": 0, "ms_construcao": 0.0, "ms_economizados": 0.0}
+        )
+        if item is not None:
+            _cache.move_to_end(chave)
+            item["acertos"] += 1
+            estatisticas["acertos"] += 1
+            estatisticas["ms_economizados"] += item["custo_s"] * 1000
+    if item is not None:
+        telemetria.incrementar("graficos.acertos")
+        telemetria.incrementar("graficos.ms_economizados", item["custo_s"] * 1000)
+        return item["spec"]
+
+    inicio = time.perf_counter()
+    figura = construir()
+    if formato == "echarts":
+        valor = json.dumps(figura, default=_json_padrao, separators=(",", ":"))
+    else:
+        import plotly.io
+
+        valor = plotly.io.to_json(figura, validate=False)
+    custo = time.perf_counter() - inicio
+    with _lock:
+        _cache[chave] = {"spec": valor, "custo_s": custo, "acertos": 0, "bytes": len(valor)}
+        while len(_cache) > LIMITE:
+            _cache.popitem(last=False)
+        estatisticas["faltas"] += 1
+        estatisticas["ms_construcao"] += custo * 1000
+    telemetria.incrementar("graficos.faltas")
+    telemetria.registrar_tempo("graficos.construcao", custo)
+    return valor
+
+
+# =========================
+# Redução dos dados do gráfico
+# =========================
+
+def _numerico(serie):
+    """Eixo x como float (datas em ns; categorias pela posição)."""
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.astype("int64").to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy(dtype=float)
+    return np.arange(len(serie), dtype=float)
+
+
+def lttb(x, y, alvo):
+    """Índices dos `alvo` pontos escolhidos por Largest-Triangle-Three-Buckets."""
+    import numpy as np
+
+    n = len(y)
+    if alvo >= n or alvo < 3:
+        return np.arange(n)
+    indices = np.empty(alvo, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    tamanho = (n - 2) / (alvo - 2)
+    a = 0
+    for i in range(alvo - 2):
+        inicio, fim = int(i * tamanho) + 1, int((i + 1) * tamanho) + 1
+        # média da faixa seguinte (a última faixa é o último ponto)
+        seguinte = slice(fim, min(int((i + 2) * tamanho) + 1, n))
+        mx, my = x[seguinte].mean(), y[seguinte].mean()
+        areas = np.abs((x[a] - mx) * (y[inicio:fim] - y[a]) - (x[a] - x[inicio:fim]) * (my - y[a]))
+        a = inicio + int(areas.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def minmax(y, alvo):
+    """Índices do mínimo e do máximo de cada faixa (até `alvo` pontos), em ordem."""
+    import numpy as np
+
+    n = len(y)
+    if alvo >= n or alvo < 4:
+        return np.arange(n)
+    indices = {0, n - 1}
+    for faixa in np.array_split(np.arange(n), (alvo - 2) // 2):
+        if len(faixa):
+            indices.add(int(faixa[y[faixa].argmin()]))
+            indices.add(int(faixa[y[faixa].argmax()]))
+    return np.array(sorted(indices))
+
+
+def reduzir_serie(df, x, y, largura=None, metodo="lttb", por=None):
+    """
+    df ordenado por x com no máximo ~1 ponto por pixel de largura (por série
+    quando `por` é a coluna que separa as séries). Menores que isso voltam iguais.
+    """
+    largura = largura or LARGURA_PX
+    if por is not None:
+        import pandas as pd
+
+        grupos = [reduzir_serie(grupo, x, y, largura, metodo) for _, grupo in df.groupby(por, sort=False)]
+        return pd.concat(grupos) if grupos else df
+    if len(df) <= largura:
+        return df
+
+    df = df.sort_values(x)
+    valores = df[y].to_numpy(dtype=float)
+    if metodo == "minmax":
+        indices = minmax(valores, largura)
+    else:
+        indices = lttb(_numerico(df[x]), valores, largura)
+    telemetria.incrementar("graficos.pontos_descartados", len(df) - len(indices))
+    return df.iloc[indices]
+
+
+def top_n(df, categoria, valor, n=TOP_CATEGORIAS, outros="Outros", por=None):
+    """
+    Soma de `valor` por categoria (e pelas colunas `por`), com as n maiores
+    categorias no total e o resto somado em `outros`.
+    """
+    import pandas as pd
+
+    chaves = [categoria] + list(por or [])
+    df = df.groupby(chaves, as_index=False, sort=False)[valor].sum()
+    totais = df.groupby(categoria)[valor].sum()
+    if len(totais) <= n:
+        return df.sort_values(valor, ascending=False)
+
+    maiores = set(totais.nlargest(n).index)
+    df = df.copy()
+    df[categoria] = df[categoria].where(df[categoria].isin(maiores), outros)
+    telemetria.incrementar("graficos.categorias_agrupadas", len(totais) - n)
+    df = df.groupby(chaves, as_index=False, sort=False)[valor].sum()
+    # "Outros" por último
+    df = df.sort_values(valor, ascending=False)
+    return pd.concat([df[df[categoria] != outros], df[df[categoria] == outros]])
+
+
+def classe_scatter(pontos):
+    """go.Scattergl (WebGL) acima de LIMIAR_WEBGL pontos, go.Scatter abaixo."""
+    import plotly.graph_objects as go
+
+    if pontos > LIMIAR_WEBGL:
+        telemetria.incrementar("graficos.webgl")
+        return go.Scattergl
+    return go.Scatter
+
+
+def _enviar(spec_json, use_container_width):
+    """Envia a spec pronta como elemento plotly_chart (o mesmo que st.plotly_chart monta)."""
+    import streamlit as st
+    from streamlit.elements.form import current_form_id
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    from streamlit.runtime.state.common import compute_widget_id
+
+    proto = PlotlyChartProto()
+    proto.use_container_width = use_container_width
+    proto.theme = "streamlit"
+    proto.form_id = current_form_id(st._main)
+    proto.spec = spec_json
+    proto.config = json.dumps({"showLink": False, "linkText": False})
+
+    ctx = get_script_run_ctx()
+    proto.id = compute_widget_id(
+        "plotly_chart",
+        user_key=None,
+        key=None,
+        plotly_spec=proto.spec,
+        plotly_config=proto.config,
+        selection_mode=("points", "box", "lasso"),
+        is_selection_activated=False,
+        theme=proto.theme,
+        form_id=proto.form_id,
+        use_container_width=use_container_width,
+        page=ctx.active_script_hash if ctx else None,
+    )
+    st._main._enqueue("plotly_chart", proto)
+
+
+def mostrar(nome, dados, construir, use_container_width=True, echarts=None, **parametros):
+    """
+    st.plotly_chart da figura, montada e serializada só quando dados/parâmetros mudam.
+    echarts(janela): opções ECharts equivalentes, usadas quando escolher_backend() indica.
+    """
+    if echarts is not None and escolher_backend(_linhas(dados)) == "echarts":
+        mostrar_echarts(nome, dados, echarts, **parametros)
+        return
+    valor = spec(nome, dados, construir, **parametros)
+    try:
+        _enviar(valor, use_container_width)
+    except Exception:
+        # _enviar usa internos do Streamlit 1.37 (proto, compute_widget_id, _enqueue):
+        # em outra versão qualquer falha cai no caminho público, que valida e serializa de novo
+        telemetria.incrementar("graficos.envio_publico")
+        import streamlit as st
+
+        st.plotly_chart(json.loads(valor), use_container_width=use_container_width)
+
+
+# =========================
+# ECharts
+# =========================
+
+# Janela do dataZoom (início e fim em % do eixo, inteiros para não gerar um
+# rerun a cada pixel arrastado)
+_JS_ZOOM = """function(p) {
+    var z = p.batch ? p.batch[0] : p;
+    return [Math.round(z.start), Math.round(z.end)];
+}"""
+
+
+def _echarts_disponivel():
+    import importlib.util
+
+    return importlib.util.find_spec("streamlit_echarts") is not None
+
+
+def _linhas(dados):
+    return sum(len(parte) for parte in (dados if isinstance(dados, (list, tuple)) else [dados])
+               if hasattr(parte, "__len__"))
+
+
+def escolher_backend(linhas):
+    """"echarts" acima de LIMIAR_ECHARTS linhas (ou conforme AZOUP_GRAFICOS_BACKEND), senão "plotly"."""
+    escolhido = BACKEND if BACKEND != "auto" else ("echarts" if linhas > LIMIAR_ECHARTS else "plotly")
+    if escolhido == "echarts" and not _echarts_disponivel():
+        return "plotly"
+    return escolhido
+
+
+def _json_padrao(valor):
+    """numpy, Decimal e datas nas opções do ECharts."""
+    if hasattr(valor, "item"):
+        return valor.item()
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    return float(valor)
+
+
+def mostrar_echarts(nome, dados, construir, altura="400px", **parametros):
+    """st_echarts das opções construir(janela); a janela é a última do dataZoom deste gráfico."""
+    import streamlit as st
+    from streamlit_echarts import st_echarts
+
+    chave = f"echarts_{nome}"
+    # valor do componente já disponível neste rerun (o evento de zoom que o disparou)
+    janela = st.session_state.get(chave)
+    janela = tuple(janela) if janela else None
+    valor = spec(nome, dados, lambda: construir(janela), formato="echarts", janela=janela, **parametros)
+    telemetria.incrementar("graficos.echarts")
+    st_echarts(json.loads(valor), height=altura, events={"datazoom": _JS_ZOOM}, key=chave)
+
+
+def _zoom(janela, eixo=0):
+    inicio, fim = janela or (0, 100)
+    return [
+        {"type": "inside", "xAxisIndex": eixo, "start": inicio, "end": fim},
+        {"type": "slider", "xAxisIndex": eixo, "start": inicio, "end": fim},
+    ]
+
+
+def _serie_progressiva(tipo, nome, dados, **extra):
+    return dict({
+        "type": tipo,
+        "name": nome,
+        "data": dados,
+        "progressive": PROGRESSIVO,
+        "progressiveThreshold": PROGRESSIVO,
+    }, **extra)
+
+
+def opcoes_linha(df, x, y, janela=None, por=None, nome_serie=None, cor=None):
+    """
+    Opções ECharts de uma linha (uma série por valor de `por`).
+
+    Eixo de tempo: vai a visão geral reduzida (reduzir_serie) e, com `janela`
+    (início e fim do dataZoom em % do eixo), os pontos dentro dela são
+    reduzidos de novo só sobre o trecho visível, isto é, em resolução
+    completa até ~1 ponto por pixel. Eixo de categorias: vão todas e o
+    ECharts amostra na hora de desenhar (sampling lttb).
+    """
+    import pandas as pd
+
+    tempo = pd.api.types.is_datetime64_any_dtype(df[x])
+    grupos = df.groupby(por, sort=False) if por else [(nome_serie or y, df)]
+    series = []
+    for rotulo, grupo in grupos:
+        grupo = grupo.sort_values(x)
+        if tempo:
+            pontos = reduzir_serie(grupo, x, y)
+            if janela:
+                menor, maior = grupo[x].min(), grupo[x].max()
+                de, ate = (menor + (maior - menor) * (p / 100) for p in janela)
+                visivel = grupo[(grupo[x] >= de) & (grupo[x] <= ate)]
+                fora = pontos[(pontos[x] < de) | (pontos[x] > ate)]
+                pontos = pd.concat([fora, reduzir_serie(visivel, x, y)]).sort_values(x)
+                telemetria.incrementar("graficos.zoom_detalhe")
+            dados = list(zip((pontos[x].astype("int64") // 10 ** 6).tolist(), pontos[y].astype(float).tolist()))
+        else:
+            dados = grupo[y].astype(float).tolist()
+        extra = {"lineStyle": {"color": cor}, "itemStyle": {"color": cor}} if cor and not por else {}
+        series.append(_serie_progressiva("line", str(rotulo), dados, sampling="lttb",
+                                         showSymbol=len(dados) <= 100, **extra))
+
+    eixo_x = {"type": "time"} if tempo else {"type": "category", "data": df[x].drop_duplicates().tolist()}
+    return {
+        "tooltip": {"trigger": "axis"},
+        "legend": {"type": "scroll"} if por else {"show": False},
+        "xAxis": eixo_x,
+        "yAxis": {"type": "value"},
+        "dataZoom": _zoom(janela),
+        "series": series,
+    }
+
+
+def opcoes_barras(df, x, y, cor=None, horizontal=False):
+    """Opções ECharts de barras (agrupadas por `cor`), com as TOP_CATEGORIAS maiores de `cor` ou de `x`."""
+    import pandas as pd
+
+    if cor:
+        df = top_n(df, cor, y, por=[x])
+    else:
+        df = top_n(df, x, y)
+    if pd.api.types.is_datetime64_any_dtype(df[x]):
+        df = df.assign(**{x: df[x].dt.strftime("%Y-%m")})
+    categorias = sorted(df[x].unique().tolist()) if cor else df[x].tolist()
+    if cor:
+        tabela = df.pivot_table(index=x, columns=cor, values=y, aggfunc="sum").reindex(categorias)
+        series = [_serie_progressiva("bar", str(nome), tabela[nome].fillna(0).astype(float).tolist(), large=True)
+                  for nome in tabela.columns]
+    else:
+        series = [_serie_progressiva("bar", y, df[y].astype(float).tolist(), large=True)]
+
+    eixo_categorias = {"type": "category", "data": [str(c) for c in categorias]}
+    eixo_valores = {"type": "value"}
+    return {
+        "tooltip": {"trigger": "axis"},
+        "legend": {"type": "scroll"} if cor else {"show": False},
+        "xAxis": eixo_valores if horizontal else eixo_categorias,
+        "yAxis": dict(eixo_categorias, inverse=True) if horizontal else eixo_valores,
+        "dataZoom": [] if horizontal else _zoom(None),
+        "series": series,
+    }
+
+
+def opcoes_pizza(df, categoria, valor):
+    """Opções ECharts de pizza com as TOP_CATEGORIAS maiores categorias mais "Outros"."""
+    df = top_n(df, categoria, valor)
+    return {
+        "tooltip": {"trigger": "item", "formatter": "{b}: {c} ({d}%)"},
+        "legend": {"type": "scroll", "orient": "vertical", "left": "left"},
+        "series": [{
+            "type": "pie",
+            "radius": ["35%", "70%"],
+            "data": [{"name": str(n), "value": float(v)} for n, v in zip(df[categoria], df[valor])],
+        }],
+    }
+
+
+def limpar():
+    with _lock:
+        _cache.clear()
+
+
+def metricas():
+    with _lock:
+        return [
+            {
+                "grafico": nome,
+                "acertos": e["acertos"],
+                "faltas": e["faltas"],
+                "taxa_acerto": round(e["acertos"] / (e["acertos"] + e["faltas"]), 3)
+                if e["acertos"] + e["faltas"] else 0.0,
+                "ms_construcao": round(e["ms_construcao"], 1),
+                "ms_economizados": round(e["ms_economizados"], 1),
+                "specs_em_cache": sum(1 for chave in _cache if chave[0] == nome),
+                "kb_maior_spec": round(max((item["bytes"] for chave, item in _cache.items() if chave[0] == nome),
+                                           default=0) / 1024, 1),
+            }
+            for nome, e in sorted(_por_grafico.items())
+        ]
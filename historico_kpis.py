@@ -0,0 +1,208 @@
+"""
+Histórico diário de KPIs por tenant, para comparações entre períodos.
+
+Comparar os cards do Dashboard com o mês ou o ano anterior exigiria refazer
+as consultas a VW_KPI_BI para o outro período. Aqui cada dia fechado (até
+ontem) fica gravado no armazém local (tabela kpi_diarios), com um valor por
+tenant, dia e tipo:
+
+- os TIPOs de VW_KPI_BI (total_vendas, total_custo, indice_recompra,
+  pecas_atendimento, ticket_medio) e o total_venda de Vendas. As métricas
+  são somas diárias, então o valor de qualquer período é a soma dos dias
+  gravados;
+- novos_clientes e clientes_ativos, que não têm data no banco, são
+  registrados como observados no dia (registrar_observacao).
+
+atualizar() busca no banco só os dias fechados que faltam no armazém, em
+uma única instrução por fonte (agrupada por dia). Depois disso, as
+comparações (comparar) e as séries dos sparklines (serie) leem o armazém.
+O lote noturno (lote_kpis.py) mantém o histórico em dia para todos os
+clientes.
+"""
+import time
+from datetime import date, timedelta
+
+import armazem
+import telemetria
+
+# Métricas somáveis por dia (fonte com data)
+TIPOS_DIARIOS = ["total_vendas", "total_custo", "indice_recompra", "pecas_atendimento", "ticket_medio",
+                 "total_venda"]
+# Métricas sem data no banco: valor observado no dia
+TIPOS_OBSERVADOS = ["novos_clientes", "clientes_ativos"]
+JANELA_SERIE = 30
+# Dias fechados buscados de uma vez no máximo (13 meses + folga para o ano anterior)
+MAX_DIAS_CARGA = 800
+
+COMPARACOES = {
+    "anterior": "período anterior",
+    "ano": "mesmo período do ano anterior",
+}
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS kpi_diarios (
+    tenant TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    valor REAL NOT NULL,
+    PRIMARY KEY (tenant, tipo, dia)
+);
+"""
+
+
+def _garantir():
+    armazem.garantir("kpi_diarios", _DDL)
+
+
+def _dias(inicio, fim):
+    return [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+
+
+def _data(valor):
+    return date.fromisoformat(str(valor)[:10])
+
+
+def dias_gravados(tenant, inicio, fim):
+    """Dias com os tipos diários gravados entre inicio e fim."""
+    _garantir()
+    df = armazem.consultar(
+        "SELECT dia FROM kpi_diarios WHERE tenant = ? AND tipo = ? AND dia BETWEEN ? AND ?",
+        (tenant, TIPOS_DIARIOS[0], inicio.isoformat(), fim.isoformat()),
+    )
+    return {_data(d) for d in df["dia"]}
+
+
+def atualizar(conn_data, inicio, fim, consultar=None):
+    """Grava os dias fechados de [inicio, fim] que faltam; devolve quantos dias foram lidos do banco."""
+    from database import chave_tenant
+    from metricas import METRICAS, executar, pedido
+
+    tenant = chave_tenant(conn_data)
+    fim = min(fim, date.today() - timedelta(days=1))
+    inicio = max(inicio, fim - timedelta(days=MAX_DIAS_CARGA - 1))
+    if inicio > fim:
+        return 0
+    faltando = sorted(set(_dias(inicio, fim)) - dias_gravados(tenant, inicio, fim))
+    if not faltando:
+        return 0
+
+    comeco = time.perf_counter()
+    periodo = (faltando[0], faltando[-1])
+    por_fonte = {}
+    for tipo in TIPOS_DIARIOS:
+        por_fonte.setdefault(METRICAS[tipo]["fonte"], []).append(tipo)
+    pedidos = [pedido(tipos, dimensoes=["data"], periodo=periodo) for tipos in por_fonte.values()]
+    resultados = executar(conn_data, pedidos, consultar=consultar)
+
+    # dias sem movimento ficam gravados com zero (o dia está fechado)
+    valores = {(dia, tipo): 0.0 for dia in faltando for tipo in TIPOS_DIARIOS}
+    for tipos, df in zip(por_fonte.values(), resultados):
+        for linha in df.to_dict("records"):
+            dia = _data(linha["DATA"])
+            for tipo in tipos:
+                if (dia, tipo) in valores:
+                    valores[(dia, tipo)] += float(linha[METRICAS[tipo]["coluna"]] or 0)
+
+    armazem.inserir("kpi_diarios", [
+        {"tenant": tenant, "dia": dia.isoformat(), "tipo": tipo, "valor": valor}
+        for (dia, tipo), valor in valores.items()
+    ], substituir=True)
+    telemetria.registrar_tempo("historico.atualizacao", time.perf_counter() - comeco)
+    telemetria.incrementar("historico.dias_lidos", len(faltando))
+    return len(faltando)
+
+
+def registrar_observacao(conn_data, valores, dia=None):
+    """Grava o valor do dia das métricas sem data (novos_clientes, clientes_ativos)."""
+    from database import chave_tenant
+
+    _garantir()
+    dia = (dia or date.today()).isoformat()
+    armazem.inserir("kpi_diarios", [
+        {"tenant": chave_tenant(conn_data), "dia": dia, "tipo": tipo, "valor": float(valores[tipo])}
+        for tipo in TIPOS_OBSERVADOS if tipo in valores
+    ], substituir=True)
+
+
+def _valores(tenant, tipo, inicio, fim):
+    _garantir()
+    df = armazem.consultar(
+        "SELECT dia, valor FROM kpi_diarios WHERE tenant = ? AND tipo = ? AND dia BETWEEN ? AND ? ORDER BY dia",
+        (tenant, tipo, inicio.isoformat(), fim.isoformat()),
+    )
+    return dict(zip((_data(d) for d in df["dia"]), df["valor"]))
+
+
+def serie(conn_data, tipo, fim=None, dias=JANELA_SERIE):
+    """Valores diários gravados dos `dias` fechados até `fim` (lista em ordem cronológica)."""
+    from database import chave_tenant
+
+    fim = min(fim or date.today(), date.today() - timedelta(days=1))
+    return list(_valores(chave_tenant(conn_data), tipo, fim - timedelta(days=dias - 1), fim).values())
+
+
+def periodo_comparacao(inicio, fim, modo="anterior"):
+    """Período de comparação: os mesmos dias imediatamente antes, ou um ano antes."""
+    if modo == "ano":
+        import pandas as pd
+
+        return ((pd.Timestamp(inicio) - pd.DateOffset(years=1)).date(),
+                (pd.Timestamp(fim) - pd.DateOffset(years=1)).date())
+    dias = (fim - inicio).days + 1
+    return inicio - timedelta(days=dias), inicio - timedelta(days=1)
+
+
+def totais(conn_data, inicio, fim, tipos=None):
+    """
+    Valor de cada tipo no período lido do armazém, ou None quando falta algum
+    dia (diários) ou a observação do último dia (observados, até 3 dias antes).
+    """
+    from database import chave_tenant
+
+    tenant = chave_tenant(conn_data)
+    resultado = {}
+    for tipo in tipos or TIPOS_DIARIOS + TIPOS_OBSERVADOS:
+        if tipo in TIPOS_OBSERVADOS:
+            observados = _valores(tenant, tipo, fim - timedelta(days=3), fim)
+            resultado[tipo] = list(observados.values())[-1] if observados else None
+        else:
+            valores = _valores(tenant, tipo, inicio, fim)
+            resultado[tipo] = sum(valores.values()) if len(valores) == (fim - inicio).days + 1 else None
+    return resultado
+
+
+def comparar(conn_data, inicio, fim, modo="anterior", consultar=None):
+    """
+    Valores do período de comparação para os cards (com lucro_bruto e
+    margem_lucro derivados), completando antes os dias que faltam no armazém.
+    """
+    inicio_ant, fim_ant = periodo_comparacao(inicio, fim, modo)
+    atualizar(conn_data, inicio_ant, fim_ant, consultar=consultar)
+    anteriores = totais(conn_data, inicio_ant, fim_ant)
+    vendas, custo = anteriores.get("total_vendas"), anteriores.get("total_custo")
+    if vendas is not None and custo is not None:
+        anteriores["lucro_bruto"] = vendas - custo
+        anteriores["margem_lucro"] = (vendas - custo) / vendas * 100 if vendas > 0 else 0
+    telemetria.incrementar("historico.comparacoes")
+    return anteriores
+
+
+def variacao(atual, anterior):
+    """Variação percentual (None sem base de comparação)."""
+    if anterior is None or not anterior:
+        return None
+    return (float(atual) - anterior) / abs(anterior) * 100
+
+
+def sparkline_svg(valores, largura=120, altura=28, cor="#F79633"):
+    """SVG inline de uma série curta (sem Plotly: vai dentro do HTML do card)."""
+    if len(valores) < 2:
+        return ""
+    minimo, maximo = min(valores), max(valores)
+    escala = (maximo - minimo) or 1
+    pontos = " ".join(
+        f"{i * largura / (len(valores) - 1):.1f},{altura - (v - minimo) / escala * (altura - 2) - 1:.1f}"
+        for i, v in enumerate(valores)
+    )
+    return (f'<svg class="kpi-spark" width="{largura}" height="{altura}" viewBox="0 0 {largura} {altura}">'
+            f'<polyline fill="none" stroke="{cor}" stroke-width="1.5" points="{pontos}"/></svg>')
@@ -0,0 +1,279 @@
+"""
+Importação em massa de clientes (CSV ou XLSX) para a tabela clientes.
+
+Cadastrar um lote de clientes exigia abrir o modal "✏️ Editar Cliente" uma
+vez por cliente, com um update(...).eq("id", ...) por gravação. Aqui a
+planilha inteira é validada de uma vez com operações de coluna do pandas
+(porta, host, caminho, datas, ativo, estado, api duplicado) e comparada com
+o diretório de clientes (diretorio.py). O resultado é um plano por linha:
+novo, alterar, sem mudanças ou erro, com os campos que mudam. O plano pode
+ser conferido antes (simulação) e só as linhas válidas são gravadas, em
+lotes de TAMANHO_LOTE: inserts para os novos e upserts (pelo id) para as
+alterações. Um lote recusado é refeito linha a linha, para que o relatório
+aponte exatamente quais linhas falharam.
+
+A planilha usa os nomes de campo da tabela (ver CAMPOS). As linhas são
+casadas pelo id, quando a coluna existe e está preenchida, ou pelo api.
+Células vazias mantêm o valor atual.
+"""
+import io
+import os
+import time
+from decimal import Decimal
+
+import telemetria
+
+CAMPOS = [
+    "nome", "nome_fantasia", "cnpj", "cidade", "estado", "celular", "mensalidade", "api",
+    "codcliente_azoup", "data_inicio", "data_licenca", "data_cancelamento", "caminho",
+    "usuario", "senha", "email", "host", "porta", "ativo",
+]
+DATAS = ["data_inicio", "data_licenca", "data_cancelamento"]
+# aceitos na planilha, nesta ordem
+FORMATOS_DATA = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y"]
+# Comparados como número no plano (a planilha traz texto: "150" x 150.0 do banco)
+NUMEROS = ["mensalidade", "porta"]
+OBRIGATORIOS_NOVO = ["nome", "api", "caminho", "data_licenca"]
+# Não aparecem no relatório de alterações
+SENSIVEIS = {"senha"}
+TAMANHO_LOTE = int(os.environ.get("AZOUP_LOTE_IMPORTACAO", "500"))
+
+_HOST = r"^[A-Za-z0-9](?:[A-Za-z0-9.-]*[A-Za-z0-9])?$"
+# caminho absoluto (Windows ou Unix) terminado em .fdb/.gdb, ou alias do servidor
+_CAMINHO = r"(?i)^(?:(?:[a-z]:[\\/]|[\\/]).*\.(?:fdb|gdb)|[\w.-]+)$"
+
+
+# =========================
+# Leitura e validação
+# =========================
+
+def ler_planilha(nome_arquivo, conteudo):
+    """DataFrame de texto (células vazias como ""), indexado pela linha da planilha."""
+    import pandas as pd
+
+    if nome_arquivo.lower().endswith(".xlsx"):
+        df = pd.read_excel(io.BytesIO(conteudo), dtype=str)
+    else:
+        # separador detectado (; ou ,); BOM do Excel removido
+        df = pd.read_csv(io.BytesIO(conteudo), sep=None, engine="python", dtype=str, encoding="utf-8-sig")
+
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    desconhecidas = [c for c in df.columns if c not in CAMPOS and c != "id"]
+    if desconhecidas:
+        raise ValueError(f"Colunas desconhecidas: {', '.join(desconhecidas)}")
+    if "api" not in df.columns and "id" not in df.columns:
+        raise ValueError("A planilha precisa da coluna api (ou id).")
+
+    df = df.fillna("").apply(lambda coluna: coluna.str.strip())
+    # linha 1 é o cabeçalho
+    df.index = df.index + 2
+    return df
+
+
+def _coluna(df, campo):
+    import pandas as pd
+
+    return df[campo] if campo in df.columns else pd.Series("", index=df.index)
+
+
+def normalizar(df):
+    """Datas em AAAA-MM-DD, ativo/estado em maiúsculas, porta sem casas decimais."""
+    import pandas as pd
+
+    df = df.copy()
+    for campo in DATAS:
+        if campo in df.columns:
+            # só AAAA-MM-DD (com a hora que o Excel acrescenta) ou DD/MM/AAAA: o
+            # formato "mixed" trocava dia e mês de datas inválidas (2026-13-01
+            # virava 13/01); o resto fica como veio e validar() o aponta
+            datas = pd.Series(pd.NaT, index=df.index)
+            for formato in FORMATOS_DATA:
+                datas = datas.fillna(pd.to_datetime(df[campo], errors="coerce", format=formato))
+            df[campo] = datas.dt.strftime("%Y-%m-%d").where(datas.notna(), df[campo])
+    if "ativo" in df.columns:
+        df["ativo"] = df["ativo"].str.upper().replace({"SIM": "S", "NAO": "N", "NÃO": "N"})
+    if "estado" in df.columns:
+        df["estado"] = df["estado"].str.upper()
+    if "porta" in df.columns:
+        # o Excel entrega 3050 como "3050.0"
+        df["porta"] = df["porta"].str.replace(r"\.0+$", "", regex=True)
+    return df
+
+
+def validar(df):
+    """Série com os erros de cada linha (texto vazio = linha válida)."""
+    import pandas as pd
+
+    with telemetria.cronometro("importacao.validacao"):
+        preenchido = {campo: df[campo].ne("") for campo in df.columns}
+        regras = {}
+        if "porta" in df.columns:
+            porta = pd.to_numeric(df["porta"], errors="coerce")
+            regras["porta inválida"] = preenchido["porta"] & ~(porta.between(1, 65535) & (porta % 1 == 0))
+        if "host" in df.columns:
+            regras["host inválido"] = preenchido["host"] & ~df["host"].str.match(_HOST)
+        if "caminho" in df.columns:
+            regras["caminho inválido (.fdb/.gdb ou alias)"] = preenchido["caminho"] & ~df["caminho"].str.match(_CAMINHO)
+        for campo in DATAS:
+            if campo in df.columns:
+                # data de calendário válida, não só o formato (2026-13-01 é recusada)
+                valida = pd.to_datetime(df[campo], errors="coerce", format="%Y-%m-%d").notna()
+                regras[f"{campo} inválida"] = preenchido[campo] & ~valida
+        if "ativo" in df.columns:
+            regras["ativo deve ser S ou N"] = preenchido["ativo"] & ~df["ativo"].isin(["S", "N"])
+        if "estado" in df.columns:
+            regras["estado deve ter 2 letras"] = preenchido["estado"] & ~df["estado"].str.match(r"^[A-Z]{2}$")
+        if "api" in df.columns:
+            regras["api repetido na planilha"] = preenchido["api"] & df["api"].duplicated(keep=False)
+        if "id" in df.columns:
+            regras["id repetido na planilha"] = preenchido["id"] & df["id"].duplicated(keep=False)
+        regras["sem id nem api"] = ~_coluna(df, "id").ne("") & ~_coluna(df, "api").ne("")
+
+        erros = pd.Series("", index=df.index)
+        for mensagem, invalidas in regras.items():
+            erros = erros.where(~invalidas, erros + "; " + mensagem)
+        return erros.str.lstrip("; ")
+
+
+# =========================
+# Plano (simulação)
+# =========================
+
+def _texto(valor):
+    return "" if valor is None else str(valor)
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _mudou(campo, atual, novo):
+    """O valor da planilha (texto normalizado) difere do atual, comparado pelo tipo do campo."""
+    if atual is None or atual == "":
+        return novo != ""
+    if campo in DATAS:
+        # o banco pode devolver data com hora (AAAA-MM-DDTHH:MM:SS)
+        return str(atual)[:10] != novo
+    if isinstance(atual, bool):
+        return ("S" if atual else "N") != novo.upper()
+    if campo in NUMEROS or isinstance(atual, (int, float, Decimal)):
+        antes, depois = _numero(atual), _numero(novo)
+        if antes is not None and depois is not None:
+            return antes != depois
+    return _texto(atual) != novo
+
+
+def planejar(df, clientes):
+    """
+    Compara a planilha (já normalizada) com os clientes atuais. Devolve
+    (relatorio, registros): o relatório tem uma linha por linha da planilha
+    (linha, id, api, nome, acao, erros, alteracoes); registros leva a linha
+    ao dicionário a gravar.
+    """
+    import pandas as pd
+
+    erros = validar(df)
+    por_id = {_texto(c.get("id")): c for c in clientes}
+    por_api = {c.get("api"): c for c in clientes if c.get("api")}
+    campos = [c for c in CAMPOS if c in df.columns]
+
+    linhas, registros = [], {}
+    for linha, valores in df.iterrows():
+        id_ = valores.get("id", "")
+        atual = por_id.get(id_) if id_ else por_api.get(valores.get("api", ""))
+        preenchidos = {c: valores[c] for c in campos if valores[c] != ""}
+        problemas = [erros[linha]] if erros[linha] else []
+        if id_ and atual is None:
+            problemas.append("id não encontrado")
+        if atual is None and not id_:
+            faltando = [c for c in OBRIGATORIOS_NOVO if c not in preenchidos]
+            if faltando:
+                problemas.append(f"obrigatório para novo cliente: {', '.join(faltando)}")
+        # api de outro cliente
+        dono_api = por_api.get(preenchidos.get("api"))
+        if dono_api is not None and atual is not None and dono_api is not atual:
+            problemas.append("api já pertence a outro cliente")
+
+        alterados = {}
+        if atual is None:
+            acao = "novo"
+            alterados = preenchidos
+        else:
+            alterados = {c: v for c, v in preenchidos.items() if _mudou(c, atual.get(c), v)}
+            acao = "alterar" if alterados else "sem mudanças"
+        if problemas:
+            acao = "erro"
+        elif alterados:
+            registros[linha] = dict(alterados, id=atual["id"]) if atual is not None else alterados
+
+        linhas.append({
+            "linha": linha,
+            "id": atual.get("id") if atual is not None else None,
+            "api": preenchidos.get("api") or (atual or {}).get("api", ""),
+            "nome": preenchidos.get("nome") or (atual or {}).get("nome", ""),
+            "acao": acao,
+            "erros": "; ".join(problemas),
+            "alteracoes": ", ".join(
+                c if c in SENSIVEIS or atual is None else f"{c}: {_texto(atual.get(c))} → {v}"
+                for c, v in alterados.items()
+            ),
+        })
+    return pd.DataFrame(linhas), registros
+
+
+# =========================
+# Gravação em lotes
+# =========================
+
+def _lotes(registros, tamanho):
+    """
+    Lotes de (linha, registro) com as mesmas chaves: o PostgREST exige que
+    todos os objetos de um insert/upsert em lote tenham os mesmos campos.
+    """
+    grupos = {}
+    for linha, registro in registros.items():
+        grupos.setdefault(tuple(sorted(registro)), []).append((linha, registro))
+    for itens in grupos.values():
+        for inicio in range(0, len(itens), tamanho):
+            yield itens[inicio:inicio + tamanho]
+
+
+def _gravar(supabase, novos, lote):
+    tabela = supabase.table("clientes")
+    registros = [registro for _, registro in lote]
+    consulta = tabela.insert(registros) if novos else tabela.upsert(registros)
+    consulta.execute()
+    telemetria.incrementar("importacao.requisicoes")
+
+
+def aplicar(supabase, relatorio, registros, tamanho=TAMANHO_LOTE):
+    """Grava as linhas válidas do plano e devolve o relatório com a coluna resultado."""
+    resultado = {}
+    acao = relatorio.set_index("linha")["acao"]
+    for novos in (True, False):
+        pendentes = {linha: r for linha, r in registros.items() if (acao[linha] == "novo") == novos}
+        for lote in _lotes(pendentes, tamanho):
+            inicio = time.perf_counter()
+            try:
+                _gravar(supabase, novos, lote)
+                resultado.update((linha, "gravado") for linha, _ in lote)
+            except Exception:
+                # lote recusado: linha a linha para achar as que falham
+                telemetria.incrementar("importacao.lotes_recusados")
+                for item in lote:
+                    try:
+                        _gravar(supabase, novos, [item])
+                        resultado[item[0]] = "gravado"
+                    except Exception as e:
+                        resultado[item[0]] = f"erro: {e}"
+            telemetria.registrar_tempo("importacao.lote", time.perf_counter() - inicio)
+    telemetria.incrementar("importacao.linhas", sum(1 for r in resultado.values() if r == "gravado"))
+
+    relatorio = relatorio.copy()
+    relatorio["resultado"] = relatorio["linha"].map(resultado).fillna(
+        relatorio["acao"].map({"erro": "não gravado", "sem mudanças": "sem mudanças"})
+    )
+    return relatorio
@@ -0,0 +1,127 @@
+"""
+Atualização incremental ("hoje") com marca d'água.
+
+Com a atualização automática ligada, o Dashboard e a página de Vendas são
+recarregados em intervalos. Em vez de reagregar todo o período a cada
+recarga, este módulo guarda, por tenant e por pedido, o resultado em
+granularidade diária e a marca d'água (último dia com dados lido). A cada
+intervalo só são consultados os dias a partir da marca; esses dias são
+substituídos no estado guardado e o resultado é reagregado localmente para
+as dimensões do pedido. Totais, gráficos e tabelas dinâmicas montados a
+partir desses DataFrames acompanham automaticamente.
+
+As views BI não expõem chave primária, por isso a marca é o dia (DATA): o
+dia da marca é relido por inteiro, já que pode ter recebido vendas novas.
+O custo de cada atualização é proporcional às vendas desde a marca.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import pandas as pd
+
+from metricas import DIMENSOES, FONTES, executar as executar_completo, pedido, reagregar
+
+# Estados guardados (tenant, pedido) -> {"df", "marca", "periodo"}; LRU limitado
+_MAX_ESTADOS = 256
+_estados = OrderedDict()
+_locks = {}
+_lock = threading.Lock()
+
+
+def _lock_da_chave(chave):
+    with _lock:
+        return _locks.setdefault(chave, threading.Lock())
+
+
+def _guardar(chave, estado):
+    with _lock:
+        _estados[chave] = estado
+        _estados.move_to_end(chave)
+        while len(_estados) > _MAX_ESTADOS:
+            antiga, _ = _estados.popitem(last=False)
+            _locks.pop(antiga, None)
+
+
+def incremental_possivel(pedido_):
+    """Só pedidos com período que alcança hoje e fonte com dimensão diária."""
+    fonte = FONTES[pedido_["fonte"]]
+    if pedido_["periodo"] is None or not fonte.get("dimensao_data"):
+        return False
+    return pedido_["periodo"][1] >= date.today().isoformat()
+
+
+# Mesmo pedido, com a dimensão diária da fonte incluída
+def _pedido_diario(pedido_, periodo):
+    dim_dia = FONTES[pedido_["fonte"]]["dimensao_data"]
+    dimensoes = pedido_["dimensoes"]
+    if dim_dia not in dimensoes:
+        dimensoes = dimensoes + (dim_dia,)
+    return pedido(pedido_["metricas"], dimensoes, periodo, pedido_["filtros"])
+
+
+def _coluna_dia(pedido_):
+    fonte = pedido_["fonte"]
+    return DIMENSOES[fonte][FONTES[fonte]["dimensao_data"]]["coluna"]
+
+
+def _dias(serie):
+    return pd.to_datetime(serie).dt.date.astype(str)
+
+
+def atualizar(conn_data, pedido_, consultar_delta=None):
+    """Devolve o resultado do pedido, lendo do banco apenas os dias após a marca."""
+    from database import chave_tenant, executar_consulta
+
+    consultar_delta = consultar_delta or executar_consulta
+    chave = (chave_tenant(conn_data), repr(pedido_))
+    coluna_dia = _coluna_dia(pedido_)
+    inicio, fim = pedido_["periodo"]
+
+    with _lock_da_chave(chave):
+        estado = _estados.get(chave)
+        if estado is None:
+            # Primeira carga: período completo (pode vir do cache compartilhado)
+            diario, = executar_completo(conn_data, [_pedido_diario(pedido_, (inicio, fim))])
+            marca = _dias(diario[coluna_dia]).max() if not diario.empty else inicio
+        else:
+            diario, marca = estado["df"], estado["marca"]
+            # Delta: sem cache, pois a mesma instrução muda de resultado ao longo do dia
+            delta, = executar_completo(conn_data, [_pedido_diario(pedido_, (marca, fim))],
+                                       consultar=consultar_delta)
+            diario = pd.concat([diario[_dias(diario[coluna_dia]) < marca], delta], ignore_index=True)
+            if not delta.empty:
+                marca = max(marca, _dias(delta[coluna_dia]).max())
+
+        _guardar(chave, {"df": diario, "marca": marca, "periodo": (inicio, fim)})
+
+    return reagregar(diario, pedido_)
+
+
+def executar(conn_data, pedidos):
+    """
+    Mesmo contrato de metricas.executar: pedidos que alcançam hoje são
+    atualizados incrementalmente; os demais seguem o caminho normal.
+    """
+    pedidos = list(pedidos)
+    resultados = [None] * len(pedidos)
+    normais = [i for i, p in enumerate(pedidos) if not incremental_possivel(p)]
+
+    if normais:
+        for i, df in zip(normais, executar_completo(conn_data, [pedidos[i] for i in normais])):
+            resultados[i] = df
+    for i, p in enumerate(pedidos):
+        if resultados[i] is None:
+            resultados[i] = atualizar(conn_data, p)
+    return resultados
+
+
+def descartar(conn_data=None):
+    """Esquece o estado incremental de um tenant (ou de todos)."""
+    from database import chave_tenant
+
+    with _lock:
+        for chave in list(_estados):
+            if conn_data is None or chave[0] == chave_tenant(conn_data):
+                _estados.pop(chave, None)
+                _locks.pop(chave, None)
@@ -0,0 +1,178 @@
+"""
+Inicialização do processo: perfil de imports e aquecimento em segundo plano.
+
+app.py importa no topo só o necessário para a tela de login (streamlit,
+auth, database); pandas, plotly e as páginas são importados por quem usa,
+o driver Firebird (drivers.py) só ao conectar e o cliente Supabase só ao criá-lo.
+
+No boot de cada processo o custo de cada import feito pelo script é medido
+(tempo inclusivo, como `python -X importtime`) e impresso uma vez, depois que
+a primeira tela foi montada (login ou, na sessão retomada, a página). Em seguida `aquecer()` carrega em uma thread a
+biblioteca cliente do Firebird, o cliente Supabase e as páginas pesadas,
+para que o primeiro acesso depois do login não pague esses imports. O
+relatório do aquecimento é impresso quando a thread termina. Os tempos
+também vão para a telemetria (import.<módulo>, aquecimento.<etapa>).
+
+AZOUP_PERFIL_IMPORTS=0 desliga a medição; AZOUP_AQUECER=0 desliga o aquecimento.
+"""
+import builtins
+import logging
+import os
+import sys
+import threading
+import time
+
+_log = logging.getLogger(__name__)
+_lock = threading.Lock()
+_local = threading.local()
+
+# módulo -> (segundos inclusivos, profundidade em que foi importado)
+_tempos = {}
+_import_original = None
+# o perfil cobre só o boot: depois de parar_perfil, novos runs do script não o religam
+_perfil_iniciado = False
+_boot_impresso = False
+_aquecimento = None
+_inicio_processo = time.perf_counter()
+
+
+# =========================
+# Perfil de imports
+# =========================
+
+def _import_medido(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _import_original(name, globals, locals, fromlist, level)
+    profundidade = getattr(_local, "profundidade", 0)
+    _local.profundidade = profundidade + 1
+    inicio = time.perf_counter()
+    try:
+        return _import_original(name, globals, locals, fromlist, level)
+    finally:
+        _local.profundidade = profundidade
+        _tempos.setdefault(name, (time.perf_counter() - inicio, profundidade))
+
+
+def iniciar_perfil():
+    """Passa a medir os imports (uma vez por processo)."""
+    global _import_original, _perfil_iniciado
+    if os.environ.get("AZOUP_PERFIL_IMPORTS") == "0":
+        return
+    with _lock:
+        if not _perfil_iniciado:
+            _perfil_iniciado = True
+            _import_original = builtins.__import__
+            builtins.__import__ = _import_medido
+
+
+def parar_perfil():
+    global _import_original
+    with _lock:
+        if _import_original is not None:
+            builtins.__import__ = _import_original
+            _import_original = None
+
+
+def relatorio_imports(limite=15, profundidade_max=1):
+    """Imports mais caros até agora: [(módulo, ms, profundidade)], e zera a lista."""
+    from telemetria import registrar_tempo
+
+    with _lock:
+        tempos = dict(_tempos)
+        _tempos.clear()
+    for modulo, (segundos, profundidade) in tempos.items():
+        if profundidade == 0:
+            registrar_tempo(f"import.{modulo}", segundos)
+    linhas = [
+        (modulo, segundos * 1000, profundidade)
+        for modulo, (segundos, profundidade) in tempos.items()
+        if profundidade <= profundidade_max
+    ]
+    linhas.sort(key=lambda linha: -linha[1])
+    return linhas[:limite]
+
+
+def imprimir_relatorio(titulo):
+    linhas = relatorio_imports()
+    total = sum(ms for _, ms, profundidade in linhas if profundidade == 0)
+    saida = [f"[azoup] imports ({titulo}): {total:.0f} ms nos imports de primeiro nível"]
+    for modulo, ms, profundidade in linhas:
+        saida.append(f"[azoup]   {'  ' * profundidade}{modulo:<32} {ms:8.1f} ms")
+    print("\n".join(saida), flush=True)
+
+
+def boot_concluido():
+    """Chamado por app.py depois de montar a tela: imprime o relatório do boot uma vez."""
+    global _boot_impresso
+    with _lock:
+        if _boot_impresso:
+            return
+        _boot_impresso = True
+    print(f"[azoup] tela inicial pronta {(time.perf_counter() - _inicio_processo) * 1000:.0f} ms "
+          f"após o primeiro import do app", flush=True)
+    if _import_original is not None:
+        imprimir_relatorio("boot")
+
+
+# =========================
+# Aquecimento em segundo plano
+# =========================
+
+def _carregar_fbclient():
+    from drivers import DRIVER_PADRAO
+
+    if DRIVER_PADRAO == "firebird-driver":
+        from firebird.driver import fbapi
+
+        fbapi.load_api()
+    else:
+        import fdb
+
+        fdb.load_api()
+
+
+def _criar_supabase():
+    from database import init_supabase
+
+    init_supabase()
+
+
+def _importar_paginas():
+    import dashboard  # noqa: F401
+    import paginas.vendas_page  # noqa: F401
+    import paginas.vendedores_page  # noqa: F401
+    from streamlit_option_menu import option_menu  # noqa: F401
+
+
+_ETAPAS = [
+    ("fbclient", _carregar_fbclient),
+    ("supabase", _criar_supabase),
+    ("paginas", _importar_paginas),
+]
+
+
+def _aquecer():
+    from telemetria import cronometro
+
+    for nome, etapa in _ETAPAS:
+        try:
+            with cronometro(f"aquecimento.{nome}"):
+                etapa()
+        except Exception as e:
+            _log.warning("Aquecimento %s falhou: %s", nome, e)
+    if _import_original is not None:
+        imprimir_relatorio("aquecimento")
+    parar_perfil()
+
+
+def aquecer():
+    """Inicia (uma única vez por processo) o aquecimento em segundo plano."""
+    global _aquecimento
+    if os.environ.get("AZOUP_AQUECER") == "0":
+        parar_perfil()
+        return None
+    with _lock:
+        if _aquecimento is None:
+            _aquecimento = threading.Thread(target=_aquecer, name="azoup-aquecimento", daemon=True)
+            _aquecimento.start()
+    return _aquecimento
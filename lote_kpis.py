@@ -0,0 +1,250 @@
+"""
+Lote de KPIs de todos os clientes ativos, fora do Streamlit.
+
+Calcula, para cada cliente ativo da tabela clientes, o pacote do dia: os
+KPIs dos cards do Dashboard (mês até o dia, como o filtro padrão) e os
+agregados das páginas Vendas e Vendedores. Usa os mesmos pedidos da camada
+semântica das páginas (dashboard.pedidos_kpis, metricas.pedidos_vendas,
+metricas.pedidos_vendedores) e o mesmo cálculo dos cards
+(dashboard.valores_kpis), executados com database.executar_consulta, sem
+cache nem chamadas st.*.
+
+Os clientes são distribuídos em um pool de processos (--processos). O
+processo principal limita quantos clientes de um mesmo servidor Firebird
+rodam ao mesmo tempo (--limite-host), já que o governador de cada processo
+só enxerga as próprias consultas. É o caminho de pré-aquecimento noturno e
+de relatórios; também completa o histórico diário dos cards
+(historico_kpis.py).
+
+Saída:
+- armazem (padrão): tabelas lote_kpis (um valor por KPI), lote_vendas,
+  lote_evolucao, lote_vendedores, lote_participacao e lote_execucoes no
+  armazém local (armazem.py); um novo lote do mesmo dia substitui o anterior;
+- parquet: um diretório por dia em --destino, com kpis.parquet,
+  execucoes.parquet e um arquivo por agregado (todos com a coluna API).
+
+    python lote_kpis.py --dia 2026-10-18 --processos 8 --limite-host 2
+    python lote_kpis.py --clientes clientes.json --saida parquet --destino /dados/lotes
+"""
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, datetime, timedelta
+
+import armazem
+import historico_kpis
+
+PROCESSOS = int(os.environ.get("AZOUP_LOTE_PROCESSOS", os.cpu_count() or 4))
+LIMITE_HOST = int(os.environ.get("AZOUP_LOTE_LIMITE_HOST", "2"))
+
+AGREGADOS = ["vendas", "evolucao", "vendedores", "participacao"]
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS lote_kpis (
+    dia TEXT NOT NULL,
+    api TEXT NOT NULL,
+    kpi TEXT NOT NULL,
+    valor REAL,
+    gerado_em TEXT NOT NULL,
+    PRIMARY KEY (dia, api, kpi)
+);
+CREATE TABLE IF NOT EXISTS lote_execucoes (
+    dia TEXT NOT NULL,
+    api TEXT NOT NULL,
+    host TEXT,
+    ok INTEGER NOT NULL,
+    erro TEXT,
+    segundos REAL,
+    gerado_em TEXT NOT NULL,
+    PRIMARY KEY (dia, api)
+);
+"""
+
+
+# =========================
+# Pacote de um cliente (processo filho)
+# =========================
+
+def pacote_cliente(cliente, dia):
+    """KPIs e agregados de um cliente no dia; erros voltam no pacote."""
+    from dashboard import pedidos_kpis, valores_kpis
+    from database import conn_data_da_empresa, executar_consulta
+    from metricas import executar, pedidos_vendas, pedidos_vendedores
+
+    conn_data = conn_data_da_empresa(cliente)
+    inicio_mes = dia.replace(day=1)
+    inicio = time.perf_counter()
+    try:
+        kpis = valores_kpis(executar(conn_data, pedidos_kpis(inicio_mes, dia), consultar=executar_consulta))
+        vendas, evolucao = executar(
+            conn_data, pedidos_vendas(dia.strftime("%Y/%m"), inicio_mes, dia, hoje=dia),
+            consultar=executar_consulta,
+        )
+        vendedores, participacao = executar(conn_data, pedidos_vendedores(hoje=dia), consultar=executar_consulta)
+        # histórico diário para as comparações dos cards (ver historico_kpis.py)
+        historico_kpis.atualizar(conn_data, dia - timedelta(days=historico_kpis.MAX_DIAS_CARGA), dia,
+                                 consultar=executar_consulta)
+        historico_kpis.registrar_observacao(conn_data, kpis, dia)
+    except Exception as e:
+        return {"ok": 0, "erro": str(e), "segundos": time.perf_counter() - inicio}
+    return {
+        "ok": 1,
+        "erro": None,
+        "segundos": time.perf_counter() - inicio,
+        "kpis": kpis,
+        "agregados": {"vendas": vendas, "evolucao": evolucao, "vendedores": vendedores,
+                      "participacao": participacao},
+    }
+
+
+# =========================
+# Distribuição (processo principal)
+# =========================
+
+def rodar(clientes, dia, processos=None, limite_host=None, ao_terminar=None):
+    """
+    Calcula os pacotes em um pool de processos, com no máximo `limite_host`
+    clientes por servidor ao mesmo tempo. `ao_terminar(cliente, pacote)` é
+    chamado no processo principal a cada cliente concluído.
+    """
+    from database import chave_host, conn_data_da_empresa
+
+    limite_host = limite_host or LIMITE_HOST
+    pendentes = defaultdict(deque)
+    for cliente in clientes:
+        pendentes[chave_host(conn_data_da_empresa(cliente))].append(cliente)
+    em_execucao = defaultdict(int)
+    futuros = {}
+
+    with ProcessPoolExecutor(max_workers=processos or PROCESSOS) as executor:
+        def disparar():
+            for host, fila in pendentes.items():
+                while fila and em_execucao[host] < limite_host:
+                    cliente = fila.popleft()
+                    futuros[executor.submit(pacote_cliente, cliente, dia)] = (host, cliente)
+                    em_execucao[host] += 1
+
+        disparar()
+        while futuros:
+            prontos, _ = wait(futuros, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                host, cliente = futuros.pop(futuro)
+                em_execucao[host] -= 1
+                try:
+                    pacote = futuro.result()
+                except Exception as e:
+                    # processo filho perdido (ex.: falta de memória)
+                    pacote = {"ok": 0, "erro": f"processo: {e}", "segundos": None}
+                pacote["host"] = host
+                if ao_terminar:
+                    ao_terminar(cliente, pacote)
+            disparar()
+
+
+# =========================
+# Gravação
+# =========================
+
+def _gravar_armazem(dia, resultados):
+    import pandas as pd
+
+    armazem.garantir("lote_kpis", _DDL)
+    gerado_em = datetime.now().isoformat(timespec="seconds")
+    armazem.inserir("lote_kpis", [
+        {"dia": dia.isoformat(), "api": api, "kpi": kpi, "valor": float(valor), "gerado_em": gerado_em}
+        for api, pacote in resultados.items() if pacote["ok"]
+        for kpi, valor in pacote["kpis"].items()
+    ], substituir=True)
+    armazem.inserir("lote_execucoes", [
+        {"dia": dia.isoformat(), "api": api, "host": pacote["host"], "ok": pacote["ok"],
+         "erro": pacote["erro"], "segundos": pacote["segundos"], "gerado_em": gerado_em}
+        for api, pacote in resultados.items()
+    ], substituir=True)
+
+    with armazem.conexao() as conn:
+        for nome in AGREGADOS:
+            partes = [pacote["agregados"][nome].assign(API=api)
+                      for api, pacote in resultados.items() if pacote["ok"]]
+            if not partes:
+                continue
+            df = pd.concat(partes, ignore_index=True).assign(DIA=dia.isoformat())
+            tabela = f"lote_{nome}"
+            existe = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                  (tabela,)).fetchone()
+            if existe:
+                apis = [api for api, pacote in resultados.items() if pacote["ok"]]
+                conn.execute(f"DELETE FROM {tabela} WHERE DIA = ? AND API IN ({', '.join('?' for _ in apis)})",
+                             [dia.isoformat(), *apis])
+            df.to_sql(tabela, conn, if_exists="append", index=False)
+
+
+def _gravar_parquet(dia, resultados, destino):
+    import pandas as pd
+
+    pasta = os.path.join(destino, dia.isoformat())
+    os.makedirs(pasta, exist_ok=True)
+    pd.DataFrame([
+        dict(pacote["kpis"], API=api) for api, pacote in resultados.items() if pacote["ok"]
+    ]).to_parquet(os.path.join(pasta, "kpis.parquet"), index=False)
+    pd.DataFrame([
+        {"API": api, "HOST": pacote["host"], "OK": pacote["ok"], "ERRO": pacote["erro"],
+         "SEGUNDOS": pacote["segundos"]}
+        for api, pacote in resultados.items()
+    ]).to_parquet(os.path.join(pasta, "execucoes.parquet"), index=False)
+    for nome in AGREGADOS:
+        partes = [pacote["agregados"][nome].assign(API=api) for api, pacote in resultados.items() if pacote["ok"]]
+        if partes:
+            pd.concat(partes, ignore_index=True).to_parquet(os.path.join(pasta, f"{nome}.parquet"), index=False)
+
+
+def _clientes(arquivo):
+    if arquivo:
+        import json
+
+        with open(arquivo, encoding="utf-8") as f:
+            return json.load(f)
+    import diretorio
+
+    return diretorio.clientes()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dia", type=date.fromisoformat, default=date.today(), help="AAAA-MM-DD (padrão: hoje)")
+    parser.add_argument("--processos", type=int, default=PROCESSOS)
+    parser.add_argument("--limite-host", type=int, default=LIMITE_HOST,
+                        help="clientes simultâneos por servidor Firebird")
+    parser.add_argument("--clientes", help="JSON com os registros de clientes (padrão: tabela clientes do Supabase)")
+    parser.add_argument("--apis", help="só estes api, separados por vírgula")
+    parser.add_argument("--saida", choices=["armazem", "parquet"], default="armazem")
+    parser.add_argument("--destino", default=os.path.join(armazem.DIRETORIO, "lotes"), help="diretório do parquet")
+    args = parser.parse_args()
+
+    clientes = [c for c in _clientes(args.clientes) if c.get("ativo") == "S"]
+    if args.apis:
+        escolhidos = set(args.apis.split(","))
+        clientes = [c for c in clientes if c.get("api") in escolhidos]
+
+    resultados = {}
+    inicio = time.perf_counter()
+
+    def ao_terminar(cliente, pacote):
+        resultados[cliente["api"]] = pacote
+        situacao = "ok" if pacote["ok"] else f"ERRO {pacote['erro']}"
+        segundos = f"{pacote['segundos']:.1f}s" if pacote["segundos"] is not None else "-"
+        print(f"[{len(resultados)}/{len(clientes)}] {cliente['api']} ({pacote['host']}) {segundos} {situacao}",
+              flush=True)
+
+    rodar(clientes, args.dia, args.processos, args.limite_host, ao_terminar)
+    if args.saida == "parquet":
+        _gravar_parquet(args.dia, resultados, args.destino)
+    else:
+        _gravar_armazem(args.dia, resultados)
+
+    falhas = sum(1 for pacote in resultados.values() if not pacote["ok"])
+    print(f"{len(resultados)} clientes em {time.perf_counter() - inicio:.1f}s, {falhas} com erro")
+    sys.exit(1 if falhas else 0)
@@ -0,0 +1,625 @@
+"""
+Camada semântica do BI.
+
+Fontes (views/tabelas), dimensões e métricas são declaradas uma única vez
+aqui. As páginas descrevem o que precisam através de "pedidos"
+(métricas + dimensões + período + filtros) e o compilador gera o menor
+conjunto de instruções SQL para atendê-los:
+
+- pedidos sem dimensões (KPIs escalares) viram uma única instrução,
+  mesmo vindo de fontes diferentes (tabelas derivadas em CROSS JOIN);
+- pedidos sobre a mesma fonte e período são atendidos por uma única
+  varredura, agrupada pela união das dimensões e reagregada localmente;
+- as instruções passam por database.consultar_df, cujo cache é
+  compartilhado entre páginas e sessões (mesma instrução = mesmo resultado).
+
+Adicionar um KPI é só declarar a métrica: ela entra na instrução que já existe.
+
+Séries temporais não agrupam sempre por dia: `granularidade()` escolhe dia,
+semana ou mês pela extensão do período, para que o resultado fique abaixo
+de MAX_LINHAS (AZOUP_MAX_LINHAS, padrão 5000) mesmo em períodos longos.
+"""
+import math
+import os
+from datetime import date
+
+# =========================
+# Declarações
+# =========================
+
+# Fontes de dados. "data" é a coluna usada pelo filtro de período,
+# "dimensao_data" a dimensão diária correspondente e "discriminador" a coluna
+# que separa as métricas de uma view no formato chave/valor (ex.: VW_KPI_BI.TIPO).
+# "granularidades" liga cada granularidade (ver GRANULARIDADES) à dimensão
+# que agrupa a coluna de data nesse nível.
+FONTES = {
+    "kpi": {
+        "tabela": "VW_KPI_BI K",
+        "data": "K.DATA",
+        "dimensao_data": "data",
+        "discriminador": "K.TIPO",
+    },
+    "clientes": {
+        "tabela": "CLIENTES C",
+        "data": None,
+    },
+    "empresas": {
+        "tabela": "EMPRESA EM",
+        "data": None,
+    },
+    "vendas": {
+        "tabela": "VW_BI_RELGERENCIAL_CUPOM_PREVENDA V",
+        # junções incluídas só quando alguma dimensão usada referencia o alias
+        "juncoes": {
+            "E.": (
+                "LEFT JOIN EMPRESA E ON E.CODIGO = CASE WHEN V.EMPRESA_VENDA = 0 "
+                "THEN 1 ELSE COALESCE(V.EMPRESA_VENDA, 1) END"
+            ),
+        },
+        "data": "V.DATA",
+        "dimensao_data": "data",
+        "granularidades": {"dia": "data", "semana": "semana", "mes": "inicio_mes"},
+    },
+    "vendedores": {
+        "tabela": "VW_BI_VENDA_VENDEDORES VV",
+        "data": "VV.DATA_REFERENCIA",
+        "dimensao_data": "data_referencia",
+        "granularidades": {"dia": "data_referencia", "semana": "semana", "mes": "inicio_mes"},
+    },
+}
+
+# Dimensões por fonte: nome lógico -> expressão SQL e nome da coluna no resultado
+DIMENSOES = {
+    "vendas": {
+        "referencia": {"expr": "V.REFERENCIA", "coluna": "REFERENCIA"},
+        "empresa_venda": {"expr": "COALESCE(V.EMPRESA_VENDA, 1)", "coluna": "EMPRESA_VENDA"},
+        "razao_social": {"expr": "E.RAZAO_SOCIAL", "coluna": "RAZAO_SOCIAL"},
+        "data": {"expr": "V.DATA", "coluna": "DATA"},
+        # segunda-feira da semana (WEEKDAY: 0 = domingo) e primeiro dia do mês
+        "semana": {"expr": "DATEADD(DAY, -MOD(EXTRACT(WEEKDAY FROM V.DATA) + 6, 7), CAST(V.DATA AS DATE))",
+                   "coluna": "SEMANA"},
+        "inicio_mes": {"expr": "DATEADD(DAY, 1 - EXTRACT(DAY FROM V.DATA), CAST(V.DATA AS DATE))",
+                       "coluna": "INICIO_MES"},
+    },
+    "vendedores": {
+        "vendedor": {"expr": "VV.NOME_VENDEDOR", "coluna": "NOME_VENDEDOR"},
+        "ano": {"expr": "EXTRACT(YEAR FROM VV.DATA_REFERENCIA)", "coluna": "ANO"},
+        "mes": {"expr": "EXTRACT(MONTH FROM VV.DATA_REFERENCIA)", "coluna": "MES"},
+        "referencia": {"expr": "VV.REFERENCIA", "coluna": "REFERENCIA"},
+        "data_referencia": {"expr": "VV.DATA_REFERENCIA", "coluna": "DATA_REFERENCIA"},
+        "semana": {"expr": "DATEADD(DAY, -MOD(EXTRACT(WEEKDAY FROM VV.DATA_REFERENCIA) + 6, 7), "
+                           "CAST(VV.DATA_REFERENCIA AS DATE))",
+                   "coluna": "SEMANA"},
+        "inicio_mes": {"expr": "DATEADD(DAY, 1 - EXTRACT(DAY FROM VV.DATA_REFERENCIA), CAST(VV.DATA_REFERENCIA AS DATE))",
+                       "coluna": "INICIO_MES"},
+    },
+    "kpi": {
+        "data": {"expr": "K.DATA", "coluna": "DATA"},
+    },
+    "clientes": {},
+    "empresas": {},
+}
+
+# Métricas. "agregacao" precisa ser reagregável (SUM/COUNT/MIN/MAX) para que
+# pedidos diferentes possam compartilhar a mesma varredura. Métricas
+# "derivadas" são calculadas depois, a partir de uma métrica base.
+METRICAS = {
+    # VW_KPI_BI (uma linha por TIPO/DATA)
+    "total_vendas": {"fonte": "kpi", "expr": "K.VALOR", "agregacao": "SUM",
+                     "discriminador": "TOTAL VENDAS", "coluna": "TOTAL_VENDAS"},
+    "total_custo": {"fonte": "kpi", "expr": "K.VALOR", "agregacao": "SUM",
+                    "discriminador": "TOTAL CUSTO", "coluna": "TOTAL_CUSTO"},
+    "indice_recompra": {"fonte": "kpi", "expr": "K.VALOR", "agregacao": "SUM",
+                        "discriminador": "INDICE RECOMPRA", "coluna": "INDICE_RECOMPRA"},
+    "pecas_atendimento": {"fonte": "kpi", "expr": "K.VALOR", "agregacao": "SUM",
+                          "discriminador": "PECAS ATEND", "coluna": "PECAS_ATENDIMENTO"},
+    "ticket_medio": {"fonte": "kpi", "expr": "K.VALOR", "agregacao": "SUM",
+                     "discriminador": "TICKET MEDIO", "coluna": "TICKET_MEDIO"},
+
+    # CLIENTES
+    "novos_clientes": {"fonte": "clientes", "expr": "1", "agregacao": "SUM",
+                       "condicao": "C.DATA_CADASTRO >= CURRENT_DATE - 90", "coluna": "NOVOS_CLIENTES"},
+    "clientes_ativos": {"fonte": "clientes", "expr": "1", "agregacao": "SUM",
+                        "condicao": "C.INATIVO = 'N'", "coluna": "CLIENTES_ATIVOS"},
+
+    # EMPRESA
+    "qtd_empresas": {"fonte": "empresas", "expr": "*", "agregacao": "COUNT", "coluna": "QTD_EMPRESAS"},
+
+    # VW_BI_RELGERENCIAL_CUPOM_PREVENDA
+    "total_venda": {"fonte": "vendas", "expr": "CAST(V.TOTAL_VENDA AS DECIMAL(10,2))",
+                    "agregacao": "SUM", "coluna": "TOTAL_VENDA"},
+    # uma linha da view por venda (com baldes semanais/mensais, len(df) contaria baldes)
+    "num_vendas": {"fonte": "vendas", "expr": "*", "agregacao": "COUNT", "coluna": "NUM_VENDAS"},
+
+    # VW_BI_VENDA_VENDEDORES
+    "valor_total": {"fonte": "vendedores", "expr": "VV.VALOR_TOTAL", "agregacao": "SUM",
+                    "coluna": "VALOR_TOTAL"},
+    "qtd_vendas": {"fonte": "vendedores", "expr": "*", "agregacao": "COUNT",
+                   "coluna": "QTD_VENDAS"},
+    "participacao": {"fonte": "vendedores", "derivada": "participacao", "base": "valor_total",
+                     "particao": ("referencia",), "coluna": "PARTICIPACAO"},
+}
+
+# Função usada para reagregar localmente cada tipo de agregação SQL
+_REAGREGACAO = {"SUM": "sum", "COUNT": "sum", "MIN": "min", "MAX": "max"}
+
+# Granularidades temporais, da mais fina para a mais grossa. "dias" é a
+# extensão média de um balde; "formato" o rótulo do balde nas páginas.
+GRANULARIDADES = {
+    "dia": {"dias": 1, "rotulo": "diária", "formato": "%d/%m/%Y"},
+    "semana": {"dias": 7, "rotulo": "semanal", "formato": "%d/%m/%Y"},
+    "mes": {"dias": 365.25 / 12, "rotulo": "mensal", "formato": "%Y-%m"},
+}
+
+# Limite de linhas (baldes x grupos) de uma série temporal
+MAX_LINHAS = int(os.environ.get("AZOUP_MAX_LINHAS", "5000"))
+
+
+# =========================
+# Granularidade temporal
+# =========================
+
+def granularidade(data_inicial, data_final, grupos=1, max_linhas=None):
+    """
+    Granularidade mais fina cujo número estimado de linhas (baldes no
+    período x `grupos` séries, ex.: empresas ou vendedores) cabe em
+    max_linhas. Acima disso fica a mensal, a mais grossa.
+    """
+    max_linhas = max_linhas or MAX_LINHAS
+    dias = (date.fromisoformat(str(data_final)[:10]) - date.fromisoformat(str(data_inicial)[:10])).days + 1
+    for nome, granul in GRANULARIDADES.items():
+        if math.ceil(max(dias, 1) / granul["dias"]) * max(grupos, 1) <= max_linhas:
+            return nome
+    return "mes"
+
+
+def dimensao_tempo(fonte, granul):
+    """Dimensão da fonte que agrupa a data na granularidade."""
+    return FONTES[fonte]["granularidades"][granul]
+
+
+def coluna_tempo(fonte, granul):
+    return DIMENSOES[fonte][dimensao_tempo(fonte, granul)]["coluna"]
+
+
+# =========================
+# Pedidos
+# =========================
+
+def pedido(metricas, dimensoes=(), periodo=None, filtros=()):
+    """
+    Descreve uma necessidade de dados de uma página.
+
+    metricas: nomes declarados em METRICAS (todas da mesma fonte)
+    dimensoes: nomes declarados em DIMENSOES[fonte]
+    periodo: (data_inicial, data_final) inclusivo, aplicado à coluna de data da fonte
+    filtros: tuplas (dimensao, operador, valor) com operador em
+             "=", "in", "not in", "like" (apenas prefixo, ex.: "2024/05%")
+    """
+    metricas = tuple(metricas)
+    fontes = {METRICAS[m]["fonte"] for m in metricas}
+    if len(fontes) != 1:
+        raise ValueError(f"Métricas de fontes diferentes no mesmo pedido: {sorted(fontes)}")
+    fonte = fontes.pop()
+
+    if periodo is not None and FONTES[fonte]["data"] is None:
+        periodo = None
+    if periodo is not None:
+        periodo = (str(periodo[0]), str(periodo[1]))
+
+    normalizados = []
+    for dim, op, valor in filtros:
+        if isinstance(valor, (list, set, tuple)):
+            valor = tuple(valor)
+        normalizados.append((dim, op.lower(), valor))
+
+    return {
+        "fonte": fonte,
+        "metricas": metricas,
+        "dimensoes": tuple(dimensoes),
+        "periodo": periodo,
+        "filtros": tuple(normalizados),
+    }
+
+
+# Métricas que realmente precisam ser lidas do banco (bases das derivadas incluídas)
+def _metricas_fisicas(metricas):
+    fisicas = []
+    for nome in metricas:
+        base = METRICAS[nome].get("base") if METRICAS[nome].get("derivada") else nome
+        if base not in fisicas:
+            fisicas.append(base)
+    return fisicas
+
+
+# =========================
+# Compilação
+# =========================
+
+# Fonte física de um pedido: a view declarada ou, quando o tenant tem as
+# tabelas de resumo provisionadas e atualizadas, a variante resumida
+# (ver provisionamento.fonte_resumida)
+def _fonte_fisica(pedido_, resumo):
+    if resumo:
+        from provisionamento import fonte_resumida
+
+        variante = fonte_resumida(pedido_, resumo)
+        if variante is not None:
+            return variante
+    return {"nome": pedido_["fonte"], "tabela": FONTES[pedido_["fonte"]]["tabela"], "params": (), "metricas": {}}
+
+
+def _from(fonte, fisica, dimensoes, filtros):
+    exprs = [DIMENSOES[fonte][d]["expr"] for d in list(dimensoes) + [f[0] for f in filtros]]
+    juncoes = [
+        juncao for alias, juncao in FONTES[fonte].get("juncoes", {}).items()
+        if any(alias in expr for expr in exprs)
+    ]
+    return " ".join([fisica["tabela"]] + juncoes)
+
+
+def _expr_metrica(nome, fonte, fisica=None):
+    metrica = dict(METRICAS[nome])
+    if fisica and nome in fisica["metricas"]:
+        metrica.update(fisica["metricas"][nome])
+    condicoes = []
+    if "discriminador" in metrica:
+        condicoes.append(f"{FONTES[fonte]['discriminador']} = '{metrica['discriminador']}'")
+    if "condicao" in metrica:
+        condicoes.append(metrica["condicao"])
+
+    if metrica["agregacao"] == "COUNT" and metrica["expr"] == "*":
+        if condicoes:
+            return f"SUM(CASE WHEN {' AND '.join(condicoes)} THEN 1 ELSE 0 END)"
+        return "COUNT(*)"
+    expr = metrica["expr"]
+    if condicoes:
+        expr = f"CASE WHEN {' AND '.join(condicoes)} THEN {expr} END"
+    if metrica["agregacao"] in ("SUM", "COUNT"):
+        return f"COALESCE({metrica['agregacao']}({expr}), 0)"
+    return f"{metrica['agregacao']}({expr})"
+
+
+def _prefixo_like(valor):
+    if "%" in valor[:-1] or "_" in valor:
+        raise ValueError(f"Filtro LIKE suporta apenas prefixo: {valor}")
+    return valor.rstrip("%")
+
+
+def _sql_filtro(fonte, dim, op, valor):
+    expr = DIMENSOES[fonte][dim]["expr"]
+    if op in ("in", "not in"):
+        marcadores = ", ".join("?" for _ in valor)
+        return f"{expr} {op.upper()} ({marcadores})", list(valor)
+    if op == "=":
+        return f"{expr} = ?", [valor]
+    if op == "like":
+        # LIKE com parâmetro não usa índice no Firebird; STARTING WITH usa
+        return f"{expr} STARTING WITH ?", [_prefixo_like(valor)]
+    raise ValueError(f"Operador de filtro não suportado: {op}")
+
+
+# WHERE comum: período, discriminadores e filtros compartilhados
+def _where(fonte, periodo, metricas, filtros):
+    partes, params = [], []
+    if periodo is not None:
+        partes.append(f"{FONTES[fonte]['data']} BETWEEN ? AND ?")
+        params.extend(periodo)
+
+    discriminadores = [METRICAS[m].get("discriminador") for m in metricas]
+    if discriminadores and all(discriminadores):
+        unicos = sorted(set(discriminadores))
+        partes.append(f"{FONTES[fonte]['discriminador']} IN ({', '.join('?' for _ in unicos)})")
+        params.extend(unicos)
+
+    for dim, op, valor in filtros:
+        sql, valores = _sql_filtro(fonte, dim, op, valor)
+        partes.append(sql)
+        params.extend(valores)
+
+    return (" WHERE " + " AND ".join(partes)) if partes else "", params
+
+
+def _select_agrupado(fonte, fisica, dimensoes, metricas, periodo, filtros):
+    dims = [DIMENSOES[fonte][d] for d in dimensoes]
+    colunas = [f"{d['expr']} AS {d['coluna']}" for d in dims]
+    colunas += [f"{_expr_metrica(m, fonte, fisica)} AS {METRICAS[m]['coluna']}" for m in metricas]
+    where, params = _where(fonte, periodo, metricas, filtros)
+    params = list(fisica["params"]) + params
+
+    sql = f"SELECT {', '.join(colunas)} FROM {_from(fonte, fisica, dimensoes, filtros)}{where}"
+    if dims:
+        sql += " GROUP BY " + ", ".join(d["expr"] for d in dims)
+        sql += " ORDER BY " + ", ".join(str(i + 1) for i in range(len(dims)))
+    return sql, params
+
+
+def compilar(pedidos, resumo=None):
+    """
+    Gera o plano de execução para uma lista de pedidos.
+
+    Retorna uma lista de instruções {"sql", "params", "destinos"}, onde cada
+    destino indica qual pedido é atendido e como recortar o resultado.
+    `resumo` descreve as tabelas de resumo do tenant (provisionamento.resumo_ativo).
+    """
+    pedidos = list(pedidos)
+    fisicas = [_fonte_fisica(p, resumo) for p in pedidos]
+    plano = []
+
+    # 1) Pedidos escalares: uma tabela derivada por (fonte, período, filtros),
+    #    todas unidas em uma única instrução.
+    escalares = {}
+    for i, p in enumerate(pedidos):
+        if not p["dimensoes"]:
+            chave = (p["fonte"], fisicas[i]["nome"], p["periodo"], p["filtros"])
+            escalares.setdefault(chave, []).append(i)
+
+    if escalares:
+        derivadas, params, destinos = [], [], []
+        for g, ((fonte, _, periodo, filtros), indices) in enumerate(escalares.items()):
+            fisica = fisicas[indices[0]]
+            metricas = []
+            for i in indices:
+                for m in _metricas_fisicas(pedidos[i]["metricas"]):
+                    if m not in metricas:
+                        metricas.append(m)
+            colunas = [f"{_expr_metrica(m, fonte, fisica)} AS G{g}_{METRICAS[m]['coluna']}" for m in metricas]
+            where, p_params = _where(fonte, periodo, metricas, filtros)
+            derivadas.append(f"(SELECT {', '.join(colunas)} FROM {_from(fonte, fisica, (), filtros)}{where}) G{g}")
+            params.extend(fisica["params"])
+            params.extend(p_params)
+            for i in indices:
+                destinos.append({"pedido": i, "prefixo": f"G{g}_", "dimensoes": (), "filtros_locais": ()})
+
+        if len(derivadas) == 1:
+            sql = f"SELECT G0.* FROM {derivadas[0]}"
+        else:
+            sql = "SELECT * FROM " + " CROSS JOIN ".join(derivadas)
+        plano.append({"sql": sql, "params": tuple(params), "destinos": destinos})
+
+    # 2) Pedidos agrupados: uma varredura por (fonte, período). Filtros comuns a
+    #    todos vão para o WHERE; os demais são aplicados localmente, desde que a
+    #    dimensão filtrada esteja no resultado.
+    grupos = {}
+    for i, p in enumerate(pedidos):
+        if p["dimensoes"]:
+            grupos.setdefault((p["fonte"], fisicas[i]["nome"], p["periodo"]), []).append(i)
+
+    for (fonte, _, periodo), indices in grupos.items():
+        fisica = fisicas[indices[0]]
+        for lote in _particionar(pedidos, indices):
+            comuns = set(pedidos[lote[0]]["filtros"])
+            for i in lote[1:]:
+                comuns &= set(pedidos[i]["filtros"])
+            comuns = tuple(f for f in pedidos[lote[0]]["filtros"] if f in comuns)
+
+            dimensoes, metricas = [], []
+            for i in lote:
+                for d in pedidos[i]["dimensoes"] + tuple(f[0] for f in pedidos[i]["filtros"] if f not in comuns):
+                    if d not in dimensoes:
+                        dimensoes.append(d)
+                for m in _metricas_fisicas(pedidos[i]["metricas"]):
+                    if m not in metricas:
+                        metricas.append(m)
+
+            sql, params = _select_agrupado(fonte, fisica, dimensoes, metricas, periodo, comuns)
+            destinos = [{
+                "pedido": i,
+                "prefixo": "",
+                "dimensoes": pedidos[i]["dimensoes"],
+                "filtros_locais": tuple(f for f in pedidos[i]["filtros"] if f not in comuns),
+                "completo": tuple(dimensoes) == pedidos[i]["dimensoes"] and set(pedidos[i]["filtros"]) == set(comuns),
+            } for i in lote]
+            plano.append({"sql": sql, "params": tuple(params), "destinos": destinos})
+
+    return plano
+
+
+def instrucao_detalhe(fonte, periodo=None, filtros=()):
+    """
+    SELECT das linhas da fonte, sem agregação (exportação de linhas detalhadas).
+    Período e filtros seguem as mesmas regras dos pedidos.
+    """
+    p = pedido([m for m, metrica in METRICAS.items() if metrica["fonte"] == fonte][:1],
+               periodo=periodo, filtros=filtros)
+    alias = FONTES[fonte]["tabela"].split()[-1]
+    where, params = _where(fonte, p["periodo"], [], p["filtros"])
+    return f"SELECT {alias}.* FROM {FONTES[fonte]['tabela']}{where}", tuple(params)
+
+
+# Separa pedidos da mesma fonte/período em lotes que podem dividir uma
+# varredura. Filtros locais só são possíveis com operadores suportados em pandas.
+def _particionar(pedidos, indices):
+    compartilhaveis, isolados = [], []
+    for i in indices:
+        if all(op in _FILTROS_LOCAIS for _, op, _ in pedidos[i]["filtros"]):
+            compartilhaveis.append(i)
+        else:
+            isolados.append(i)
+    lotes = [compartilhaveis] if compartilhaveis else []
+    lotes += [[i] for i in isolados]
+    return lotes
+
+
+# =========================
+# Recorte local dos resultados
+# =========================
+
+def _filtro_like(serie, valor):
+    if not valor.endswith("%") or "%" in valor[:-1] or "_" in valor:
+        raise ValueError(f"Filtro LIKE local suporta apenas prefixo: {valor}")
+    return serie.astype(str).str.startswith(valor[:-1])
+
+
+_FILTROS_LOCAIS = {
+    "=": lambda serie, valor: serie == valor,
+    "in": lambda serie, valor: serie.isin(valor),
+    "not in": lambda serie, valor: ~serie.isin(valor),
+    "like": _filtro_like,
+}
+
+
+def _aplicar_derivadas(df, fonte, metricas):
+    for nome in metricas:
+        metrica = METRICAS[nome]
+        if metrica.get("derivada") != "participacao":
+            continue
+        base = METRICAS[metrica["base"]]["coluna"]
+        particao = [DIMENSOES[fonte][d]["coluna"] for d in metrica["particao"]]
+        total = df.groupby(particao)[base].transform("sum")
+        df[metrica["coluna"]] = (df[base] * 100.0 / total.where(total != 0)).fillna(0).round(2)
+    return df
+
+
+def recortar(df, pedido_, destino):
+    """Extrai de um resultado compartilhado a parte que cabe a um pedido."""
+    import pandas as pd
+
+    fonte = pedido_["fonte"]
+    fisicas = _metricas_fisicas(pedido_["metricas"])
+    prefixo = destino["prefixo"]
+
+    if not pedido_["dimensoes"]:
+        dados = {}
+        for m in fisicas:
+            coluna = METRICAS[m]["coluna"]
+            valor = df[prefixo + coluna].iloc[0] if not df.empty else 0
+            dados[coluna] = [valor]
+        return _numerico(pd.DataFrame(dados), fisicas)
+
+    df = _numerico(df.copy(), fisicas)
+    for dim, op, valor in destino["filtros_locais"]:
+        coluna = DIMENSOES[fonte][dim]["coluna"]
+        df = df[_FILTROS_LOCAIS[op](df[coluna], valor)]
+
+    colunas_dim = [DIMENSOES[fonte][d]["coluna"] for d in pedido_["dimensoes"]]
+    if not destino.get("completo"):
+        agregacoes = {METRICAS[m]["coluna"]: _REAGREGACAO[METRICAS[m]["agregacao"]] for m in fisicas}
+        df = df.groupby(colunas_dim, as_index=False, dropna=False).agg(agregacoes)
+        df = df.sort_values(colunas_dim)
+
+    df = _aplicar_derivadas(df, fonte, pedido_["metricas"])
+    colunas = colunas_dim + [METRICAS[m]["coluna"] for m in pedido_["metricas"]]
+    for m in fisicas:
+        if METRICAS[m]["coluna"] not in colunas:
+            colunas.append(METRICAS[m]["coluna"])
+    return df[colunas].reset_index(drop=True)
+
+
+def reagregar(df, pedido_):
+    """Reagrega um resultado mais detalhado da mesma fonte para as dimensões do pedido."""
+    import pandas as pd
+
+    if pedido_["dimensoes"]:
+        return recortar(df, pedido_, {"prefixo": "", "filtros_locais": (), "completo": False})
+
+    fisicas = _metricas_fisicas(pedido_["metricas"])
+    df = _numerico(df.copy(), fisicas)
+    linha = {}
+    for m in fisicas:
+        coluna = METRICAS[m]["coluna"]
+        linha[coluna] = [df[coluna].agg(_REAGREGACAO[METRICAS[m]["agregacao"]]) if not df.empty else 0]
+    return pd.DataFrame(linha)
+
+
+# Valores DECIMAL chegam do driver como Decimal; converte para float
+def _numerico(df, metricas):
+    import pandas as pd
+
+    for m in metricas:
+        coluna = METRICAS[m]["coluna"]
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors="coerce").fillna(0)
+    return df
+
+
+# =========================
+# Pedidos das páginas
+# =========================
+# Também usados pelo diagnóstico de planos (planos.py), que prepara no banco
+# do cliente todas as instruções que as páginas emitem.
+
+def _inicio_mes(hoje, meses_atras):
+    ano, mes = divmod(hoje.year * 12 + hoje.month - 1 - meses_atras, 12)
+    return date(ano, mes + 1, 1)
+
+
+def pedido_vendas_filtrado(referencia, data_inicial, data_final, granul="dia"):
+    """Página Vendas: distribuição por empresa e detalhamento do período filtrado."""
+    return pedido(
+        ["total_venda", "num_vendas"],
+        dimensoes=["referencia", "empresa_venda", "razao_social", dimensao_tempo("vendas", granul)],
+        periodo=(data_inicial, data_final),
+        filtros=[("referencia", "like", f"{referencia}%")],
+    )
+
+
+def pedido_empresas():
+    """
+    Página Vendas: empresas cadastradas, teto do número de séries da seção
+    filtrada para escolher a granularidade antes da consulta.
+    """
+    return pedido(["qtd_empresas"])
+
+
+def pedido_vendas_evolucao(hoje=None):
+    """Página Vendas: evolução dos últimos 13 meses (não depende dos filtros)."""
+    hoje = hoje or date.today()
+    # início alinhado ao mês para aproveitar os resumos mensais
+    return pedido(["total_venda"], dimensoes=["referencia"], periodo=(_inicio_mes(hoje, 13), hoje))
+
+
+def pedido_vendas_exploracao(hoje=None):
+    """Página Explorar: vendas diárias por empresa dos últimos 13 meses."""
+    hoje = hoje or date.today()
+    return pedido(
+        ["total_venda"],
+        dimensoes=["referencia", "empresa_venda", "razao_social", "data"],
+        periodo=(_inicio_mes(hoje, 13), hoje),
+    )
+
+
+def pedidos_vendas(referencia, data_inicial, data_final, hoje=None, granul=None):
+    granul = granul or granularidade(data_inicial, data_final)
+    return [pedido_vendas_filtrado(referencia, data_inicial, data_final, granul), pedido_vendas_evolucao(hoje)]
+
+
+def pedidos_vendedores(hoje=None, granul="mes"):
+    """
+    Página Vendedores: análise temporal e participação (mesma varredura).
+    As visões da página são mensais; os 13 meses já limitam o resultado.
+    """
+    hoje = hoje or date.today()
+    periodo = (_inicio_mes(hoje, 13), hoje)
+    return [
+        pedido(
+            ["valor_total", "qtd_vendas"],
+            dimensoes=["vendedor", "referencia", dimensao_tempo("vendedores", granul)],
+            periodo=periodo,
+        ),
+        pedido(
+            ["valor_total", "participacao"],
+            dimensoes=["vendedor", "referencia"],
+            periodo=periodo,
+            filtros=[("vendedor", "not in", ["SEM VENDEDOR"])],
+        ),
+    ]
+
+
+# =========================
+# Execução
+# =========================
+
+def executar(conn_data, pedidos, consultar=None, usar_resumos=True):
+    """
+    Compila e executa os pedidos, retornando um DataFrame por pedido (na
+    mesma ordem). As instruções do plano rodam em paralelo no executor de
+    I/O (dados_async). `consultar(conn_data, sql, params)` pode ser trocado
+    para uso fora do Streamlit; por padrão usa o cache de database.consultar_df.
+    Tabelas de resumo provisionadas (provisionamento.py) são usadas quando
+    existirem, salvo usar_resumos=False.
+    """
+    from dados_async import executar_sincrono, fetch_pedidos
+
+    return executar_sincrono(fetch_pedidos(conn_data, pedidos, consultar=consultar,
+                                           usar_resumos=usar_resumos))
@@ -0,0 +1,62 @@
+"""
+Apoio às páginas montadas em seções (st.fragment).
+
+Cada seção declara explicitamente de quais entradas depende; `memo` guarda
+na sessão o último resultado de cada seção e só recalcula quando essas
+entradas mudam. Assim, um rerun completo (troca de página, atualização
+automática) não refaz consultas nem cálculos de seções cujas entradas são
+as mesmas, e a interação com o filtro de uma seção só reexecuta o
+fragmento dela.
+"""
+import time
+
+import streamlit as st
+
+# Mesmo TTL curto de database.consultar_df: o resultado memorizado não
+# sobrevive ao cache compartilhado
+_JANELA_DADOS = 300
+
+
+def versao_dados(conn_data):
+    """Entradas que invalidam dados do tenant: geração (eventos.py), recarga automática e janela de TTL."""
+    import eventos
+    from database import chave_tenant
+
+    tenant = chave_tenant(conn_data)
+    recarga = st.session_state.get('ultima_atualizacao') if st.session_state.get('auto_atualizar') else None
+    return (tenant, eventos.geracao(tenant), recarga, int(time.time() // _JANELA_DADOS))
+
+
+def memo(secao, entradas, calcular):
+    """Resultado de calcular() para a seção, recalculado só quando `entradas` mudam."""
+    chave = f"_secao_{secao}"
+    guardado = st.session_state.get(chave)
+    if guardado is not None and guardado[0] == entradas:
+        return guardado[1]
+    valor = calcular()
+    st.session_state[chave] = (entradas, valor)
+    return valor
+
+
+def carregar(secao, conn_data, pedidos):
+    """DataFrames dos pedidos (camada semântica; incremental com a atualização automática ligada)."""
+    from metricas import executar
+
+    executar_pedidos = executar
+    if st.session_state.get('auto_atualizar'):
+        from incremental import executar as executar_pedidos
+
+    pedidos = list(pedidos)
+    return memo(secao, entradas_dados(conn_data, pedidos), lambda: executar_pedidos(conn_data, pedidos))
+
+
+def entradas_dados(conn_data, pedidos):
+    """Entradas de uma seção que depende do resultado dos pedidos."""
+    return (repr(list(pedidos)), versao_dados(conn_data))
+
+
+def legenda_granularidade(granul, data_inicial, data_final):
+    from metricas import GRANULARIDADES
+
+    dias = (data_final - data_inicial).days + 1
+    st.caption(f"Granularidade: {GRANULARIDADES[granul]['rotulo']} ({dias} dias no período)")
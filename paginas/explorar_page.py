@@ -0,0 +1,151 @@
+"""
+Página Explorar: exploração livre (arrastar e soltar) dos dados de Vendas e
+Vendedores do tenant.
+
+Os conjuntos são os mesmos das páginas (camada semântica, mesmo cache de
+consultas), então abrir o Explorar depois de Vendas ou Vendedores não vai
+ao banco. O DataFrame fica no servidor: com o pygwalker, o renderizador
+usa o modo de cálculo no kernel (as agregações de cada gráfico rodam no
+servidor e só o resultado agregado vai ao navegador), em vez de embutir o
+conjunto inteiro na página. O renderizador fica em cache por tenant,
+conjunto e impressão digital dos dados.
+
+Sem o pygwalker (ou se o renderizador falhar ao montar ou desenhar), a
+página oferece o agregador próprio: as dimensões e a medida escolhidas
+viram um groupby no servidor, exibido em tabela paginada e gráfico. Em
+nenhum dos modos as linhas detalhadas são enviadas ao navegador.
+"""
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import ativos
+import graficos
+import tabelas
+
+from metricas import METRICAS, pedido_vendas_exploracao, pedidos_vendedores
+from paginas.comum import carregar
+
+COLUNAS_METRICAS = {m["coluna"] for m in METRICAS.values()}
+AGREGACOES = {"Soma": "sum", "Média": "mean", "Contagem": "count", "Máximo": "max", "Mínimo": "min"}
+
+
+def _vendas(conn_data):
+    df, = carregar("explorar.vendas", conn_data, [pedido_vendas_exploracao()])
+    return _preparar(df, "DATA")
+
+
+def _vendedores(conn_data):
+    # mesmo pedido da página Vendedores (o resultado vem do cache de consultas)
+    df, _ = carregar("explorar.vendedores", conn_data, pedidos_vendedores(granul="mes"))
+    return _preparar(df, "INICIO_MES")
+
+
+def _preparar(df, coluna_data):
+    """Datas como datetime e métricas (Decimal do Firebird) como float."""
+    medidas = {c: df[c].astype(float) for c in df.columns if c in COLUNAS_METRICAS}
+    return df.assign(**medidas, **{coluna_data: pd.to_datetime(df[coluna_data])})
+
+
+CONJUNTOS = {
+    "Vendas (diárias por empresa, 13 meses)": _vendas,
+    "Vendedores (mensais por vendedor, 13 meses)": _vendedores,
+}
+
+
+def show_explorar_page(conn_data):
+    col1, col2 = st.columns([2, 5])
+    with col1:
+        ativos.mostrar_logo(width=80)
+    with col2:
+        st.title("Explorar")
+
+    if not conn_data:
+        st.error("Conexão com banco não configurada.")
+        return
+
+    nome = st.selectbox("Conjunto de dados", list(CONJUNTOS))
+    try:
+        df = CONJUNTOS[nome](conn_data)
+    except Exception as e:
+        st.error(f"Erro ao buscar dados: {e}")
+        return
+    if df.empty:
+        st.info("Nenhum dado encontrado.")
+        return
+    st.caption(f"{len(df):,} linhas no servidor; o navegador recebe só os resultados agregados.")
+
+    try:
+        _renderizador(conn_data["database"], nome, graficos.impressao(df), df).explorer()
+    except ImportError:
+        agregador(nome, df)
+    except Exception as e:
+        st.caption(f"Explorador do pygwalker indisponível ({e}); usando o agregador.")
+        agregador(nome, df)
+
+
+# =========================
+# pygwalker (cálculo no kernel)
+# =========================
+
+@st.cache_resource(show_spinner=False, max_entries=32, hash_funcs={pd.DataFrame: lambda _: None})
+def _renderizador(tenant, conjunto, impressao, df):
+    """Um renderizador por tenant/conjunto/dados (df fica fora da chave: a impressão já o identifica)."""
+    from pygwalker.api.streamlit import StreamlitRenderer
+
+    # o construtor registra a rota de comunicação do pygwalker no servidor
+    return StreamlitRenderer(df, kernel_computation=True)
+
+
+# =========================
+# Agregador próprio (sem pygwalker)
+# =========================
+
+def agregador(nome, df):
+    medidas = [c for c in df.columns if c in COLUNAS_METRICAS]
+    dimensoes = [c for c in df.columns if c not in medidas]
+
+    with st.form(f"agregador_{nome}", border=False):
+        c1, c2, c3, c4 = st.columns([4, 2, 2, 1])
+        with c1:
+            escolhidas = st.multiselect("Agrupar por", dimensoes, default=dimensoes[:1])
+        with c2:
+            medida = st.selectbox("Medida", medidas)
+        with c3:
+            agregacao = st.selectbox("Agregação", list(AGREGACOES))
+        with c4:
+            st.write("")
+            st.form_submit_button("Aplicar", use_container_width=True)
+
+    if not escolhidas or medida is None:
+        st.info("Escolha ao menos uma dimensão e uma medida.")
+        return
+
+    # o groupby roda aqui; só o resultado segue para o navegador
+    resultado = df.groupby(escolhidas, as_index=False, dropna=False)[medida].agg(AGREGACOES[agregacao])
+    coluna = f"{medida} ({agregacao.lower()})"
+    resultado = resultado.rename(columns={medida: coluna})
+
+    graficos.mostrar(f"explorar.{nome}", resultado,
+                     lambda: figura_agregada(resultado, escolhidas, coluna),
+                     echarts=lambda janela: opcoes_agregadas(resultado, escolhidas, coluna, janela))
+    tabelas.tabela_paginada(f"explorar_{list(CONJUNTOS).index(nome)}", resultado, ordem=(coluna, False))
+
+
+def figura_agregada(resultado, escolhidas, coluna):
+    x = escolhidas[0]
+    cor = escolhidas[1] if len(escolhidas) > 1 else None
+    if pd.api.types.is_datetime64_any_dtype(resultado[x]):
+        dados = graficos.reduzir_serie(resultado, x, coluna, por=cor)
+        return px.line(dados.sort_values(x), x=x, y=coluna, color=cor)
+    # categorias: as maiores + "Outros"
+    dados = graficos.top_n(resultado, x, coluna, por=[cor] if cor else None)
+    return px.bar(dados, x=x, y=coluna, color=cor)
+
+
+def opcoes_agregadas(resultado, escolhidas, coluna, janela):
+    x = escolhidas[0]
+    cor = escolhidas[1] if len(escolhidas) > 1 else None
+    if pd.api.types.is_datetime64_any_dtype(resultado[x]):
+        return graficos.opcoes_linha(resultado, x, coluna, janela, por=cor)
+    return graficos.opcoes_barras(resultado, x, coluna, cor=cor)
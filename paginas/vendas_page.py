@@ -0,0 +1,281 @@
+"""
+Página Vendas: evolução dos últimos 13 meses, distribuição por empresa e
+detalhamento do período filtrado.
+
+pandas e plotly são importados aqui, e este módulo só é importado quando a
+página é aberta (ver app.py), então a tela de login não paga esse custo.
+
+A página é montada em seções independentes (st.fragment): a evolução não
+depende dos filtros; a barra de filtros é um formulário aplicado de uma vez
+e só reexecuta a seção filtrada (distribuição, métricas e detalhamento).
+"""
+from datetime import date, datetime
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+import ativos
+import exportacao
+import graficos
+import historico_kpis
+import tabelas
+
+from metricas import (coluna_tempo, granularidade, instrucao_detalhe, pedido_empresas, pedido_vendas_evolucao,
+                      pedido_vendas_filtrado)
+from paginas.comum import carregar, entradas_dados, legenda_granularidade, memo
+
+
+def show_vendas_page(conn_data):
+    col1, col2 = st.columns([2,5])
+    with col1:
+        ativos.mostrar_logo(width=80)
+    with col2:
+        st.title("Análise de Vendas")
+
+    if not conn_data:
+        st.error("Conexão com banco não configurada.")
+        return
+
+    secao_evolucao(conn_data)
+    secao_filtrada(conn_data)
+
+
+# =========================
+# Evolução (últimos 13 meses) - depende só do tenant e do dia
+# =========================
+
+@st.fragment
+def secao_evolucao(conn_data):
+    st.subheader("📈 Evolução de Vendas - Últimos 13 Meses")
+    try:
+        df_13_meses, = carregar("vendas.evolucao", conn_data, [pedido_vendas_evolucao()])
+    except Exception as e:
+        st.error(f"Erro ao buscar dados: {e}")
+        return
+
+    if not df_13_meses.empty:
+        # Gerar lista completa dos últimos 13 meses
+        hoje = datetime.now()
+        meses_13 = [(hoje - pd.DateOffset(months=i)).strftime('%Y/%m') for i in range(12, -1, -1)]
+
+        # Criar DataFrame completo com todos os meses
+        df_completo = pd.DataFrame({'REFERENCIA': meses_13})
+        df_completo = df_completo.merge(df_13_meses, on='REFERENCIA', how='left').fillna(0)
+
+        # Só as colunas do gráfico entram na impressão digital
+        mes_atual = hoje.strftime('%Y/%m')
+        graficos.mostrar("vendas.evolucao", df_completo[['REFERENCIA', 'TOTAL_VENDA']],
+                         lambda: figura_evolucao(df_completo, mes_atual), mes_atual=mes_atual,
+                         echarts=lambda janela: graficos.opcoes_linha(df_completo, 'REFERENCIA', 'TOTAL_VENDA',
+                                                                      janela, nome_serie='Vendas', cor='#F79633'))
+    else:
+        st.info("Nenhum dado encontrado para os últimos 13 meses.")
+
+
+def figura_evolucao(df_completo, mes_atual):
+    # No máximo ~1 ponto por pixel; WebGL para séries longas
+    df_linha = graficos.reduzir_serie(df_completo, 'REFERENCIA', 'TOTAL_VENDA')
+    Scatter = graficos.classe_scatter(len(df_linha))
+
+    fig_line = go.Figure()
+    fig_line.add_trace(Scatter(
+        x=df_linha['REFERENCIA'], 
+        y=df_linha['TOTAL_VENDA'], 
+        mode='lines+markers',
+        line=dict(color='#F79633', width=4),
+        marker=dict(size=10, color='#F79633'),
+        name='Vendas',
+        hovertemplate='<b>Mês:</b> %{x}<br><b>Total:</b> R$ %{y:,.2f}<extra></extra>'
+    ))
+
+    # Destacar o mês atual
+    if mes_atual in df_completo['REFERENCIA'].values:
+        idx = df_completo[df_completo['REFERENCIA'] == mes_atual].index[0]
+        fig_line.add_trace(go.Scatter(
+            x=[df_completo['REFERENCIA'].iloc[idx]],
+            y=[df_completo['TOTAL_VENDA'].iloc[idx]],
+            mode='markers',
+            marker=dict(size=12, color='#FF0000', symbol='star'),
+            name='Mês Atual',
+            hovertemplate='<b>Mês Atual:</b> %{x}<br><b>Total:</b> R$ %{y:,.2f}<extra></extra>'
+        ))
+
+    fig_line.update_layout(
+        height=400,
+        plot_bgcolor='#f5f5f5', 
+        paper_bgcolor='#f5f5f5',
+        xaxis_title='Referencia', 
+        yaxis_title='Total Vendas (R$)',
+        hovermode='x unified',
+        xaxis=dict(tickangle=45, tickmode='array', tickvals=list(df_completo['REFERENCIA'])[::2]),
+        showlegend=True
+    )
+    return fig_line
+
+
+# =========================
+# Seção filtrada - depende de referência e período
+# =========================
+
+def barra_filtros():
+    """Formulário de filtros: os três campos são aplicados juntos ao enviar."""
+    with st.form("filtros_vendas", border=False):
+        colf1, colf2, colf3, colf4 = st.columns([2, 2, 2, 1])
+        with colf1:
+            referencia = st.text_input("Referência (YYYY/MM)",
+                                       value=st.session_state.get('referencia', datetime.now().strftime("%Y/%m")))
+        with colf2:
+            data_inicial = st.date_input("Data Inicial",
+                                         value=st.session_state.get('data_inicial', datetime.now().replace(day=1)))
+        with colf3:
+            data_final = st.date_input("Data Final",
+                                       value=st.session_state.get('data_final', datetime.now()))
+        with colf4:
+            st.write("")
+            aplicar = st.form_submit_button("Aplicar", use_container_width=True)
+
+    # primeira abertura: os valores padrão do formulário já valem
+    if aplicar or 'referencia' not in st.session_state:
+        st.session_state.referencia = referencia
+        st.session_state.data_inicial = data_inicial
+        st.session_state.data_final = data_final
+    return st.session_state.referencia, st.session_state.data_inicial, st.session_state.data_final
+
+
+@st.fragment
+def secao_filtrada(conn_data):
+    referencia, data_inicial, data_final = barra_filtros()
+    try:
+        # dia, semana ou mês conforme o período e o número de empresas (teto
+        # das séries, lido antes da consulta: uma contagem da tabela EMPRESA)
+        df_empresas, = carregar("vendas.empresas", conn_data, [pedido_empresas()])
+        granul = granularidade(data_inicial, data_final, grupos=int(df_empresas['QTD_EMPRESAS'].iloc[0]))
+        legenda_granularidade(granul, data_inicial, data_final)
+        pedidos = [pedido_vendas_filtrado(referencia, data_inicial, data_final, granul)]
+        df_filtrado, = carregar("vendas.filtrada", conn_data, pedidos)
+    except Exception as e:
+        st.error(f"Erro ao buscar dados: {e}")
+        return
+    # DATA é o início do balde (dia, semana ou mês)
+    df_filtrado = df_filtrado.rename(columns={coluna_tempo("vendas", granul): 'DATA'})
+
+    if df_filtrado.empty:
+        st.info("Nenhum dado encontrado para os filtros selecionados.")
+        return
+
+    # LINHA 2: Gráfico de Pizza e Métricas
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        st.subheader("🏢 Distribuição por Empresa - Mes Atual")
+        graficos.mostrar("vendas.distribuicao", df_filtrado[['RAZAO_SOCIAL', 'TOTAL_VENDA']],
+                         lambda: figura_distribuicao(df_filtrado),
+                         echarts=lambda _: graficos.opcoes_pizza(df_filtrado, 'RAZAO_SOCIAL', 'TOTAL_VENDA'))
+
+    with col2:
+        st.subheader("📊 Métricas - Mes Atual")
+        # linhas são baldes (dia, semana ou mês) por empresa: a contagem vem de NUM_VENDAS
+        total_vendas = df_filtrado['TOTAL_VENDA'].sum()
+        num_vendas = int(df_filtrado['NUM_VENDAS'].sum())
+        avg_vendas = total_vendas / num_vendas if num_vendas else 0.0
+        empresas = df_filtrado['RAZAO_SOCIAL'].nunique()
+
+        # Variação e sparkline lidas do histórico diário (ver historico_kpis.py)
+        variacao, serie = comparacao_vendas(conn_data, referencia, data_inicial, data_final, total_vendas)
+        st.metric("Total de Vendas", f"R$ {total_vendas:,.2f}",
+                  delta=f"{variacao:+.1f}% vs período anterior" if variacao is not None else None)
+        if serie:
+            st.markdown(historico_kpis.sparkline_svg(serie), unsafe_allow_html=True)
+        st.metric("Média por Venda", f"R$ {avg_vendas:,.2f}")
+        st.metric("Número de Vendas", f"{num_vendas:,}")
+        st.metric("Empresas", empresas)
+
+        # Adicionar algumas estatísticas adicionais
+        st.markdown("---")
+        st.markdown("**Período Selecionado:**")
+        st.write(f"Início: {data_inicial.strftime('%d/%m/%Y')}")
+        st.write(f"Fim: {data_final.strftime('%d/%m/%Y')}")
+        st.write(f"Referência: {referencia}")
+
+    # LINHA 3: Tabela Detalhada
+    st.subheader("📋 Detalhamento por Empresa")
+    df_detalhado = memo("vendas.detalhamento", entradas_dados(conn_data, pedidos),
+                        lambda: detalhamento(df_filtrado, data_inicial, data_final))
+
+    # Paginada no servidor; moeda e datas formatadas pelo column_config
+    tabelas.tabela_paginada(
+        "vendas_detalhamento", df_detalhado,
+        column_config={
+            'Total Vendas': tabelas.coluna_moeda(),
+            'Primeira Venda': st.column_config.DateColumn(format="DD/MM/YYYY"),
+            'Última Venda': st.column_config.DateColumn(format="DD/MM/YYYY"),
+        },
+        ordem=('Total Vendas', False),
+    )
+
+    # Exportação sob demanda, gerada em segundo plano (ver exportacao.py)
+    sql, params = instrucao_detalhe("vendas", (data_inicial, data_final), [("referencia", "like", f"{referencia}%")])
+    exportacao.painel_exportacao("vendas", "vendas", {
+        "Detalhamento por empresa": lambda: exportacao.lotes_df(df_detalhado),
+        "Linhas detalhadas (VW_BI_RELGERENCIAL_CUPOM_PREVENDA)": lambda: exportacao.lotes_sql(conn_data, sql, params),
+    })
+
+
+def comparacao_vendas(conn_data, referencia, data_inicial, data_final, total_vendas):
+    """
+    (variação % contra o período anterior, últimos dias fechados). O histórico
+    não filtra referência, então só compara quando a referência é o mês do período.
+    """
+    from database import chave_tenant
+
+    mes = data_inicial.strftime('%Y/%m')
+    if referencia != mes or data_final.strftime('%Y/%m') != mes:
+        return None, []
+
+    def calcular():
+        anteriores = historico_kpis.comparar(conn_data, data_inicial, data_final)
+        return anteriores.get("total_venda"), historico_kpis.serie(conn_data, "total_venda")
+
+    try:
+        anterior, serie = memo("vendas.comparacao",
+                               (chave_tenant(conn_data), str(data_inicial), str(data_final), date.today()), calcular)
+    except Exception:
+        return None, []
+    return historico_kpis.variacao(total_vendas, anterior), serie
+
+
+def figura_distribuicao(df_filtrado):
+    # Uma fatia por empresa (não uma linha por venda), maiores empresas + "Outros"
+    df_pie = graficos.top_n(df_filtrado, 'RAZAO_SOCIAL', 'TOTAL_VENDA')
+    fig_pie = px.pie(df_pie, names='RAZAO_SOCIAL', values='TOTAL_VENDA')
+    fig_pie.update_traces(
+        marker=dict(colors=px.colors.qualitative.Set3),
+        textinfo='percent+label',
+        hovertemplate='<b>%{label}</b><br>Total: R$ %{value:,.2f}<br>Percentual: %{percent}<extra></extra>'
+    )
+    fig_pie.update_layout(
+        height=400,
+        plot_bgcolor='#f5f5f5', 
+        paper_bgcolor='#f5f5f5',
+        showlegend=False
+    )
+    return fig_pie
+
+
+def detalhamento(df_filtrado, data_inicial, data_final):
+    df_detalhado = df_filtrado.groupby('RAZAO_SOCIAL', as_index=False).agg({
+        'TOTAL_VENDA': 'sum',
+        'DATA': ['min', 'max'],
+        'NUM_VENDAS': 'sum',
+    })
+
+    # Ajustar nomes das colunas
+    df_detalhado.columns = ['Empresa', 'Total Vendas', 'Primeira Venda', 'Última Venda', 'Qtd Vendas']
+    df_detalhado['Qtd Vendas'] = df_detalhado['Qtd Vendas'].astype(int)
+    # DATA é o início do balde: a semana ou o mês podem começar antes do período
+    inicio, fim = pd.Timestamp(data_inicial), pd.Timestamp(data_final)
+    df_detalhado['Primeira Venda'] = pd.to_datetime(df_detalhado['Primeira Venda']).clip(inicio, fim)
+    df_detalhado['Última Venda'] = pd.to_datetime(df_detalhado['Última Venda']).clip(inicio, fim)
+    return df_detalhado
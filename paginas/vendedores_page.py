@@ -0,0 +1,285 @@
+"""
+Página Vendedores: análise temporal, top performers, participação e dados
+detalhados dos últimos 13 meses.
+
+Importada só quando a página é aberta (ver app.py). Os dados vêm de uma
+única varredura (pedidos_vendedores) fora dos fragmentos; a análise é um
+fragmento com formulário de filtros (período e vendedores aplicados de uma
+vez), de modo que filtrar não reexecuta o app nem refaz as consultas.
+"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+from plotly.subplots import make_subplots
+
+import ativos
+import exportacao
+import graficos
+import tabelas
+
+from metricas import GRANULARIDADES, coluna_tempo, instrucao_detalhe, pedidos_vendedores
+from paginas.comum import carregar
+
+# Comparativo e tabela são mensais; 13 meses x vendedores já é um resultado limitado
+GRANULARIDADE = "mes"
+
+
+def show_vendedores_page(conn_data):
+    col1, col2 = st.columns([2,5])
+    with col1:
+        ativos.mostrar_logo(width=80)
+    with col2:
+        st.title("Análise de Vendas - Vendedores")
+        st.subheader('Analise ultimos 13 Meses')
+    try:
+        # Análise temporal (vendedor/mês) e % de participação saem da
+        # mesma varredura de VW_BI_VENDA_VENDEDORES (camada semântica)
+        df, df_part = carregar("vendedores", conn_data, pedidos_vendedores(granul=GRANULARIDADE))
+
+        # Coluna de data (início do balde) para ordenação
+        df = df.assign(DATA_REF=pd.to_datetime(df[coluna_tempo("vendedores", GRANULARIDADE)]))
+    except Exception as e:
+        st.error(f"Erro na análise temporal: {str(e)}")
+        return
+
+    st.caption(f"Granularidade: {GRANULARIDADES[GRANULARIDADE]['rotulo']}")
+    secao_analise(conn_data, df, df_part)
+
+
+# =========================
+# Filtros (formulário) e abas - depende dos dados e dos filtros
+# =========================
+
+def barra_filtros(df):
+    """Período e vendedores, aplicados juntos ao enviar o formulário."""
+    datas_disponiveis = sorted(df['DATA_REF'].dt.date.unique())
+    vendedores = sorted(df['NOME_VENDEDOR'].unique())
+    padrao = (
+        datas_disponiveis[0] if datas_disponiveis else None,
+        datas_disponiveis[-1] if datas_disponiveis else None,
+        vendedores[:5] if len(vendedores) > 5 else vendedores,
+    )
+    filtros = st.session_state.get('filtros_vendedores', padrao)
+
+    st.markdown("**🔧 Filtros de Análise**")
+    with st.form("filtros_vendedores_form", border=False):
+        col1, col2, col3, col4 = st.columns([2, 2, 5, 1])
+        data_min, data_max = filtros[0], filtros[1]
+        if len(datas_disponiveis) > 1:
+            with col1:
+                data_min = st.date_input(
+                    "Data inicial",
+                    value=min(max(filtros[0], datas_disponiveis[0]), datas_disponiveis[-1]),
+                    min_value=datas_disponiveis[0],
+                    max_value=datas_disponiveis[-1]
+                )
+            with col2:
+                data_max = st.date_input(
+                    "Data final",
+                    value=min(max(filtros[1], datas_disponiveis[0]), datas_disponiveis[-1]),
+                    min_value=datas_disponiveis[0],
+                    max_value=datas_disponiveis[-1]
+                )
+        with col3:
+            vendedores_selecionados = st.multiselect(
+                "Vendedores",
+                options=vendedores,
+                default=[v for v in filtros[2] if v in vendedores]
+            )
+        with col4:
+            st.write("")
+            aplicar = st.form_submit_button("Aplicar", use_container_width=True)
+
+    if aplicar:
+        filtros = (data_min, data_max, vendedores_selecionados)
+        st.session_state.filtros_vendedores = filtros
+    return filtros
+
+
+@st.fragment
+def secao_analise(conn_data, df, df_part):
+    data_min, data_max, vendedores_selecionados = barra_filtros(df)
+
+    if data_min is not None and data_max is not None:
+        df = df[(df['DATA_REF'] >= pd.to_datetime(data_min)) &
+            (df['DATA_REF'] <= pd.to_datetime(data_max))]
+    if vendedores_selecionados:
+        df = df[df['NOME_VENDEDOR'].isin(vendedores_selecionados)]
+
+    # Layout em abas para diferentes visualizações
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "📊 Comparativo Mensal",
+        "🔥 Top Performers",
+        "📊 % Participação",
+        "📋 Dados Detalhados"
+    ])
+
+    with tab1:
+        st.subheader("Comparativo Mensal")
+        comparativo_mensal(df)
+    with tab2:
+        st.subheader("Top Performers por Período")
+        top_performers(df)
+    with tab3:
+        st.subheader("% Participação das Vendas (Top 10 Vendedores)")
+        participacao(df_part)
+    with tab4:
+        st.subheader("Dados Detalhados")
+        dados_detalhados(df)
+        exportar(conn_data, df, data_min, data_max, vendedores_selecionados)
+
+
+def comparativo_mensal(df):
+    graficos.mostrar("vendedores.comparativo", df[['DATA_REF', 'VALOR_TOTAL', 'NOME_VENDEDOR']],
+                     lambda: figura_comparativo(df),
+                     echarts=lambda _: graficos.opcoes_barras(df, 'DATA_REF', 'VALOR_TOTAL', cor='NOME_VENDEDOR'))
+
+
+def figura_comparativo(df):
+    # Maiores vendedores do período + "Outros", para o número de barras não crescer com a equipe
+    df = graficos.top_n(df, 'NOME_VENDEDOR', 'VALOR_TOTAL', por=['DATA_REF'])
+    fig_barras = px.bar(
+        df.sort_values("DATA_REF"),
+        x='DATA_REF',
+        y='VALOR_TOTAL',
+        color='NOME_VENDEDOR',
+        barmode='group',
+        title='Comparativo Mensal de Vendas por Vendedor',
+        labels={'VALOR_TOTAL': 'Valor Total (R$)', 'DATA_REF': 'Mês/Ano'}
+    )
+    fig_barras.update_layout(
+        height=500,
+        xaxis_tickangle=-45,
+        xaxis=dict(tickformat="%Y-%m")
+    )
+    return fig_barras
+
+
+def top_performers(df):
+    df_top = df.groupby('NOME_VENDEDOR')['VALOR_TOTAL'].sum().reset_index()
+    df_top = df_top.sort_values('VALOR_TOTAL', ascending=False).head(10)
+    graficos.mostrar("vendedores.top", df_top, lambda: figura_top(df_top),
+                     echarts=lambda _: graficos.opcoes_barras(df_top, 'NOME_VENDEDOR', 'VALOR_TOTAL', horizontal=True))
+
+
+def figura_top(df_top):
+    fig_top = px.bar(
+        df_top,
+        x='VALOR_TOTAL',
+        y='NOME_VENDEDOR',
+        orientation='h',
+        title='Top 10 Vendedores (Valor Total no Período)',
+        labels={'VALOR_TOTAL': 'Valor Total (R$)', 'NOME_VENDEDOR': 'Vendedor'}
+    )
+    fig_top.update_layout(height=500)
+    return fig_top
+
+
+# Não depende dos filtros: usa o último mês de df_part
+def participacao(df_part):
+    # % de participação já calculada pela camada semântica
+    try:
+        # Último mês
+        ultimo_mes = df_part['REFERENCIA'].max()
+        df_mes = df_part[df_part['REFERENCIA'] == ultimo_mes]
+
+        # Top 10 vendedores
+        df_top10 = df_mes.sort_values('VALOR_TOTAL', ascending=False).head(10)
+        graficos.mostrar("vendedores.participacao", df_top10[['NOME_VENDEDOR', 'VALOR_TOTAL', 'PARTICIPACAO']],
+                         lambda: figura_participacao(df_top10, ultimo_mes), ultimo_mes=ultimo_mes)
+
+    except Exception as e:
+        st.error(f"Erro ao gerar gráfico de participação: {e}")
+
+
+def figura_participacao(df_top10, ultimo_mes):
+    # Gráfico com dois eixos
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    # Barra do VALOR_TOTAL
+    fig.add_trace(go.Bar(
+        x=df_top10["NOME_VENDEDOR"],
+        y=df_top10["VALOR_TOTAL"],
+        name="Total de Vendas (R$)",
+        marker_color="steelblue",
+        text=df_top10["VALOR_TOTAL"].apply(lambda v: f"R$ {v:,.0f}".replace(",", ".")),
+        textposition="outside"  # R$ aparece fora
+    ), secondary_y=False)
+
+    # Barra da PARTICIPACAO
+    fig.add_trace(go.Bar(
+        x=df_top10["NOME_VENDEDOR"],
+        y=df_top10["PARTICIPACAO"],
+        name="% Participação",
+        marker_color="#FDCCA0",
+        text=df_top10["PARTICIPACAO"].apply(lambda v: f"{v:.1f}%"),
+        textposition="inside"   # % aparece dentro da barra
+    ), secondary_y=True)
+
+    # Layout
+    fig.update_layout(
+        title=f"Top 10 Vendedores - {ultimo_mes}",
+        barmode="group",
+        height=550,
+        xaxis=dict(title="Vendedor"),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+    # Eixos separados
+    fig.update_yaxes(
+        title_text="Total de Vendas (R$)",
+        secondary_y=False,
+        tickprefix="R$ ",
+        separatethousands=True
+    )
+    fig.update_yaxes(
+        title_text="% Participação",
+        secondary_y=True,
+        ticksuffix="%",
+        showgrid=False
+    )
+    return fig
+
+
+def dados_detalhados(df):
+    pivot_df = tabela_detalhada(df)
+
+    # Só a página visível vai ao navegador; o formato de moeda fica no column_config
+    tabelas.tabela_paginada(
+        "vendedores_detalhados", pivot_df,
+        column_config={str(c): tabelas.coluna_moeda() for c in pivot_df.columns},
+        ordem=('TOTAL_PERIODO', False),
+    )
+
+
+def tabela_detalhada(df):
+    # Pivot table usando DATA_REF (ordenado)
+    pivot_df = df.pivot_table(
+        index='NOME_VENDEDOR',
+        columns=df['DATA_REF'].dt.strftime(GRANULARIDADES[GRANULARIDADE]["formato"]),
+        values='VALOR_TOTAL',
+        aggfunc='sum',
+        fill_value=0
+    ).round(2)
+
+    # Reordena colunas pelo tempo
+    pivot_df = pivot_df.reindex(sorted(pivot_df.columns), axis=1)
+
+    pivot_df['TOTAL_PERIODO'] = pivot_df.sum(axis=1)
+    return pivot_df.sort_values('TOTAL_PERIODO', ascending=False)
+
+
+def exportar(conn_data, df, data_min, data_max, vendedores_selecionados):
+    """Exportação sob demanda, gerada em segundo plano (ver exportacao.py)."""
+    filtros = [("vendedor", "in", vendedores_selecionados)] if vendedores_selecionados else []
+    periodo = None
+    if data_min is not None and data_max is not None:
+        # DATA_REF é o início do mês: o detalhe vai até o fim do mês final
+        periodo = (data_min, (pd.Timestamp(data_max) + pd.offsets.MonthEnd(0)).date())
+    sql, params = instrucao_detalhe("vendedores", periodo, filtros)
+
+    exportacao.painel_exportacao("vendedores", "analise_vendedores", {
+        "Tabela por vendedor e mês": lambda: exportacao.lotes_df(tabela_detalhada(df)),
+        "Linhas detalhadas (VW_BI_VENDA_VENDEDORES)": lambda: exportacao.lotes_sql(conn_data, sql, params),
+    })
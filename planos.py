@@ -0,0 +1,278 @@
+"""
+Diagnóstico de planos de execução e sugestão de índices por cliente.
+
+Prepara no banco do cliente todas as instruções que as páginas emitem
+(compiladas pela camada semântica a partir dos mesmos pedidos das páginas),
+captura o plano do Firebird de cada uma e aponta varreduras NATURAL em
+relações grandes. Para as colunas filtradas (período e filtros das páginas)
+que vêm de uma relação varrida sem índice, sugere o CREATE INDEX na tabela
+base. Cada sugestão pode ser aplicada pelo app_adm.py (menu "Planos de
+consulta"), que mede as instruções afetadas antes e depois.
+
+Linha de comando (só relatório, nada é criado):
+
+    python planos.py /dados/CLIENTE.FDB --host localhost --usuario SYSDBA --senha masterkey
+"""
+import os
+import re
+import time
+from datetime import date, datetime
+
+# Relações com pelo menos este número de linhas são consideradas grandes
+LIMIAR_LINHAS = int(os.environ.get("AZOUP_LIMIAR_NATURAL", "50000"))
+
+_NATURAL = re.compile(r"([\w$]+(?: [\w$]+)*) NATURAL")
+
+
+# =========================
+# Instruções da aplicação
+# =========================
+
+def _colunas_filtradas(pedido_):
+    """Colunas (da view/tabela da fonte) usadas no WHERE do pedido."""
+    from metricas import DIMENSOES, FONTES
+
+    fonte = FONTES[pedido_["fonte"]]
+    exprs = [fonte["data"]] if pedido_["periodo"] is not None else []
+    # NOT IN não usa índice
+    exprs += [DIMENSOES[pedido_["fonte"]][dim]["expr"] for dim, op, _ in pedido_["filtros"] if op != "not in"]
+    exprs.append(fonte.get("discriminador"))
+
+    relacao = fonte["tabela"].split()[0]
+    colunas = []
+    for expr in exprs:
+        # só referências diretas (ALIAS.COLUNA) podem usar índice
+        if expr and re.fullmatch(r"\w+\.\w+", expr):
+            colunas.append((relacao, expr.split(".")[1]))
+    return colunas
+
+
+def instrucoes(hoje=None, resumo=None):
+    """Instruções emitidas pelo Dashboard, Vendas e Vendedores, com parâmetros de hoje."""
+    from dashboard import pedidos_kpis
+    from metricas import compilar, pedido_empresas, pedidos_vendas, pedidos_vendedores
+
+    hoje = hoje or date.today()
+    paginas = {
+        "Dashboard": pedidos_kpis(hoje.replace(day=1), hoje),
+        "Vendas": [pedido_empresas()] + pedidos_vendas(hoje.strftime("%Y/%m"), hoje.replace(day=1), hoje, hoje=hoje),
+        "Vendedores": pedidos_vendedores(hoje=hoje),
+    }
+
+    resultado = []
+    for pagina, pedidos in paginas.items():
+        for item in compilar(pedidos, resumo=resumo):
+            colunas = []
+            for destino in item["destinos"]:
+                for coluna in _colunas_filtradas(pedidos[destino["pedido"]]):
+                    if coluna not in colunas:
+                        colunas.append(coluna)
+            resultado.append({"pagina": pagina, "sql": item["sql"], "params": item["params"],
+                              "colunas": colunas})
+    return resultado
+
+
+# =========================
+# Catálogo do banco do cliente
+# =========================
+
+def preparar_plano(conn, sql):
+    cur = conn.cursor()
+    try:
+        if hasattr(cur, "prep"):  # fdb
+            return cur.prep(sql).plan
+        with cur.prepare(sql) as preparada:  # firebird-driver
+            return preparada.plan
+    finally:
+        cur.close()
+
+
+def _tipo_relacao(cur, relacao):
+    """"view", "tabela" ou None (não é relação, ex.: alias de tabela derivada)."""
+    cur.execute("SELECT RDB$VIEW_BLR FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?", (relacao,))
+    linha = cur.fetchone()
+    if linha is None:
+        return None
+    return "view" if linha[0] is not None else "tabela"
+
+
+def _contextos(cur):
+    """Alias de contexto usado nas views -> relações base possíveis."""
+    cur.execute("""
+        SELECT TRIM(VR.RDB$CONTEXT_NAME), TRIM(VR.RDB$RELATION_NAME)
+        FROM RDB$VIEW_RELATIONS VR
+        JOIN RDB$RELATIONS R ON R.RDB$RELATION_NAME = VR.RDB$RELATION_NAME
+        WHERE R.RDB$VIEW_BLR IS NULL
+    """)
+    contextos = {}
+    for contexto, relacao in cur.fetchall():
+        contextos.setdefault(contexto, set()).add(relacao)
+    return contextos
+
+
+def origem_coluna(cur, relacao, coluna):
+    """Tabela base e coluna de origem de uma coluna de view (None se for expressão)."""
+    for _ in range(10):  # views aninhadas
+        cur.execute("""
+            SELECT TRIM(VR.RDB$RELATION_NAME), TRIM(RF.RDB$BASE_FIELD)
+            FROM RDB$RELATION_FIELDS RF
+            JOIN RDB$VIEW_RELATIONS VR
+              ON VR.RDB$VIEW_NAME = RF.RDB$RELATION_NAME AND VR.RDB$VIEW_CONTEXT = RF.RDB$VIEW_CONTEXT
+            WHERE RF.RDB$RELATION_NAME = ? AND RF.RDB$FIELD_NAME = ?
+        """, (relacao, coluna))
+        linha = cur.fetchone()
+        if linha is None:
+            return (relacao, coluna) if _tipo_relacao(cur, relacao) == "tabela" else None
+        relacao, coluna = linha
+    return None
+
+
+def indice_cobre(cur, relacao, coluna):
+    """Existe índice ativo cujo primeiro segmento é a coluna?"""
+    cur.execute("""
+        SELECT 1 FROM RDB$INDICES I
+        JOIN RDB$INDEX_SEGMENTS S ON S.RDB$INDEX_NAME = I.RDB$INDEX_NAME
+        WHERE I.RDB$RELATION_NAME = ? AND S.RDB$FIELD_NAME = ? AND S.RDB$FIELD_POSITION = 0
+          AND COALESCE(I.RDB$INDEX_INACTIVE, 0) = 0
+    """, (relacao, coluna))
+    return cur.fetchone() is not None
+
+
+def nome_indice(relacao, coluna):
+    return f"BI_IX_{relacao}_{coluna}"[:31]
+
+
+def medir(conn, sql, params=()):
+    """Executa a instrução até a última linha; devolve (ms, linhas)."""
+    cur = conn.cursor()
+    inicio = time.perf_counter()
+    cur.execute(sql, tuple(params))
+    linhas = len(cur.fetchall())
+    decorrido = (time.perf_counter() - inicio) * 1000
+    cur.close()
+    conn.commit()
+    return decorrido, linhas
+
+
+# =========================
+# Relatório
+# =========================
+
+def analisar(conn, medir_tempos=True, limiar=LIMIAR_LINHAS, hoje=None):
+    """
+    Relatório de planos do cliente:
+    {"gerado_em", "instrucoes": [...], "sugestoes": [...]}.
+    Com resumos BI provisionados, as instruções sobre os resumos também entram.
+    """
+    from provisionamento import situacao
+
+    cur = conn.cursor()
+    catalogo = instrucoes(hoje)
+    resumo = situacao(conn)
+    if resumo and resumo["desde"] and resumo["ate"]:
+        vistas = {item["sql"] for item in catalogo}
+        com_resumo = instrucoes(hoje, {"desde": resumo["desde"].isoformat(), "ate": resumo["ate"].isoformat()})
+        catalogo += [item for item in com_resumo if item["sql"] not in vistas]
+
+    contextos = _contextos(cur)
+    tamanhos = {}
+
+    def _linhas(relacao):
+        if relacao not in tamanhos:
+            cur.execute(f'SELECT COUNT(*) FROM "{relacao}"')
+            tamanhos[relacao] = cur.fetchone()[0]
+        return tamanhos[relacao]
+
+    sugestoes = {}
+    for i, item in enumerate(catalogo):
+        item["plano"] = preparar_plano(conn, item["sql"])
+        item["naturais"] = []
+        for trecho in _NATURAL.findall(item["plano"] or ""):
+            contexto = trecho.split()[-1]
+            relacoes = contextos.get(contexto) or (
+                {contexto} if _tipo_relacao(cur, contexto) == "tabela" else set()
+            )
+            for relacao in sorted(relacoes):
+                linhas = _linhas(relacao)
+                item["naturais"].append({"contexto": trecho, "relacao": relacao, "linhas": linhas,
+                                         "grande": linhas >= limiar})
+
+        grandes = {n["relacao"] for n in item["naturais"] if n["grande"]}
+        for relacao, coluna in item["colunas"]:
+            origem = origem_coluna(cur, relacao, coluna)
+            if origem is None or origem[0] not in grandes or indice_cobre(cur, *origem):
+                continue
+            sugestao = sugestoes.setdefault(origem, {
+                "relacao": origem[0],
+                "coluna": origem[1],
+                "ddl": f"CREATE INDEX {nome_indice(*origem)} ON {origem[0]} ({origem[1]})",
+                "instrucoes": [],
+                "aplicada": False,
+            })
+            sugestao["instrucoes"].append(i)
+
+        if medir_tempos:
+            item["antes_ms"], item["linhas"] = medir(conn, item["sql"], item["params"])
+
+    cur.close()
+    return {
+        "gerado_em": datetime.now(),
+        "instrucoes": catalogo,
+        "sugestoes": list(sugestoes.values()),
+    }
+
+
+def aplicar_sugestao(conn, relatorio, sugestao):
+    """Cria o índice sugerido e mede de novo as instruções afetadas."""
+    cur = conn.cursor()
+    cur.execute(sugestao["ddl"])
+    conn.commit()
+    cur.close()
+
+    sugestao["aplicada"] = True
+    for i in sugestao["instrucoes"]:
+        item = relatorio["instrucoes"][i]
+        item["plano_depois"] = preparar_plano(conn, item["sql"])
+        item["depois_ms"], _ = medir(conn, item["sql"], item["params"])
+    return relatorio
+
+
+def formatar(relatorio):
+    linhas = [f"Relatório de planos - {relatorio['gerado_em']:%d/%m/%Y %H:%M}", ""]
+    for i, item in enumerate(relatorio["instrucoes"]):
+        tempo = f"{item['antes_ms']:.0f} ms, {item['linhas']} linhas" if "antes_ms" in item else "não medido"
+        linhas.append(f"[{i}] {item['pagina']} ({tempo})")
+        linhas.append(f"    {item['sql']}")
+        linhas.append(f"    {item['plano']}")
+        for natural in item["naturais"]:
+            marca = "!!" if natural["grande"] else "  "
+            linhas.append(f"    {marca} NATURAL {natural['relacao']} ({natural['linhas']} linhas)")
+        linhas.append("")
+    if relatorio["sugestoes"]:
+        linhas.append("Índices sugeridos:")
+        for sugestao in relatorio["sugestoes"]:
+            afetadas = ", ".join(str(i) for i in sugestao["instrucoes"])
+            linhas.append(f"    {sugestao['ddl']};  -- instruções {afetadas}")
+    else:
+        linhas.append("Nenhum índice sugerido.")
+    return "\n".join(linhas)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import conectar_firebird
+
+    parser = argparse.ArgumentParser(description="Planos de execução das instruções BI de um cliente")
+    parser.add_argument("caminho", help="caminho do banco no servidor")
+    parser.add_argument("--host", default="", help="vazio para conexão local")
+    parser.add_argument("--porta", default="3050")
+    parser.add_argument("--usuario", default="SYSDBA")
+    parser.add_argument("--senha", default="masterkey")
+    parser.add_argument("--sem-tempos", action="store_true", help="só prepara, não executa as instruções")
+    args = parser.parse_args()
+
+    conn_data = {"host": args.host, "porta": args.porta, "database": args.caminho,
+                 "user": args.usuario, "password": args.senha}
+    with conectar_firebird(conn_data) as conn:
+        print(formatar(analisar(conn, medir_tempos=not args.sem_tempos)))
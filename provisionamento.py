@@ -0,0 +1,466 @@
+"""
+Tabelas de resumo BI provisionadas no banco de cada cliente.
+
+As views BI (VW_KPI_BI, VW_BI_RELGERENCIAL_CUPOM_PREVENDA,
+VW_BI_VENDA_VENDEDORES) são recalculadas a cada leitura. Este módulo
+instala, versiona e mantém no banco do cliente tabelas de resumo diárias e
+mensais, mais a procedure BI_ATUALIZA_RESUMOS que as recalcula para um
+período. É executado por cliente a partir do app_adm.py (menu "Resumos BI")
+e pelo lote noturno.
+
+As tabelas de resumo mantêm os nomes de coluna das views, então a camada
+semântica (metricas.py) só troca a origem do FROM: dias até ATUALIZADO_ATE
+vêm dos resumos (meses fechados da tabela mensal quando o período está
+alinhado ao mês) e dias posteriores continuam vindo da view, via UNION ALL.
+Sem resumo provisionado (ou com versão diferente) as páginas usam as views.
+"""
+import threading
+import time
+from datetime import date, timedelta
+
+# Incrementar sempre que a estrutura abaixo mudar
+VERSAO = 2
+
+TABELAS = {
+    "BI_RESUMO_VERSAO": {
+        "colunas": [
+            ("ID", "SMALLINT NOT NULL PRIMARY KEY"),
+            ("VERSAO", "INTEGER"),
+            ("PROVISIONADO_EM", "TIMESTAMP"),
+            ("ATUALIZADO_EM", "TIMESTAMP"),
+            ("CARREGADO_DESDE", "DATE"),
+            ("ATUALIZADO_ATE", "DATE"),
+        ],
+        "indices": [],
+    },
+    "BI_RESUMO_KPI_DIA": {
+        "colunas": [
+            ("DATA", "DATE NOT NULL"),
+            ("TIPO", "VARCHAR(60) NOT NULL"),
+            ("VALOR", "NUMERIC(18,4)"),
+        ],
+        "indices": [("BI_RESUMO_KPI_DIA_IDX", "DATA, TIPO")],
+    },
+    "BI_RESUMO_VENDA_DIA": {
+        "colunas": [
+            ("DATA", "DATE NOT NULL"),
+            ("REFERENCIA", "VARCHAR(20)"),
+            ("EMPRESA_VENDA", "INTEGER"),
+            ("TOTAL_VENDA", "NUMERIC(18,2)"),
+            ("QTD_VENDAS", "INTEGER"),
+        ],
+        "indices": [("BI_RESUMO_VENDA_DIA_IDX", "DATA")],
+    },
+    "BI_RESUMO_VENDA_MES": {
+        "colunas": [
+            ("DATA", "DATE NOT NULL"),  # primeiro dia do mês
+            ("REFERENCIA", "VARCHAR(20)"),
+            ("EMPRESA_VENDA", "INTEGER"),
+            ("TOTAL_VENDA", "NUMERIC(18,2)"),
+            ("QTD_VENDAS", "INTEGER"),
+        ],
+        "indices": [("BI_RESUMO_VENDA_MES_IDX", "DATA")],
+    },
+    "BI_RESUMO_VENDEDOR_DIA": {
+        "colunas": [
+            ("DATA_REFERENCIA", "DATE NOT NULL"),
+            ("REFERENCIA", "VARCHAR(20)"),
+            ("NOME_VENDEDOR", "VARCHAR(100)"),
+            ("VALOR_TOTAL", "NUMERIC(18,2)"),
+            ("QTD_VENDAS", "INTEGER"),
+        ],
+        "indices": [("BI_RESUMO_VENDEDOR_DIA_IDX", "DATA_REFERENCIA")],
+    },
+    "BI_RESUMO_VENDEDOR_MES": {
+        "colunas": [
+            ("DATA_REFERENCIA", "DATE NOT NULL"),  # primeiro dia do mês
+            ("REFERENCIA", "VARCHAR(20)"),
+            ("NOME_VENDEDOR", "VARCHAR(100)"),
+            ("VALOR_TOTAL", "NUMERIC(18,2)"),
+            ("QTD_VENDAS", "INTEGER"),
+        ],
+        "indices": [("BI_RESUMO_VENDEDOR_MES_IDX", "DATA_REFERENCIA")],
+    },
+}
+
+PROCEDURE = "BI_ATUALIZA_RESUMOS"
+
+# Corpo da procedure (texto após AS, como fica em RDB$PROCEDURE_SOURCE)
+_CORPO_PROCEDURE = """
+DECLARE VARIABLE MES_INI DATE;
+DECLARE VARIABLE MES_FIM DATE;
+BEGIN
+  MES_INI = DATEADD(DAY, 1 - EXTRACT(DAY FROM :DATA_INI), :DATA_INI);
+  MES_FIM = DATEADD(MONTH, 1, DATEADD(DAY, 1 - EXTRACT(DAY FROM :DATA_FIM), :DATA_FIM));
+
+  DELETE FROM BI_RESUMO_KPI_DIA WHERE DATA BETWEEN :DATA_INI AND :DATA_FIM;
+  INSERT INTO BI_RESUMO_KPI_DIA (DATA, TIPO, VALOR)
+    SELECT CAST(K.DATA AS DATE), K.TIPO, SUM(K.VALOR)
+    FROM VW_KPI_BI K
+    WHERE K.DATA BETWEEN :DATA_INI AND :DATA_FIM
+    GROUP BY CAST(K.DATA AS DATE), K.TIPO;
+
+  DELETE FROM BI_RESUMO_VENDA_DIA WHERE DATA BETWEEN :DATA_INI AND :DATA_FIM;
+  INSERT INTO BI_RESUMO_VENDA_DIA (DATA, REFERENCIA, EMPRESA_VENDA, TOTAL_VENDA, QTD_VENDAS)
+    SELECT CAST(V.DATA AS DATE), V.REFERENCIA, V.EMPRESA_VENDA, SUM(CAST(V.TOTAL_VENDA AS DECIMAL(18,2))), COUNT(*)
+    FROM VW_BI_RELGERENCIAL_CUPOM_PREVENDA V
+    WHERE V.DATA BETWEEN :DATA_INI AND :DATA_FIM
+    GROUP BY CAST(V.DATA AS DATE), V.REFERENCIA, V.EMPRESA_VENDA;
+
+  DELETE FROM BI_RESUMO_VENDA_MES WHERE DATA >= :MES_INI AND DATA < :MES_FIM;
+  INSERT INTO BI_RESUMO_VENDA_MES (DATA, REFERENCIA, EMPRESA_VENDA, TOTAL_VENDA, QTD_VENDAS)
+    SELECT DATEADD(DAY, 1 - EXTRACT(DAY FROM D.DATA), D.DATA), D.REFERENCIA, D.EMPRESA_VENDA,
+           SUM(D.TOTAL_VENDA), SUM(D.QTD_VENDAS)
+    FROM BI_RESUMO_VENDA_DIA D
+    WHERE D.DATA >= :MES_INI AND D.DATA < :MES_FIM
+    GROUP BY DATEADD(DAY, 1 - EXTRACT(DAY FROM D.DATA), D.DATA), D.REFERENCIA, D.EMPRESA_VENDA;
+
+  DELETE FROM BI_RESUMO_VENDEDOR_DIA WHERE DATA_REFERENCIA BETWEEN :DATA_INI AND :DATA_FIM;
+  INSERT INTO BI_RESUMO_VENDEDOR_DIA (DATA_REFERENCIA, REFERENCIA, NOME_VENDEDOR, VALOR_TOTAL, QTD_VENDAS)
+    SELECT CAST(VV.DATA_REFERENCIA AS DATE), VV.REFERENCIA, VV.NOME_VENDEDOR,
+           SUM(CAST(VV.VALOR_TOTAL AS DECIMAL(18,2))), COUNT(*)
+    FROM VW_BI_VENDA_VENDEDORES VV
+    WHERE VV.DATA_REFERENCIA BETWEEN :DATA_INI AND :DATA_FIM
+    GROUP BY CAST(VV.DATA_REFERENCIA AS DATE), VV.REFERENCIA, VV.NOME_VENDEDOR;
+
+  DELETE FROM BI_RESUMO_VENDEDOR_MES WHERE DATA_REFERENCIA >= :MES_INI AND DATA_REFERENCIA < :MES_FIM;
+  INSERT INTO BI_RESUMO_VENDEDOR_MES (DATA_REFERENCIA, REFERENCIA, NOME_VENDEDOR, VALOR_TOTAL, QTD_VENDAS)
+    SELECT DATEADD(DAY, 1 - EXTRACT(DAY FROM D.DATA_REFERENCIA), D.DATA_REFERENCIA), D.REFERENCIA, D.NOME_VENDEDOR,
+           SUM(D.VALOR_TOTAL), SUM(D.QTD_VENDAS)
+    FROM BI_RESUMO_VENDEDOR_DIA D
+    WHERE D.DATA_REFERENCIA >= :MES_INI AND D.DATA_REFERENCIA < :MES_FIM
+    GROUP BY DATEADD(DAY, 1 - EXTRACT(DAY FROM D.DATA_REFERENCIA), D.DATA_REFERENCIA), D.REFERENCIA, D.NOME_VENDEDOR;
+END
+""".strip()
+
+
+def ddl_tabela(nome):
+    colunas = ",\n  ".join(f"{coluna} {tipo}" for coluna, tipo in TABELAS[nome]["colunas"])
+    return f"CREATE TABLE {nome} (\n  {colunas}\n)"
+
+
+def ddl_procedure():
+    return f"CREATE OR ALTER PROCEDURE {PROCEDURE} (DATA_INI DATE, DATA_FIM DATE)\nAS\n{_CORPO_PROCEDURE}"
+
+
+def script_completo():
+    """DDL completo, para conferência no app_adm."""
+    partes = [ddl_tabela(nome) + ";" for nome in TABELAS]
+    for nome, tabela in TABELAS.items():
+        partes += [f"CREATE INDEX {indice} ON {nome} ({colunas});" for indice, colunas in tabela["indices"]]
+    partes.append("SET TERM ^ ;\n" + ddl_procedure() + "^\nSET TERM ; ^")
+    return "\n\n".join(partes)
+
+
+# =========================
+# Inspeção do banco do cliente
+# =========================
+
+def _normalizar(sql):
+    return " ".join((sql or "").upper().split())
+
+
+def _colunas_existentes(cur, tabela):
+    cur.execute(
+        "SELECT TRIM(RDB$FIELD_NAME) FROM RDB$RELATION_FIELDS WHERE RDB$RELATION_NAME = ?", (tabela,)
+    )
+    return [linha[0] for linha in cur.fetchall()]
+
+
+def _indices_existentes(cur, tabela):
+    cur.execute("SELECT TRIM(RDB$INDEX_NAME) FROM RDB$INDICES WHERE RDB$RELATION_NAME = ?", (tabela,))
+    return {linha[0] for linha in cur.fetchall()}
+
+
+def _versao_registrada(cur):
+    try:
+        cur.execute(
+            "SELECT VERSAO, CARREGADO_DESDE, ATUALIZADO_ATE, ATUALIZADO_EM FROM BI_RESUMO_VERSAO WHERE ID = 1"
+        )
+        return cur.fetchone()
+    except Exception:
+        return None
+
+
+def verificar_divergencias(conn):
+    """Lista as diferenças entre o banco do cliente e a estrutura esperada."""
+    cur = conn.cursor()
+    divergencias = []
+
+    for nome, tabela in TABELAS.items():
+        existentes = _colunas_existentes(cur, nome)
+        if not existentes:
+            divergencias.append(f"Tabela {nome} ausente")
+            continue
+        esperadas = [coluna for coluna, _ in tabela["colunas"]]
+        for coluna in esperadas:
+            if coluna not in existentes:
+                divergencias.append(f"Coluna {nome}.{coluna} ausente")
+        for coluna in existentes:
+            if coluna not in esperadas:
+                divergencias.append(f"Coluna {nome}.{coluna} não faz parte da versão {VERSAO}")
+        indices = _indices_existentes(cur, nome)
+        for indice, _ in tabela["indices"]:
+            if indice not in indices:
+                divergencias.append(f"Índice {indice} ausente")
+
+    cur.execute("SELECT RDB$PROCEDURE_SOURCE FROM RDB$PROCEDURES WHERE RDB$PROCEDURE_NAME = ?", (PROCEDURE,))
+    linha = cur.fetchone()
+    if not linha:
+        divergencias.append(f"Procedure {PROCEDURE} ausente")
+    elif _normalizar(linha[0]) != _normalizar(_CORPO_PROCEDURE):
+        divergencias.append(f"Procedure {PROCEDURE} alterada em relação à versão {VERSAO}")
+
+    versao = _versao_registrada(cur)
+    if not versao:
+        divergencias.append("Versão dos resumos não registrada")
+    else:
+        if versao[0] != VERSAO:
+            divergencias.append(f"Versão registrada {versao[0]}, esperada {VERSAO}")
+        if versao[2] is None:
+            divergencias.append("Resumos nunca carregados")
+        elif versao[2] < date.today() - timedelta(days=2):
+            divergencias.append(f"Resumos desatualizados: carregados até {versao[2].strftime('%d/%m/%Y')}")
+
+    cur.close()
+    return divergencias
+
+
+def situacao(conn):
+    """Versão registrada e período carregado (ou None se não provisionado)."""
+    cur = conn.cursor()
+    versao = _versao_registrada(cur)
+    cur.close()
+    if not versao:
+        return None
+    return {"versao": versao[0], "desde": versao[1], "ate": versao[2], "atualizado_em": versao[3]}
+
+
+# =========================
+# Provisionamento e carga
+# =========================
+
+def provisionar(conn, carregar_desde=None):
+    """
+    Cria/atualiza tabelas, índices e procedure e registra a versão. Se a
+    versão registrada for diferente, o período carregado é descartado (os
+    resumos precisam ser recalculados). Devolve a lista de ações executadas.
+    """
+    cur = conn.cursor()
+    acoes = []
+
+    for nome, tabela in TABELAS.items():
+        existentes = _colunas_existentes(cur, nome)
+        if not existentes:
+            cur.execute(ddl_tabela(nome))
+            acoes.append(f"Tabela {nome} criada")
+        else:
+            for coluna, tipo in tabela["colunas"]:
+                if coluna not in existentes:
+                    cur.execute(f"ALTER TABLE {nome} ADD {coluna} {tipo.replace(' PRIMARY KEY', '')}")
+                    acoes.append(f"Coluna {nome}.{coluna} adicionada")
+        conn.commit()
+
+        indices = _indices_existentes(cur, nome)
+        for indice, colunas in tabela["indices"]:
+            if indice not in indices:
+                cur.execute(f"CREATE INDEX {indice} ON {nome} ({colunas})")
+                acoes.append(f"Índice {indice} criado")
+        conn.commit()
+
+    cur.execute(ddl_procedure())
+    acoes.append(f"Procedure {PROCEDURE} instalada")
+    conn.commit()
+
+    versao = _versao_registrada(cur)
+    if versao and versao[0] == VERSAO:
+        cur.execute("UPDATE BI_RESUMO_VERSAO SET PROVISIONADO_EM = CURRENT_TIMESTAMP WHERE ID = 1")
+    else:
+        cur.execute(
+            "UPDATE OR INSERT INTO BI_RESUMO_VERSAO (ID, VERSAO, PROVISIONADO_EM, CARREGADO_DESDE, ATUALIZADO_ATE) "
+            "VALUES (1, ?, CURRENT_TIMESTAMP, NULL, NULL) MATCHING (ID)",
+            (VERSAO,),
+        )
+        acoes.append(f"Versão {VERSAO} registrada")
+    conn.commit()
+    cur.close()
+
+    if carregar_desde:
+        de, ate = atualizar_resumos(conn, carregar_desde)
+        acoes.append(f"Resumos carregados de {de.strftime('%d/%m/%Y')} a {ate.strftime('%d/%m/%Y')}")
+    return acoes
+
+
+def _inicio_mes(dia):
+    return dia.replace(day=1)
+
+
+def atualizar_resumos(conn, inicio, fim=None):
+    """
+    Recalcula os resumos de `inicio` até `fim` (padrão: ontem, último dia
+    fechado), mês a mês para limitar o tamanho de cada transação. O período
+    é estendido quando necessário para manter a faixa carregada contínua.
+    """
+    fim = fim or date.today() - timedelta(days=1)
+    cur = conn.cursor()
+    versao = _versao_registrada(cur)
+    if not versao or versao[0] != VERSAO:
+        cur.close()
+        raise RuntimeError("Resumos BI não provisionados nesta versão; execute o provisionamento antes.")
+
+    desde, ate = versao[1], versao[2]
+    if ate is not None:
+        inicio = min(inicio, ate + timedelta(days=1))
+        fim = max(fim, desde - timedelta(days=1))
+
+    dia = inicio
+    while dia <= fim:
+        proximo_mes = (_inicio_mes(dia) + timedelta(days=32)).replace(day=1)
+        ultimo = min(fim, proximo_mes - timedelta(days=1))
+        cur.execute(f"EXECUTE PROCEDURE {PROCEDURE}(?, ?)", (dia, ultimo))
+        conn.commit()
+        dia = proximo_mes
+
+    novo_desde = min(inicio, desde) if desde else inicio
+    novo_ate = max(fim, ate) if ate else fim
+    cur.execute(
+        "UPDATE BI_RESUMO_VERSAO SET ATUALIZADO_EM = CURRENT_TIMESTAMP, CARREGADO_DESDE = ?, ATUALIZADO_ATE = ? "
+        "WHERE ID = 1",
+        (novo_desde, novo_ate),
+    )
+    conn.commit()
+    cur.close()
+    return novo_desde, novo_ate
+
+
+# =========================
+# Uso pela camada semântica
+# =========================
+
+_cache_resumo = {}
+_cache_lock = threading.Lock()
+_TTL_RESUMO = 600
+
+
+def resumo_ativo(conn_data, consultar=None):
+    """
+    Período coberto pelos resumos do tenant ({"desde", "ate"} em ISO) ou None.
+    Consultado no máximo a cada 10 minutos por tenant.
+    """
+    from database import chave_tenant, executar_consulta
+
+    tenant = chave_tenant(conn_data)
+    with _cache_lock:
+        item = _cache_resumo.get(tenant)
+    if item and item[0] > time.time():
+        return item[1]
+
+    resumo = None
+    try:
+        df = (consultar or executar_consulta)(
+            conn_data,
+            "SELECT VERSAO, CARREGADO_DESDE, ATUALIZADO_ATE FROM BI_RESUMO_VERSAO WHERE ID = 1",
+            (),
+        )
+        if not df.empty:
+            versao, desde, ate = df.iloc[0]["VERSAO"], df.iloc[0]["CARREGADO_DESDE"], df.iloc[0]["ATUALIZADO_ATE"]
+            if versao == VERSAO and desde is not None and ate is not None:
+                resumo = {"desde": str(desde)[:10], "ate": str(ate)[:10]}
+    except Exception:
+        resumo = None
+
+    with _cache_lock:
+        _cache_resumo[tenant] = (time.time() + _TTL_RESUMO, resumo)
+    return resumo
+
+
+def esquecer_resumo(conn_data):
+    from database import chave_tenant
+
+    with _cache_lock:
+        _cache_resumo.pop(chave_tenant(conn_data), None)
+
+
+# Colunas de cada fonte nas tabelas de resumo e na view (ramo após ATUALIZADO_ATE).
+# As junções declaradas em metricas.FONTES continuam valendo sobre o alias.
+_UNIOES = {
+    "kpi": {
+        "alias": "K",
+        "data": "DATA",
+        "dia": "BI_RESUMO_KPI_DIA",
+        "mes": None,
+        "colunas": "DATA, TIPO, VALOR",
+        "view": "SELECT CAST(X.DATA AS DATE), X.TIPO, CAST(X.VALOR AS NUMERIC(18,4)) FROM VW_KPI_BI X",
+        "metricas": {},
+    },
+    "vendas": {
+        "alias": "V",
+        "data": "DATA",
+        "dia": "BI_RESUMO_VENDA_DIA",
+        "mes": "BI_RESUMO_VENDA_MES",
+        "colunas": "DATA, REFERENCIA, EMPRESA_VENDA, TOTAL_VENDA, QTD_VENDAS",
+        "view": (
+            "SELECT CAST(X.DATA AS DATE), X.REFERENCIA, X.EMPRESA_VENDA, CAST(X.TOTAL_VENDA AS DECIMAL(18,2)), "
+            "CAST(1 AS INTEGER) FROM VW_BI_RELGERENCIAL_CUPOM_PREVENDA X"
+        ),
+        "metricas": {"num_vendas": {"expr": "V.QTD_VENDAS", "agregacao": "SUM"}},
+    },
+    "vendedores": {
+        "alias": "VV",
+        "data": "DATA_REFERENCIA",
+        "dia": "BI_RESUMO_VENDEDOR_DIA",
+        "mes": "BI_RESUMO_VENDEDOR_MES",
+        "colunas": "DATA_REFERENCIA, REFERENCIA, NOME_VENDEDOR, VALOR_TOTAL, QTD_VENDAS",
+        "view": (
+            "SELECT CAST(X.DATA_REFERENCIA AS DATE), X.REFERENCIA, X.NOME_VENDEDOR, "
+            "CAST(X.VALOR_TOTAL AS DECIMAL(18,2)), CAST(1 AS INTEGER) FROM VW_BI_VENDA_VENDEDORES X"
+        ),
+        "metricas": {"qtd_vendas": {"expr": "VV.QTD_VENDAS", "agregacao": "SUM"}},
+    },
+}
+
+
+def _periodo_mensal(pedido_):
+    from metricas import FONTES
+
+    inicio, fim = (date.fromisoformat(d[:10]) for d in pedido_["periodo"])
+    fonte = FONTES[pedido_["fonte"]]
+    # dimensões que precisam do dia (a semana pode atravessar o mês)
+    diarias = {fonte["dimensao_data"], fonte.get("granularidades", {}).get("semana")}
+    usadas = set(pedido_["dimensoes"]) | {f[0] for f in pedido_["filtros"]}
+    fim_do_mes = (fim + timedelta(days=1)).day == 1
+    return inicio.day == 1 and (fim_do_mes or fim >= date.today()) and not (diarias & usadas)
+
+
+def fonte_resumida(pedido_, resumo):
+    """Variante física (FROM + parâmetros) que lê dos resumos, ou None."""
+    uniao = _UNIOES.get(pedido_["fonte"])
+    if uniao is None or pedido_["periodo"] is None:
+        return None
+    if pedido_["periodo"][0][:10] < resumo["desde"]:
+        return None
+
+    ate = date.fromisoformat(resumo["ate"])
+    data = uniao["data"]
+    view = f"{uniao['view']} WHERE X.{data} > ?"
+
+    if uniao["mes"] and _periodo_mensal(pedido_):
+        corte_mes = _inicio_mes(ate + timedelta(days=1))
+        ramos = (
+            f"SELECT {uniao['colunas']} FROM {uniao['mes']} WHERE {data} < ? "
+            f"UNION ALL SELECT {uniao['colunas']} FROM {uniao['dia']} WHERE {data} >= ? AND {data} <= ? "
+            f"UNION ALL {view}"
+        )
+        params = (corte_mes.isoformat(), corte_mes.isoformat(), ate.isoformat(), ate.isoformat())
+        nome = f"{uniao['mes']}@{resumo['ate']}"
+    else:
+        ramos = f"SELECT {uniao['colunas']} FROM {uniao['dia']} WHERE {data} <= ? UNION ALL {view}"
+        params = (ate.isoformat(), ate.isoformat())
+        nome = f"{uniao['dia']}@{resumo['ate']}"
+
+    return {
+        "nome": nome,
+        "tabela": f"({ramos}) {uniao['alias']}",
+        "params": params,
+        "metricas": uniao["metricas"],
+    }
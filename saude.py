@@ -0,0 +1,250 @@
+"""
+Sondagem de saúde da frota: todos os bancos Firebird dos clientes ativos.
+
+A única verificação de conectividade era test_firebird_connection, um
+cliente por vez (no login ou no expander do Dashboard). Aqui cada cliente
+ativo do diretório é sondado em paralelo, em um pool limitado
+(AZOUP_SAUDE_THREADS, padrão 16), e cada sondagem mede:
+
+- ms_conexao: abrir a conexão;
+- ms_consulta: uma consulta trivial (SELECT 1 FROM RDB$DATABASE);
+- ms_<fonte>: uma contagem dos últimos DIAS_VIEWS dias em cada view BI
+  principal (as fontes com data da camada semântica).
+
+As views passam pelo governador do servidor, como as consultas das
+páginas, para que a sondagem não sature um host compartilhado. O limite
+AZOUP_SAUDE_TIMEOUT (segundos, padrão 60) vale para cada sondagem, contado
+a partir do momento em que ela começa a rodar no pool (a espera na fila do
+pool não conta): a que passa dele é registrada como tempo esgotado e segue
+em segundo plano. Se todas as threads ficam presas em sondagens esgotadas
+(hosts que não respondem), as que nem começaram são registradas como não
+sondadas (NAO_SONDADO), que não contam como falha nem entram em
+degradados().
+
+Cada rodada é gravada no armazém local (tabela saude_sondagens), o que
+permite os gráficos de tendência por host e a comparação de cada sondagem
+com a mediana do histórico do próprio cliente (degradados()).
+
+`conectar` pode ser trocado (ex.: bancos locais de teste com host vazio).
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+
+import armazem
+import telemetria
+
+THREADS = int(os.environ.get("AZOUP_SAUDE_THREADS", "16"))
+TIMEOUT = float(os.environ.get("AZOUP_SAUDE_TIMEOUT", "60"))
+DIAS_VIEWS = 7
+# Sondagem acima deste múltiplo da mediana do histórico do cliente = degradado
+FATOR_DEGRADADO = 2.0
+NAO_SONDADO = "não sondado"
+
+VIEWS = ["kpi", "vendas", "vendedores"]
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS saude_sondagens (
+    rodada TEXT NOT NULL,
+    momento TEXT NOT NULL,
+    cliente_id TEXT,
+    api TEXT,
+    nome TEXT,
+    host TEXT,
+    ok INTEGER NOT NULL,
+    erro TEXT,
+    ms_conexao REAL,
+    ms_consulta REAL,
+    ms_kpi REAL,
+    ms_vendas REAL,
+    ms_vendedores REAL
+);
+CREATE INDEX IF NOT EXISTS ix_saude_momento ON saude_sondagens (momento);
+CREATE INDEX IF NOT EXISTS ix_saude_api ON saude_sondagens (api, momento);
+"""
+
+
+def _instrucoes_views(hoje=None):
+    from metricas import FONTES
+
+    desde = (hoje or date.today()) - timedelta(days=DIAS_VIEWS)
+    return {
+        fonte: (f"SELECT COUNT(*) FROM {FONTES[fonte]['tabela']} WHERE {FONTES[fonte]['data']} >= ?", (desde,))
+        for fonte in VIEWS
+    }
+
+
+def _ms(inicio):
+    return round((time.perf_counter() - inicio) * 1000, 1)
+
+
+def sondar(conn_data, conectar=None, views=None):
+    """Tempos de um banco (dict com ok, erro e ms_*); não propaga exceções."""
+    from database import chave_host, chave_tenant, conectar_firebird
+    from governador import obter_governador
+
+    conectar = conectar or conectar_firebird
+    views = _instrucoes_views() if views is None else views
+    resultado = {"ok": 0, "erro": None, "ms_conexao": None, "ms_consulta": None}
+    resultado.update({f"ms_{fonte}": None for fonte in VIEWS})
+
+    inicio = time.perf_counter()
+    try:
+        conn = conectar(conn_data)
+    except Exception as e:
+        resultado["erro"] = f"conexão: {e}"
+        return resultado
+    resultado["ms_conexao"] = _ms(inicio)
+    try:
+        cur = conn.cursor()
+        inicio = time.perf_counter()
+        cur.execute("SELECT 1 FROM RDB$DATABASE")
+        cur.fetchall()
+        resultado["ms_consulta"] = _ms(inicio)
+
+        vaga = obter_governador().vaga(chave_host(conn_data), chave_tenant(conn_data))
+        with vaga:
+            for fonte, (sql, params) in views.items():
+                inicio = time.perf_counter()
+                try:
+                    cur.execute(sql, params)
+                    cur.fetchall()
+                    resultado[f"ms_{fonte}"] = _ms(inicio)
+                except Exception as e:
+                    resultado["erro"] = f"{fonte}: {e}"
+        cur.close()
+        resultado["ok"] = int(resultado["erro"] is None)
+    except Exception as e:
+        resultado["erro"] = f"consulta: {e}"
+    finally:
+        conn.close()
+    return resultado
+
+
+def falha(linha):
+    """Sondagem que falhou (as não sondadas não contam)."""
+    return not linha["ok"] and linha["erro"] != NAO_SONDADO
+
+
+def _sem_resultado(erro):
+    resultado = {"ok": 0, "erro": erro, "ms_conexao": None, "ms_consulta": None}
+    resultado.update({f"ms_{fonte}": None for fonte in VIEWS})
+    return resultado
+
+
+def _esperar(futuros, inicios, limite, threads):
+    """
+    Espera as sondagens (futuro -> índice em `inicios`, preenchido quando a
+    sondagem começa), cada uma por até `limite` segundos desde que começou.
+    Devolve os futuros esgotados; os que não terminaram nem esgotaram ainda
+    não começaram (todas as threads presas em sondagens esgotadas).
+    """
+    pendentes = set(futuros)
+    esgotados = set()
+    while pendentes:
+        agora = time.monotonic()
+        comecados = {f: inicios[futuros[f]] for f in pendentes if futuros[f] in inicios}
+        for futuro in [f for f, comeco in comecados.items() if agora - comeco > limite]:
+            pendentes.discard(futuro)
+            esgotados.add(futuro)
+            del comecados[futuro]
+        presos = sum(1 for f in esgotados if not f.done())
+        if not comecados and presos >= threads:
+            break
+        prazos = [comeco + limite - agora for comeco in comecados.values()]
+        _, pendentes = wait(pendentes, timeout=max(min(prazos, default=1.0), 0.05),
+                            return_when=FIRST_COMPLETED)
+    return esgotados
+
+
+def sondar_frota(clientes, conectar=None, threads=None, timeout=None):
+    """
+    Sonda os clientes (registros da tabela clientes) em paralelo, grava a
+    rodada no armazém e devolve a lista de resultados.
+    """
+    from database import chave_host, conn_data_da_empresa
+
+    armazem.garantir("saude_sondagens", _DDL)
+    rodada = datetime.now().isoformat(timespec="seconds")
+    views = _instrucoes_views()
+    clientes = list(clientes)
+    threads = threads or THREADS
+    inicio = time.perf_counter()
+
+    # índice do cliente -> início da sondagem no pool: o limite conta a partir daí
+    inicios = {}
+
+    def _sondar_medido(indice, conn_data):
+        inicios[indice] = time.monotonic()
+        return sondar(conn_data, conectar, views)
+
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="azoup-saude")
+    futuros = {executor.submit(_sondar_medido, i, conn_data_da_empresa(c)): i for i, c in enumerate(clientes)}
+    esgotados = _esperar(futuros, inicios, timeout or TIMEOUT, threads)
+    # sondagens presas (host que não responde) seguem em segundo plano; não esperamos por elas
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    linhas = []
+    for futuro, indice in futuros.items():
+        cliente = clientes[indice]
+        if futuro in esgotados and not futuro.done():
+            resultado = _sem_resultado("tempo esgotado")
+        elif futuro.done() and not futuro.cancelled():
+            resultado = futuro.result()
+        else:
+            resultado = _sem_resultado(NAO_SONDADO)
+        linhas.append(dict(
+            rodada=rodada,
+            momento=datetime.now().isoformat(timespec="seconds"),
+            cliente_id=str(cliente.get("id")),
+            api=cliente.get("api"),
+            nome=cliente.get("nome"),
+            host=chave_host(conn_data_da_empresa(cliente)),
+            **resultado,
+        ))
+    armazem.inserir("saude_sondagens", linhas)
+
+    telemetria.registrar_tempo("saude.rodada", time.perf_counter() - inicio)
+    telemetria.incrementar("saude.sondagens", len(linhas))
+    telemetria.incrementar("saude.falhas", sum(1 for linha in linhas if falha(linha)))
+    return linhas
+
+
+def historico(dias=30, api=None):
+    """Sondagens dos últimos `dias` (de um cliente, se `api`), em ordem cronológica."""
+    armazem.garantir("saude_sondagens", _DDL)
+    desde = (datetime.now() - timedelta(days=dias)).isoformat(timespec="seconds")
+    sql = "SELECT * FROM saude_sondagens WHERE momento >= ?"
+    params = [desde]
+    if api:
+        sql += " AND api = ?"
+        params.append(api)
+    df = armazem.consultar(sql + " ORDER BY momento", params)
+    df["momento"] = df["momento"].astype("datetime64[ns]")
+    return df
+
+
+def degradados(df, fator=FATOR_DEGRADADO):
+    """
+    Última sondagem de cada cliente com falha ou com algum tempo acima de
+    `fator` vezes a mediana do histórico do cliente (coluna motivo). As não
+    sondadas são ignoradas.
+    """
+    import pandas as pd
+
+    df = df[df["erro"].fillna("") != NAO_SONDADO]
+    if df.empty:
+        return df.assign(motivo=pd.Series(dtype=str))
+    colunas = ["ms_conexao", "ms_consulta"] + [f"ms_{fonte}" for fonte in VIEWS]
+    # piso de 1 ms: tempos quase nulos não geram falsos degradados
+    medianas = df.groupby("api")[colunas].median().clip(lower=1)
+    ultimas = df.sort_values("momento").groupby("api").tail(1).set_index("api")
+    razoes = ultimas[colunas] / medianas.loc[ultimas.index, colunas]
+
+    motivo = pd.Series("", index=ultimas.index)
+    for coluna in colunas:
+        lento = razoes[coluna] > fator
+        motivo = motivo.where(~lento, motivo + f"; {coluna} {fator:g}x acima da mediana")
+    motivo = motivo.where(ultimas["ok"] == 1, "; falha: " + ultimas["erro"].fillna(""))
+    return ultimas.assign(motivo=motivo.str.lstrip("; "))[motivo != ""].reset_index()
@@ -0,0 +1,195 @@
+"""
+Sessões de login que sobrevivem à recarga da página.
+
+Recarregar o navegador zera o st.session_state, e a sessão voltava para a
+tela de login: autenticação no Supabase, consultas a usuario e clientes,
+conexão de teste com o Firebird e Dashboard frio. Aqui o login bem-sucedido
+emite um token assinado e com validade (Fernet, do cryptography: conteúdo
+cifrado, HMAC e instante de emissão), guardado no navegador no cookie
+COOKIE (SameSite=Strict; Secure em https), que a recarga envia de volta e
+o Streamlit expõe em st.context.cookies. O token não vai para a URL, então
+não fica no histórico, em links copiados nem nos logs de proxy.
+
+O Streamlit não tem rota própria para responder Set-Cookie: o cookie é
+gravado por um componente (JavaScript na página, ver auth.py) e por isso
+não pode ser HttpOnly. Para limitar o uso de um token copiado, ele fica
+preso ao navegador que fez o login: o token e a sessão guardam a impressão
+do cliente (hash de User-Agent e Accept-Language, impressao_cliente()), e a
+retomada de outro navegador é rejeitada.
+
+O token carrega só o identificador da sessão; a sessão fica no cache de
+sessões do servidor (processo, como diretorio.py). Na recarga, retomar o
+login custa validar o token, reler a linha do usuário na tabela usuario
+(perfil alterado ou usuário removido valem já na retomada seguinte) e
+consultar o cliente no diretório (diretorio.cliente_por_api, em memória).
+Os caches por tenant e o pool de conexões são do processo e indexados pelos
+dados de conexão, então a sessão retomada volta a usá-los sem nova conexão
+de teste.
+
+- AZOUP_VALIDADE_SESSAO: segundos de validade do token e da sessão (padrão 12 h);
+- AZOUP_CHAVE_SESSAO: chave Fernet (base64). Sem ela a chave é gerada por
+  processo, o que basta: o cache de sessões também é do processo, e um
+  reinício do servidor exige um novo login de qualquer forma.
+
+O logout revoga a sessão no servidor e apaga o cookie.
+"""
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+import telemetria
+
+VALIDADE = int(os.environ.get("AZOUP_VALIDADE_SESSAO", str(12 * 3600)))
+MAX_SESSOES = 10000
+COOKIE = "azoup_sessao"
+# versões anteriores levavam o token na URL; o parâmetro é só removido
+PARAMETRO_LEGADO = "sessao"
+
+_lock = threading.Lock()
+# id da sessão -> {"user", "cliente", "criada", "retomadas"}
+_sessoes = {}
+_fernet = None
+_estatisticas = {"emitidas": 0, "retomadas": 0, "rejeitadas": 0, "revogadas": 0}
+_registrado = False
+
+
+def _registrar_fonte():
+    global _registrado
+    if not _registrado:
+        _registrado = True
+        telemetria.registrar_fonte("Sessões", metricas)
+
+
+def _cifra():
+    global _fernet
+    from cryptography.fernet import Fernet
+
+    with _lock:
+        if _fernet is None:
+            _fernet = Fernet(os.environ.get("AZOUP_CHAVE_SESSAO") or Fernet.generate_key())
+        return _fernet
+
+
+def _limpar_vencidas(agora):
+    """Remove as sessões vencidas e, acima de MAX_SESSOES, as mais antigas (com _lock)."""
+    for sid in [sid for sid, s in _sessoes.items() if agora - s["criada"] > VALIDADE]:
+        del _sessoes[sid]
+    for sid in sorted(_sessoes, key=lambda sid: _sessoes[sid]["criada"])[:max(len(_sessoes) - MAX_SESSOES, 0)]:
+        del _sessoes[sid]
+
+
+def impressao_cliente(headers):
+    """Hash de User-Agent e Accept-Language do navegador (headers: st.context.headers)."""
+    bruto = f"{headers.get('User-Agent', '')}\n{headers.get('Accept-Language', '')}"
+    return hashlib.sha256(bruto.encode()).hexdigest()
+
+
+def emitir(user, cliente):
+    """Registra a sessão do usuário no navegador `cliente` e devolve o token."""
+    _registrar_fonte()
+    sid = secrets.token_urlsafe(24)
+    agora = time.time()
+    with _lock:
+        _limpar_vencidas(agora)
+        _sessoes[sid] = {"user": user, "cliente": cliente, "criada": agora, "retomadas": 0}
+        _estatisticas["emitidas"] += 1
+    telemetria.incrementar("sessoes.emitidas")
+    conteudo = {"sid": sid, "uid": user.get("id"), "cli": cliente}
+    return _cifra().encrypt(json.dumps(conteudo).encode()).decode()
+
+
+def _sessao(token, cliente=None):
+    """
+    (sid, sessão) de um token válido e não vencido, ou (None, None). Com
+    `cliente`, o token e a sessão precisam ser do mesmo navegador.
+    """
+    from cryptography.fernet import InvalidToken
+
+    try:
+        conteudo = json.loads(_cifra().decrypt(token.encode(), ttl=VALIDADE))
+    except (InvalidToken, ValueError, TypeError, AttributeError):
+        return None, None
+    if cliente is not None and not hmac.compare_digest(str(conteudo.get("cli")), cliente):
+        return None, None
+    with _lock:
+        sessao = _sessoes.get(conteudo.get("sid"))
+        if sessao is None or sessao["user"].get("id") != conteudo.get("uid"):
+            return None, None
+        if cliente is not None and not hmac.compare_digest(sessao["cliente"], cliente):
+            return None, None
+        return conteudo["sid"], sessao
+
+
+def _usuario(uid):
+    """Linha atual do usuário na tabela usuario, ou None se não existe mais."""
+    from database import init_supabase
+
+    dados = init_supabase().table("usuario").select("*").eq("id", uid).execute().data
+    return dados[0] if dados else None
+
+
+def restaurar(token, cliente):
+    """
+    (user, empresa) da sessão do token, ou None se o token for inválido ou de
+    outro navegador, a sessão tiver vencido ou sido revogada, o usuário não
+    existir mais ou a licença do cliente tiver expirado.
+    """
+    import diretorio
+
+    _registrar_fonte()
+    with telemetria.cronometro("sessoes.validacao"):
+        sid, sessao = _sessao(token, cliente)
+        user = empresa = None
+        if sessao is not None:
+            try:
+                user = _usuario(sessao["user"].get("id"))
+            except Exception:
+                # sem como conferir o usuário, a retomada cai no login normal
+                user = None
+        if user is not None:
+            empresa = diretorio.cliente_por_api(user.get("api"))
+    if empresa is None or not licenca_vigente(empresa):
+        with _lock:
+            _estatisticas["rejeitadas"] += 1
+        telemetria.incrementar("sessoes.rejeitadas")
+        return None
+    with _lock:
+        sessao["user"] = user
+        sessao["retomadas"] += 1
+        _estatisticas["retomadas"] += 1
+    telemetria.incrementar("sessoes.retomadas")
+    return user, empresa
+
+
+def revogar(token):
+    """Encerra a sessão do token no servidor (logout)."""
+    sid, _ = _sessao(token) if token else (None, None)
+    if sid is None:
+        return
+    with _lock:
+        if _sessoes.pop(sid, None) is not None:
+            _estatisticas["revogadas"] += 1
+    telemetria.incrementar("sessoes.revogadas")
+
+
+def licenca_vigente(empresa):
+    """data_licenca do cliente preenchida e não anterior a hoje (mesma regra do login)."""
+    from datetime import date, datetime
+
+    data_licenca = empresa.get("data_licenca")
+    if not data_licenca:
+        return False
+    if isinstance(data_licenca, str):
+        data_licenca = datetime.strptime(data_licenca, "%Y-%m-%d").date()
+    return data_licenca >= date.today()
+
+
+def metricas():
+    with _lock:
+        if not _estatisticas["emitidas"] and not _estatisticas["rejeitadas"]:
+            return []
+        return [dict(_estatisticas, ativas=len(_sessoes))]
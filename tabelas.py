@@ -0,0 +1,107 @@
+"""
+Tabelas paginadas no servidor.
+
+st.dataframe envia ao navegador todas as linhas do DataFrame, e as páginas
+formatavam cada célula antes (Styler.format em Vendedores, apply por linha
+em Vendas). Aqui a busca, a ordenação e a paginação são feitas sobre o
+DataFrame já carregado e só as linhas da página visível são enviadas. O
+formato de moeda vai no column_config (aplicado pelo navegador), sem
+transformar os valores em texto.
+
+O índice filtrado e ordenado fica memorizado na sessão por (impressão
+digital dos dados, busca, ordenação), então trocar de página só fatia.
+Chamada dentro de um st.fragment, interagir com a tabela só reexecuta o
+fragmento.
+"""
+import math
+
+import streamlit as st
+
+import telemetria
+
+TAMANHOS_PAGINA = [25, 50, 100, 250]
+
+
+def coluna_moeda(rotulo=None):
+    return st.column_config.NumberColumn(rotulo, format="R$ %.2f")
+
+
+def _filtrar_ordenar(df, busca, coluna, crescente):
+    """Posições das linhas que contêm a busca (em qualquer coluna de texto), na ordem pedida."""
+    import numpy as np
+
+    with telemetria.cronometro("tabelas.filtrar_ordenar"):
+        visiveis = df.reset_index()
+        if busca:
+            mascara = np.zeros(len(visiveis), dtype=bool)
+            for nome in visiveis.columns:
+                serie = visiveis[nome]
+                if serie.dtype == object or str(serie.dtype) in ("string", "category"):
+                    mascara |= serie.astype(str).str.contains(busca, case=False, regex=False, na=False).to_numpy()
+            visiveis = visiveis[mascara]
+        if coluna:
+            visiveis = visiveis.sort_values(coluna, ascending=crescente, kind="stable")
+        return visiveis.index.to_numpy()
+
+
+def tabela_paginada(chave, df, column_config=None, ordem=None, por_pagina=50):
+    """
+    Tabela com busca, ordenação e paginação no servidor.
+
+    chave: identifica a tabela (chaves dos widgets e memo da sessão)
+    ordem: (coluna, crescente) inicial
+    O índice do DataFrame é exibido como primeira coluna (ex.: pivot por vendedor).
+    """
+    from graficos import impressao
+    from paginas.comum import memo
+
+    mostrar_indice = df.index.name is not None
+    colunas = ([df.index.name] if mostrar_indice else []) + [str(c) for c in df.columns]
+    coluna_padrao, crescente_padrao = ordem or (None, True)
+
+    c1, c2, c3, c4 = st.columns([4, 3, 2, 2])
+    with c1:
+        busca = st.text_input("Buscar", key=f"{chave}_busca", placeholder="Buscar...",
+                              label_visibility="collapsed").strip()
+    with c2:
+        opcoes = ["(sem ordenação)"] + colunas
+        coluna = st.selectbox("Ordenar por", opcoes, key=f"{chave}_ordem",
+                              index=opcoes.index(coluna_padrao) if coluna_padrao in opcoes else 0,
+                              label_visibility="collapsed")
+    with c3:
+        sentido = st.selectbox("Sentido", ["Decrescente", "Crescente"], key=f"{chave}_sentido",
+                               index=1 if crescente_padrao else 0, label_visibility="collapsed")
+    with c4:
+        por_pagina = st.selectbox("Linhas por página", TAMANHOS_PAGINA, key=f"{chave}_tamanho",
+                                  index=TAMANHOS_PAGINA.index(por_pagina) if por_pagina in TAMANHOS_PAGINA else 1,
+                                  label_visibility="collapsed")
+
+    coluna = None if coluna == opcoes[0] else coluna
+    crescente = sentido == "Crescente"
+    # colunas não-texto (ex.: meses do pivot) são comparadas pelo nome convertido
+    nomes = {str(c): c for c in df.columns}
+    if mostrar_indice:
+        nomes[df.index.name] = df.index.name
+    posicoes = memo(f"tabela.{chave}", (impressao(df), busca, coluna, crescente),
+                    lambda: _filtrar_ordenar(df, busca, nomes.get(coluna), crescente))
+
+    total = len(posicoes)
+    paginas = max(1, math.ceil(total / por_pagina))
+    # nova busca, ordenação ou tamanho de página voltam para a página 1
+    chave_pagina = f"{chave}_pagina_{abs(hash((busca, coluna, crescente, por_pagina, total)))}"
+
+    inicio = (st.session_state.get(chave_pagina, 1) - 1) * por_pagina
+    pagina = df.iloc[posicoes[inicio:inicio + por_pagina]]
+    telemetria.incrementar("tabelas.linhas_nao_enviadas", len(df) - len(pagina))
+
+    st.dataframe(pagina, column_config=column_config, use_container_width=True, hide_index=not mostrar_indice)
+
+    r1, r2 = st.columns([3, 1])
+    with r1:
+        if total:
+            st.caption(f"Linhas {inicio + 1}-{min(inicio + por_pagina, total)} de {total:,}"
+                       + (f" (filtradas de {len(df):,})" if total != len(df) else ""))
+        else:
+            st.caption("Nenhuma linha encontrada.")
+    with r2:
+        st.number_input("Página", min_value=1, max_value=paginas, step=1, key=chave_pagina)
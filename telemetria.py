@@ -0,0 +1,83 @@
+"""
+Telemetria do processo: contadores e tempos acumulados por nome.
+
+Os módulos registram aqui (registrar_tempo / incrementar) e a página de
+Configurações exibe o resumo com show_telemetria(). O estado é do processo,
+ou seja, compartilhado por todas as sessões do mesmo servidor Streamlit.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_tempos = defaultdict(lambda: deque(maxlen=500))
+_contadores = defaultdict(float)
+# Fontes extras de métricas (ex.: governador de consultas) -> função que retorna lista de dicts
+_fontes = {}
+
+
+def registrar_tempo(nome, segundos):
+    with _lock:
+        _tempos[nome].append(segundos)
+
+
+def incrementar(nome, valor=1):
+    with _lock:
+        _contadores[nome] += valor
+
+
+@contextmanager
+def cronometro(nome):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_tempo(nome, time.perf_counter() - inicio)
+
+
+def registrar_fonte(nome, funcao):
+    _fontes[nome] = funcao
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+def resumo():
+    """Retorna (tempos, contadores, fontes) prontos para exibição."""
+    with _lock:
+        tempos = [
+            {
+                "nome": nome,
+                "amostras": len(valores),
+                "media_ms": round(sum(valores) / len(valores) * 1000, 2),
+                "p95_ms": round(percentil(valores, 0.95) * 1000, 2),
+                "total_s": round(sum(valores), 3),
+            }
+            for nome, valores in sorted(_tempos.items()) if valores
+        ]
+        contadores = [{"nome": nome, "valor": valor} for nome, valor in sorted(_contadores.items())]
+    fontes = {nome: funcao() for nome, funcao in _fontes.items()}
+    return tempos, contadores, fontes
+
+
+def show_telemetria():
+    import streamlit as st
+
+    tempos, contadores, fontes = resumo()
+    if tempos:
+        st.markdown("**Tempos**")
+        st.dataframe(tempos, use_container_width=True, hide_index=True)
+    if contadores:
+        st.markdown("**Contadores**")
+        st.dataframe(contadores, use_container_width=True, hide_index=True)
+    for nome, linhas in fontes.items():
+        if linhas:
+            st.markdown(f"**{nome}**")
+            st.dataframe(linhas, use_container_width=True, hide_index=True)
+    if not (tempos or contadores or any(fontes.values())):
+        st.info("Nenhuma métrica registrada ainda neste processo.")